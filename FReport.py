@@ -5,11 +5,27 @@ import ttkbootstrap as tb
 from ttkbootstrap.constants import *
 from tkinter import filedialog
 import logging
+import multiprocessing
 import sys
 from tkinter import PhotoImage
 
-import dataDownload  # Your updated DailyOS
-import updateReport  # Your updated update_report
+import instrumentation
+import uiDispatcher
+
+def run_daily_os(username, password, folder_path, progress_callback):
+    # Imported on the worker thread: dataDownload pulls in selenium and
+    # pandas, which would otherwise delay the window by about a second.
+    try:
+        import dataDownload
+    except Exception:
+        logging.error("Could not load dataDownload", exc_info=True)
+        progress_callback("stop", 100)
+        return
+    dataDownload.DailyOS(username, password, folder_path, progress_callback)
+
+def run_update_report(folder_path, debug, progress_callback):
+    import updateReport
+    updateReport.update_report(folder_path, debug, progress_callback)
 
 class FormPage(tb.Frame):
     def __init__(self, parent, controller):
@@ -140,12 +156,12 @@ class FormPage(tb.Frame):
 
             # Start DailyOS in background
             threading.Thread(
-                target=dataDownload.DailyOS,
+                target=run_daily_os,
                 args=(
                     PDBSusername,
                     PDBSpassword,
                     folder_path,
-                    self.controller.frames["SecondPage"].progress_control,
+                    self.controller.dispatcher.wrap(self.controller.frames["SecondPage"].progress_control),
                 ),
                 daemon=True
             ).start()
@@ -198,6 +214,20 @@ class SecondPage(tb.Frame):
             pady=10
         )
 
+        self.stage_label = tb.Label(
+            self,
+            text="",
+            font=("Segoe UI", 9),
+            bootstyle=SECONDARY,
+            wraplength=440
+        )
+        self.stage_label.grid(
+            row=3,
+            column=0,
+            columnspan=3
+        )
+        self.stages = []
+
         self.continue_btn = tb.Button(
             self,
             text="Update Report",
@@ -206,7 +236,7 @@ class SecondPage(tb.Frame):
             command=self.go_to_third
         )
         self.continue_btn.grid(
-            row=3,
+            row=4,
             column=0,
             columnspan=3,
             pady=20
@@ -219,11 +249,11 @@ class SecondPage(tb.Frame):
         self.controller.show_frame("ThirdPage")
         folder_path = os.path.normpath(self.controller.frames["FormPage"].folder_path_var.get())
         threading.Thread(
-            target=updateReport.update_report,
+            target=run_update_report,
             args=(
                 folder_path,
                 False,
-                self.controller.frames["ThirdPage"].progress_control,
+                self.controller.dispatcher.wrap(self.controller.frames["ThirdPage"].progress_control),
             ),
             daemon=True
         ).start()
@@ -235,18 +265,25 @@ class SecondPage(tb.Frame):
                 bootstyle=INFO
             )
             self.progress['value'] = 0
+            self.stages = []
+            self.stage_label.config(text="")
         elif action == "update":
             self.progress['value'] = value
             self.status_label.config(
                 text=f"Loading... {int(value)}%",
                 bootstyle=INFO
             )
+        elif action == "stage":
+            self.stages.append(value)
+            self.stage_label.config(text=f"{value['step']}: {value['wall_seconds']:.1f}s")
         elif action == "stop":
             self.progress['value'] = 100
             self.status_label.config(
                 text="Done!",
                 bootstyle=SUCCESS
             )
+            if self.stages:
+                self.stage_label.config(text=f"Slowest: {instrumentation.slowest(self.stages)}")
             self.continue_btn.grid()  # Show button
 
 class ThirdPage(tb.Frame):
@@ -294,6 +331,20 @@ class ThirdPage(tb.Frame):
             pady=10
         )
 
+        self.stage_label = tb.Label(
+            self,
+            text="",
+            font=("Segoe UI", 9),
+            bootstyle=SECONDARY,
+            wraplength=440
+        )
+        self.stage_label.grid(
+            row=3,
+            column=0,
+            columnspan=3
+        )
+        self.stages = []
+
         self.done_btn = tb.Button(
             self,
             text="Back to Form Page",
@@ -302,7 +353,7 @@ class ThirdPage(tb.Frame):
             command=lambda: controller.show_frame("FormPage")
         )
         self.done_btn.grid(
-            row=3,
+            row=4,
             column=0,
             columnspan=3,
             pady=20
@@ -318,25 +369,32 @@ class ThirdPage(tb.Frame):
                 bootstyle=INFO
             )
             self.progress['value'] = 0
+            self.stages = []
+            self.stage_label.config(text="")
         elif action == "update":
             self.progress['value'] = value
             self.status_label.config(
                 text=f"Updating... {int(value)}%",
                 bootstyle=INFO
             )
+        elif action == "stage":
+            self.stages.append(value)
+            self.stage_label.config(text=f"{value['step']}: {value['wall_seconds']:.1f}s")
         elif action == "stop":
             self.progress['value'] = 100
             self.status_label.config(
                 text="Update complete!",
                 bootstyle=SUCCESS
             )
+            if self.stages:
+                self.stage_label.config(text=f"Slowest: {instrumentation.slowest(self.stages)}")
             self.done_btn.grid()  # Show button
 
 class App(tb.Window):
     def __init__(self):
         super().__init__(themename="flatly")
         self.title("Fulfillment Report Data Downloader")
-        self.geometry("500x250+700+300")
+        self.geometry("500x280+700+300")
 
         # --- Set custom window icon ---
         icon_filename = "FulfillmentRptIcon.ico"  # Change to your icon file name
@@ -367,6 +425,9 @@ class App(tb.Window):
                 print(f"Failed to set iconphoto: {e}")
 
         # --- Continue setting up your UI ---
+        # Worker threads report progress through the dispatcher, never to widgets directly.
+        self.dispatcher = uiDispatcher.UIDispatcher(self)
+
         container = tb.Frame(self)
         container.pack(fill="both", expand=True)
 
@@ -384,5 +445,7 @@ class App(tb.Window):
         frame.tkraise()
 
 if __name__ == "__main__":
+    # Worker processes of the parallel report parser re-enter here when frozen.
+    multiprocessing.freeze_support()
     app = App()
     app.mainloop()
@@ -0,0 +1,125 @@
+"""
+Downloads the Order Fulfillment Report for every business day in a date
+range, several days at a time.
+
+Each worker owns a download folder (backfill/worker_<n>) and, in Selenium
+mode, one browser session that stays logged in across its dates, so at
+most `workers` browsers run at once and DailyReport*.xls files from
+different workers never land in the same folder. Converted reports are
+written as backfill/DailyReport_<MM-DD-YYYY>.xlsx.
+
+    python backfill.py 09/01/2025 09/30/2025 --workers 3 --mode http
+"""
+import argparse
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+import dataDownload
+import driverManager
+from httpFetch import PDBS_URL
+
+
+def backfill(username, password, dPath, start_date, end_date, workers=3, mode="selenium",
+             base_url=PDBS_URL, convert="stream", overwrite=False, progress_callback=None):
+    """
+    Fetches and converts every business day between start_date and end_date
+    (inclusive). Returns one status dict per date, oldest first.
+    """
+    out_dir = os.path.join(dPath, "backfill")
+    os.makedirs(out_dir, exist_ok=True)
+
+    dates = dataDownload.business_days_between(start_date, end_date)
+    results = {d: {"date": d.strftime("%m/%d/%Y"), "status": "pending"} for d in dates}
+    todo = queue.Queue()
+    for d in dates:
+        target = os.path.join(out_dir, f"DailyReport_{d.strftime('%m-%d-%Y')}.xlsx")
+        if os.path.exists(target) and not overwrite:
+            results[d].update(status="skipped", path=target, seconds=0.0)
+        else:
+            todo.put((d, target))
+
+    total = len(dates)
+    done = [total - todo.qsize()]
+    lock = threading.Lock()
+
+    def worker(index):
+        worker_dir = os.path.join(out_dir, f"worker_{index}")
+        os.makedirs(worker_dir, exist_ok=True)
+        while True:
+            try:
+                report_date, target = todo.get_nowait()
+            except queue.Empty:
+                break
+            start = time.perf_counter()
+            result = results[report_date]
+            try:
+                file_path = dataDownload.fetch_report(
+                    username, password, worker_dir, report_date, None, mode, base_url, reuse_session=True
+                )
+                dataDownload.convert_download(file_path, target, convert)
+                result.update(status="ok", path=target)
+            except Exception as e:
+                logging.error(f"Backfill failed for {result['date']}", exc_info=True)
+                result.update(status="failed", error=str(e))
+            result["seconds"] = round(time.perf_counter() - start, 2)
+            print(f"[worker {index}] {result['date']}: {result['status']} ({result['seconds']} s)")
+
+            with lock:
+                done[0] += 1
+                if progress_callback and total:
+                    progress_callback("update", done[0] / total * 100)
+
+    if progress_callback:
+        progress_callback("start")
+    started = time.perf_counter()
+    pool_size = max(1, min(workers, todo.qsize()))
+    threads = [threading.Thread(target=worker, args=(i,), daemon=True) for i in range(pool_size)]
+    try:
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    finally:
+        for i in range(pool_size):
+            driverManager.close_session(os.path.join(out_dir, f"worker_{i}"))
+        if progress_callback:
+            progress_callback("stop", 100)
+
+    elapsed = time.perf_counter() - started
+    fetched = [r for r in results.values() if r["status"] == "ok"]
+    failed = [r for r in results.values() if r["status"] == "failed"]
+    print(f"Backfill: {len(fetched)} fetched, {len(failed)} failed, "
+          f"{total - len(fetched) - len(failed)} skipped in {elapsed:.1f} s "
+          f"({len(fetched) / elapsed * 60 if elapsed else 0:.1f} reports/min)")
+    for r in failed:
+        print(f"  {r['date']}: {r['error']}")
+
+    return [results[d] for d in dates]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill daily Order Fulfillment Reports")
+    parser.add_argument("start", help="MM/DD/YYYY")
+    parser.add_argument("end", help="MM/DD/YYYY")
+    parser.add_argument("--folder", default=".")
+    parser.add_argument("--workers", type=int, default=3)
+    parser.add_argument("--mode", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--base-url", default=PDBS_URL)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    backfill(
+        os.environ.get("PDBS_USERNAME", ""),
+        os.environ.get("PDBS_PASSWORD", ""),
+        os.path.normpath(args.folder),
+        datetime.strptime(args.start, "%m/%d/%Y"),
+        datetime.strptime(args.end, "%m/%d/%Y"),
+        workers=args.workers,
+        mode=args.mode,
+        base_url=args.base_url,
+        overwrite=args.overwrite
+    )
@@ -0,0 +1,204 @@
+"""
+Content-addressed store for the daily report backups.
+
+Instead of a flat folder of full DailyReport_<date>.xlsx copies, each
+report is stored once under backup/objects/<aa>/<sha256> (gzip-compressed
+when that actually saves space) and backup/index.json maps business dates
+to blobs. Identical days share a blob, "report for date X" is a dict
+lookup, and retention/compaction keep the folder from growing forever.
+"""
+import gzip
+import json
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime
+
+
+INDEX_NAME = "index.json"
+OBJECTS_DIR = "objects"
+INDEX_VERSION = 1
+# Compressed copies must be at least this much smaller to be kept (xlsx is
+# already a zip, so it often is not).
+MIN_SAVING = 0.05
+
+_FLAT_NAME = re.compile(r"^(?P<name>.+)_(?P<date>\d{2}-\d{2}-\d{4})(?P<ext>\.[^.]+)$")
+
+
+def date_key(business_date):
+    """
+    ISO "YYYY-MM-DD" key of a date, datetime or "MM-DD-YYYY" string.
+    """
+    if isinstance(business_date, datetime):
+        business_date = business_date.date()
+    if isinstance(business_date, date):
+        return business_date.isoformat()
+    return datetime.strptime(business_date, "%m-%d-%Y").date().isoformat()
+
+
+def sha256_file(path, chunk_size=1 << 20):
+    """
+    Hex sha256 of the file at path, read in chunks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class BackupStore:
+    def __init__(self, backup_path):
+        self.backup_path = backup_path
+        self.objects_path = os.path.join(backup_path, OBJECTS_DIR)
+        self.index_path = os.path.join(backup_path, INDEX_NAME)
+        self._lock = threading.Lock()
+        os.makedirs(self.objects_path, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "entries": {}, "blobs": {}}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.backup_path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _blob_path(self, digest):
+        return os.path.join(self.objects_path, digest[:2], digest)
+
+    def put(self, source_path, business_date, name=None):
+        """
+        Stores source_path as the report of business_date and returns its
+        sha256. A blob that is already stored is not written again.
+        """
+        digest = sha256_file(source_path)
+        key = date_key(business_date)
+        with self._lock:
+            if digest not in self.index["blobs"]:
+                blob_path = self._blob_path(digest)
+                os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+                size = os.path.getsize(source_path)
+                tmp_path = blob_path + ".tmp"
+                with open(source_path, "rb") as src, gzip.open(tmp_path, "wb", compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, 1 << 20)
+                codec = "gzip"
+                if os.path.getsize(tmp_path) > size * (1 - MIN_SAVING):
+                    shutil.copyfile(source_path, tmp_path)
+                    codec = "raw"
+                os.replace(tmp_path, blob_path)
+                self.index["blobs"][digest] = {"codec": codec, "size": size, "stored": os.path.getsize(blob_path)}
+            self.index["entries"][key] = {
+                "blob": digest,
+                "name": name or os.path.basename(source_path),
+                "stored_at": time.time(),
+            }
+            self._save_index()
+        return digest
+
+    def lookup(self, business_date):
+        return self.index["entries"].get(date_key(business_date))
+
+    def dates(self):
+        return sorted(date.fromisoformat(k) for k in self.index["entries"])
+
+    def latest_before(self, business_date):
+        """
+        Most recent stored date strictly before business_date, or None.
+        """
+        key = date_key(business_date)
+        earlier = [k for k in self.index["entries"] if k < key]
+        return date.fromisoformat(max(earlier)) if earlier else None
+
+    def open(self, business_date):
+        """
+        Readable binary file object with the stored report of business_date.
+        """
+        entry = self.lookup(business_date)
+        if entry is None:
+            raise KeyError(f"No backup for {date_key(business_date)}")
+        path = self._blob_path(entry["blob"])
+        if self.index["blobs"][entry["blob"]]["codec"] == "gzip":
+            return gzip.open(path, "rb")
+        return open(path, "rb")
+
+    def restore(self, business_date, destination_path):
+        with self.open(business_date) as src, open(destination_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        return destination_path
+
+    def apply_retention(self, keep_daily=90, keep_monthly=24, today=None):
+        """
+        Keeps every date from the last keep_daily days and the last stored
+        date of each of the last keep_monthly months, drops the rest from the
+        index, then compacts. Returns the number of dates dropped.
+        """
+        today = today or date.today()
+        daily_cutoff = today.toordinal() - keep_daily
+        month_cutoff = (today.year * 12 + today.month - 1) - keep_monthly
+
+        keep = set()
+        month_last = {}
+        for d in self.dates():
+            if d.toordinal() > daily_cutoff:
+                keep.add(d.isoformat())
+            month = d.year * 12 + d.month - 1
+            if month > month_cutoff:
+                month_last[month] = d.isoformat()
+        keep.update(month_last.values())
+
+        with self._lock:
+            dropped = [k for k in self.index["entries"] if k not in keep]
+            for k in dropped:
+                del self.index["entries"][k]
+            self._save_index()
+        self.compact()
+        return len(dropped)
+
+    def compact(self):
+        """
+        Deletes blobs no index entry refers to. Returns bytes freed.
+        """
+        freed = 0
+        with self._lock:
+            referenced = {e["blob"] for e in self.index["entries"].values()}
+            for digest in list(self.index["blobs"]):
+                if digest in referenced:
+                    continue
+                path = self._blob_path(digest)
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                except OSError:
+                    pass
+                del self.index["blobs"][digest]
+            self._save_index()
+        return freed
+
+    def import_flat_backups(self, file_prefix="DailyReport", remove=False):
+        """
+        Moves the old flat <prefix>_<MM-DD-YYYY>.xlsx backup copies into
+        the store. Returns the number imported.
+        """
+        imported = 0
+        for entry in os.scandir(self.backup_path):
+            match = _FLAT_NAME.match(entry.name)
+            if not entry.is_file() or not match or not entry.name.startswith(file_prefix):
+                continue
+            self.put(entry.path, match.group("date"), name=match.group("name") + match.group("ext"))
+            imported += 1
+            if remove:
+                os.remove(entry.path)
+        return imported
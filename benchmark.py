@@ -0,0 +1,374 @@
+"""
+Benchmarks every local stage of the DailyOS / update_report pipeline on
+synthetic reports and saves the results as JSON, so versions can be
+compared.
+
+Stages (each run in a fresh process, so peak RSS belongs to that stage):
+    fetch    - HTTP fetch from the local PDBS stub (pdbsStub)
+    detect   - download completion detection (downloadWatch) on a simulated
+               Chrome download (.crdownload written, then renamed)
+    parse    - reportParser.read_report_html (HTML) / pd.read_excel (BIFF)
+    convert  - xlsConvert.convert_report into DailyReport.xlsx
+    backup   - backupStore.BackupStore.put of DailyReport.xlsx
+    pivot    - pivotEngine.compute_pivot over DailyReport.xlsx
+
+    python benchmark.py --rows 1000 10000 100000 --variant html biff
+    python benchmark.py --compare bench_results/old.json bench_results/new.json
+    python benchmark.py --browser [--browser-url https://pdbs.supermicro.com:18893/Home]
+    python benchmark.py --startup
+
+The BIFF variant needs xlwt and is capped at 65,535 rows (the .xls sheet
+limit).
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import pdbsStub
+
+
+STAGES = ["fetch", "detect", "parse", "convert", "backup", "pivot"]
+VARIANTS = ["html", "biff"]
+BIFF_MAX_ROWS = 65535
+RESULTS_DIR = "bench_results"
+STARTUP_MODULES = {"gui": "FReport", "cli": "cli"}
+STARTUP_BUDGET = 1.0
+HEAVY_MODULES = ["selenium", "webdriver_manager", "pandas", "numpy", "lxml", "requests", "win32com"]
+
+_STARTUP_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{
+    "import_seconds": time.perf_counter() - start,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+PIVOT_SPECS = [
+    {"name": "Qty by Customer and Status", "index": ["Customer"], "columns": ["Status"], "values": {"Qty": "sum"}},
+    {"name": "Amount by Part", "index": ["Part No"], "values": {"Amount": "sum", "Line": "count"}},
+    {"name": "Open lines by Status", "index": ["Status", "Line"], "values": {"Qty": "sum"}},
+]
+
+
+def write_report_biff(path, rows, report_date=None, seed=0):
+    """
+    A real BIFF .xls with the same content as the HTML report.
+    """
+    import xlwt
+
+    book = xlwt.Workbook()
+    sheet = book.add_sheet("DailyReport")
+    for col, name in enumerate(pdbsStub.REPORT_COLUMNS):
+        sheet.write(0, col, name)
+    for r, row in enumerate(pdbsStub.iter_report_rows(rows, report_date, seed), start=1):
+        for col, value in enumerate(row):
+            sheet.write(r, col, value)
+    book.save(path)
+    return path
+
+
+def generate_report(workdir, rows, variant):
+    path = os.path.join(workdir, "DailyReport.xls")
+    if variant == "biff":
+        return write_report_biff(path, rows)
+    return pdbsStub.write_report_html(path, rows)
+
+
+def _stage_fetch(workdir, rows, variant):
+    import httpFetch
+
+    fetch_dir = os.path.join(workdir, "fetch")
+    os.makedirs(fetch_dir, exist_ok=True)
+    server, base_url = pdbsStub.start_server(rows=rows)
+    try:
+        path = httpFetch.fetch_report_http("demo", "demo", fetch_dir, datetime.today(), base_url=base_url)
+    finally:
+        server.shutdown()
+    return {"bytes": os.path.getsize(path), "requests": server.state.requests}
+
+
+def _stage_detect(workdir, rows, variant):
+    import downloadWatch
+
+    detect_dir = os.path.join(workdir, "detect")
+    os.makedirs(detect_dir, exist_ok=True)
+    source = os.path.join(workdir, "DailyReport.xls")
+    final_path = os.path.join(detect_dir, "DailyReport.xls")
+    if os.path.exists(final_path):
+        os.remove(final_path)
+    renamed = {}
+
+    def fake_chrome():
+        time.sleep(0.2)
+        partial = final_path + ".crdownload"
+        with open(source, "rb") as src, open(partial, "wb") as dst:
+            dst.write(src.read())
+        renamed["at"] = time.perf_counter()
+        os.replace(partial, final_path)
+
+    with downloadWatch.DownloadWatcher(detect_dir) as watcher:
+        threading.Thread(target=fake_chrome, daemon=True).start()
+        watcher.wait(timeout=60)
+        detected = time.perf_counter()
+    return {"latency_ms": round((detected - renamed["at"]) * 1000, 2), "waiter": type(watcher._waiter).__name__}
+
+
+def _stage_parse(workdir, rows, variant):
+    path = os.path.join(workdir, "DailyReport.xls")
+    if variant == "biff":
+        import pandas as pd
+        df = pd.read_excel(path)
+    else:
+        import reportParser
+        df = reportParser.read_report_html(path)
+    return {"rows": len(df)}
+
+
+def _stage_convert(workdir, rows, variant):
+    import xlsConvert
+
+    return xlsConvert.convert_report(
+        os.path.join(workdir, "DailyReport.xls"),
+        os.path.join(workdir, "DailyReport.xlsx")
+    )
+
+
+def _stage_backup(workdir, rows, variant):
+    import backupStore
+
+    store = backupStore.BackupStore(os.path.join(workdir, "backup"))
+    digest = store.put(os.path.join(workdir, "DailyReport.xlsx"), datetime.today())
+    return {"stored_bytes": store.index["blobs"][digest]["stored"]}
+
+
+def _stage_pivot(workdir, rows, variant):
+    import pandas as pd
+    import pivotEngine
+
+    df = pd.read_excel(os.path.join(workdir, "DailyReport.xlsx"))
+    loaded = time.perf_counter()
+    for spec in PIVOT_SPECS:
+        pivotEngine.compute_pivot(df, pivotEngine.normalize_spec(spec))
+    return {"compute_seconds": round(time.perf_counter() - loaded, 3)}
+
+
+def _run_stage(stage, workdir, rows, variant, queue):
+    import reportParser
+
+    start_wall = time.perf_counter()
+    start_cpu = time.process_time()
+    try:
+        extra = globals()[f"_stage_{stage}"](workdir, rows, variant)
+        error = None
+    except Exception as e:
+        extra, error = {}, f"{type(e).__name__}: {e}"
+    queue.put({
+        "stage": stage,
+        "rows": rows,
+        "variant": variant,
+        "wall_seconds": round(time.perf_counter() - start_wall, 3),
+        "cpu_seconds": round(time.process_time() - start_cpu, 3),
+        "peak_rss_mb": round(reportParser.peak_rss_mb(), 1),
+        "error": error,
+        **extra
+    })
+
+
+def run(rows_list, variants, stages):
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    for variant in variants:
+        for rows in rows_list:
+            if variant == "biff" and rows > BIFF_MAX_ROWS:
+                print(f"Skipping biff at {rows} rows (over the {BIFF_MAX_ROWS} row .xls limit)")
+                continue
+            with tempfile.TemporaryDirectory() as workdir:
+                try:
+                    generate_report(workdir, rows, variant)
+                except ImportError as e:
+                    print(f"Skipping {variant}: {e}")
+                    break
+                for stage in stages:
+                    if stage == "fetch" and variant != "html":
+                        continue
+                    queue = ctx.Queue()
+                    proc = ctx.Process(target=_run_stage, args=(stage, workdir, rows, variant, queue))
+                    proc.start()
+                    result = queue.get()
+                    proc.join()
+                    results.append(result)
+                    status = result["error"] or ""
+                    print(f"{variant:<5} {rows:>9} {stage:<8} {result['wall_seconds']:>9.3f} s  "
+                          f"cpu {result['cpu_seconds']:>8.3f} s  peak {result['peak_rss_mb']:>8.1f} MB  {status}")
+    return results
+
+
+def compare_browser_profiles(url=None, runs=5):
+    """
+    Page-load latency and browser RSS of the default and lean Chrome
+    profiles (dataDownload.create_driver). Without url the PDBS stub's
+    login page is loaded.
+    """
+    import dataDownload
+    import driverManager
+
+    server = None
+    if url is None:
+        server, base_url = pdbsStub.start_server(rows=10)
+        url = base_url + "/Home"
+    results = []
+    try:
+        for lean in (False, True):
+            with tempfile.TemporaryDirectory() as download_dir:
+                start = time.perf_counter()
+                driver = dataDownload.create_driver(download_dir, lean=lean)
+                launch = time.perf_counter() - start
+                try:
+                    loads = []
+                    for _ in range(runs):
+                        start = time.perf_counter()
+                        driver.get(url)
+                        loads.append(time.perf_counter() - start)
+                    transferred = driver.execute_script(
+                        "return performance.getEntriesByType('resource')"
+                        ".reduce((n, r) => n + (r.transferSize || 0), 0)"
+                    )
+                    rss = driverManager.BrowserSession(driver, download_dir, 0, 0).rss_mb()
+                finally:
+                    driver.quit()
+            loads.sort()
+            result = {
+                "profile": "lean" if lean else "default",
+                "launch_seconds": round(launch, 3),
+                "load_ms_median": round(loads[len(loads) // 2] * 1000, 1),
+                "load_ms_max": round(loads[-1] * 1000, 1),
+                "resource_bytes": transferred,
+                "browser_rss_mb": round(rss, 1) if rss is not None else None,
+            }
+            results.append(result)
+            print(f"{result['profile']:<8} launch {result['launch_seconds']:>6.2f} s  "
+                  f"load {result['load_ms_median']:>8.1f} ms (max {result['load_ms_max']:.1f})  "
+                  f"resources {result['resource_bytes']} B  rss {result['browser_rss_mb']} MB")
+    finally:
+        if server:
+            server.shutdown()
+    return results
+
+
+def measure_startup(runs=5):
+    """
+    Time to start a fresh interpreter and import the GUI (FReport) and the
+    CLI (cli) modules, median of runs, and which heavy modules that pulled
+    in. Both should stay well under STARTUP_BUDGET seconds.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    results = []
+    for name, module in STARTUP_MODULES.items():
+        walls, probe, error = [], {}, None
+        code = _STARTUP_PROBE.format(module=module, heavy=HEAVY_MODULES)
+        for _ in range(runs):
+            start = time.perf_counter()
+            proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=here)
+            walls.append(time.perf_counter() - start)
+            if proc.returncode:
+                error = proc.stderr.strip().splitlines()[-1]
+                break
+            probe = json.loads(proc.stdout.strip().splitlines()[-1])
+        walls.sort()
+        result = {
+            "stage": "startup",
+            "variant": name,
+            "rows": 0,
+            "wall_seconds": round(walls[len(walls) // 2], 3),
+            "import_seconds": round(probe.get("import_seconds", 0), 3),
+            "peak_rss_mb": None,
+            "heavy_modules": probe.get("heavy_modules"),
+            "error": error,
+        }
+        results.append(result)
+        flag = "  <-- over budget" if result["wall_seconds"] > STARTUP_BUDGET else ""
+        print(f"{name:<4} startup {result['wall_seconds']:>6.3f} s  import {result['import_seconds']:>6.3f} s  "
+              f"heavy: {', '.join(result['heavy_modules'] or []) or 'none'}{flag}  {error or ''}")
+    return results
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def save_results(results, out_dir=RESULTS_DIR):
+    os.makedirs(out_dir, exist_ok=True)
+    revision = _git_revision()
+    payload = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "revision": revision,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    path = os.path.join(out_dir, f"bench_{datetime.now():%Y%m%d_%H%M%S}_{revision or 'local'}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return path
+
+
+def compare(old_path, new_path):
+    """
+    Prints wall time and peak RSS of new relative to old per stage/size.
+    """
+    def load(path):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return {(r["variant"], r["rows"], r["stage"]): r for r in data["results"]}, data.get("revision")
+
+    old, old_rev = load(old_path)
+    new, new_rev = load(new_path)
+    print(f"{old_rev} -> {new_rev}")
+    for key in sorted(set(old) & set(new)):
+        o, n = old[key], new[key]
+        wall = n["wall_seconds"] / o["wall_seconds"] if o["wall_seconds"] else float("nan")
+        rss = n["peak_rss_mb"] / o["peak_rss_mb"] if o["peak_rss_mb"] else float("nan")
+        flag = "  <-- slower" if wall > 1.2 else ""
+        print(f"{key[0]:<5} {key[1]:>9} {key[2]:<8} wall x{wall:5.2f}  peak rss x{rss:5.2f}{flag}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the fulfillment report pipeline")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--variant", nargs="+", choices=VARIANTS, default=["html"])
+    parser.add_argument("--stage", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--out", default=RESULTS_DIR)
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--browser", action="store_true", help="compare the default and lean Chrome profiles")
+    parser.add_argument("--browser-url", help="page to load for --browser (default: the PDBS stub)")
+    parser.add_argument("--startup", action="store_true", help="time the GUI and CLI startup")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        sys.exit(0)
+
+    if args.browser:
+        compare_browser_profiles(args.browser_url)
+        sys.exit(0)
+
+    if args.startup:
+        print(f"Results saved to {save_results(measure_startup(), args.out)}")
+        sys.exit(0)
+
+    results = run(args.rows, args.variant, args.stage)
+    print(f"Results saved to {save_results(results, args.out)}")
@@ -0,0 +1,159 @@
+"""
+Business-day calendar for report dates.
+
+Holidays are generated from rules for every year in range (floating ones
+such as MLK Day or Thanksgiving land on the right date each year, fixed ones
+move to Friday/Monday when they fall on a weekend) and compiled into a numpy
+busdaycalendar, so previous/next/offset queries are single numpy calls and
+whole date ranges are expanded in one vectorized step.
+"""
+import threading
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+
+def _nth_weekday(year, month, weekday, n):
+    """
+    n-th (1-based) weekday (Mon=0) of a month; n=-1 for the last one.
+    """
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = (date(year, month + 1, 1) if month < 12 else date(year + 1, 1, 1)) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _observed(day):
+    if day.weekday() == 5:
+        return day - timedelta(days=1)
+    if day.weekday() == 6:
+        return day + timedelta(days=1)
+    return day
+
+
+def holidays_for_year(year):
+    """
+    {date: name} of the company holidays observed in year.
+    """
+    thanksgiving = _nth_weekday(year, 11, 3, 4)
+    days = {
+        _observed(date(year, 1, 1)): "New Year's Day",
+        _nth_weekday(year, 1, 0, 3): "MLK Day",
+        _nth_weekday(year, 2, 0, 3): "Presidents' Day",
+        _nth_weekday(year, 5, 0, -1): "Memorial Day",
+        _observed(date(year, 6, 19)): "Juneteenth",
+        _observed(date(year, 7, 4)): "Independence Day",
+        _nth_weekday(year, 9, 0, 1): "Labor Day",
+        thanksgiving: "Thanksgiving",
+        thanksgiving + timedelta(days=1): "Day after Thanksgiving",
+        _observed(date(year, 12, 25)): "Christmas Day",
+    }
+    # Company days off next to a holiday; when the holiday's observed day
+    # already falls on them there is no extra day.
+    for day, name in ((date(year, 7, 3), "Day before Independence Day"), (date(year, 12, 24), "Christmas Eve")):
+        if day.weekday() < 5 and day not in days:
+            days[day] = name
+    return days
+
+
+class BusinessCalendar:
+    """
+    Mon-Fri business days minus the rule-based holidays of first_year..last_year
+    (plus any extra_holidays).
+    """
+    def __init__(self, first_year, last_year, extra_holidays=()):
+        self.first_year = first_year
+        self.last_year = last_year
+        holidays = set(extra_holidays)
+        for year in range(first_year - 1, last_year + 2):
+            holidays.update(holidays_for_year(year))
+        self.holidays = np.array(sorted(holidays), dtype="datetime64[D]")
+        self.busdaycal = np.busdaycalendar(weekmask="1111100", holidays=self.holidays)
+
+    def covers(self, day):
+        return self.first_year <= day.year <= self.last_year
+
+    def is_business_day(self, day):
+        return bool(np.is_busday(np.datetime64(_as_date(day), "D"), busdaycal=self.busdaycal))
+
+    def offset(self, day, n):
+        """
+        The n-th business day after day (n > 0) or before it (n < 0), not
+        counting day itself; n=0 rolls a non-business day forward.
+        """
+        roll = "forward" if n <= 0 else "backward"
+        result = np.busday_offset(np.datetime64(_as_date(day), "D"), n, roll=roll, busdaycal=self.busdaycal)
+        return _like(day, result.item())
+
+    def offset_many(self, days, n):
+        """
+        Vectorized offset() for an array-like of dates; returns datetime64[D].
+        """
+        roll = "forward" if n <= 0 else "backward"
+        return np.busday_offset(np.asarray(days, dtype="datetime64[D]"), n, roll=roll, busdaycal=self.busdaycal)
+
+    def previous(self, day, n=1):
+        return self.offset(day, -n)
+
+    def next(self, day, n=1):
+        return self.offset(day, n)
+
+    def between(self, start, end):
+        """
+        Business days from start to end inclusive, oldest first, as the same
+        type (date or datetime) as start.
+        """
+        days = np.arange(np.datetime64(_as_date(start), "D"), np.datetime64(_as_date(end), "D") + 1)
+        days = days[np.is_busday(days, busdaycal=self.busdaycal)]
+        return [_like(start, d) for d in days.tolist()]
+
+    def count(self, start, end):
+        """
+        Number of business days in [start, end).
+        """
+        return int(np.busday_count(np.datetime64(_as_date(start), "D"), np.datetime64(_as_date(end), "D"),
+                                   busdaycal=self.busdaycal))
+
+
+def _as_date(day):
+    return day.date() if isinstance(day, datetime) else day
+
+
+def _like(template, day):
+    if isinstance(template, datetime):
+        return datetime.combine(day, template.time())
+    return day
+
+
+_default = None
+_default_lock = threading.Lock()
+
+
+def default_calendar(*days):
+    """
+    Shared calendar, rebuilt with a wider year range only when a query
+    falls outside the years it was built for.
+    """
+    global _default
+    with _default_lock:
+        calendar = _default
+        if calendar is None or not all(calendar.covers(d) for d in days):
+            years = [d.year for d in days] + [date.today().year]
+            if calendar is not None:
+                years += [calendar.first_year, calendar.last_year]
+            calendar = BusinessCalendar(min(years) - 5, max(years) + 5)
+            _default = calendar
+        return calendar
+
+
+def previous_business_day(day, n=1):
+    return default_calendar(day).previous(day, n)
+
+
+def next_business_day(day, n=1):
+    return default_calendar(day).next(day, n)
+
+
+def business_days_between(start, end):
+    return default_calendar(start, end).between(start, end)
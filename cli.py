@@ -0,0 +1,178 @@
+"""
+Runs DailyOS and update_report without the GUI, once or every business
+day at a set time (e.g. from Task Scheduler or a service).
+
+The username comes from --username or PDBS_USERNAME; the password from
+PDBS_PASSWORD or, if that is not set, from the system keyring (needs the
+keyring package), where set-password stores it:
+
+    python cli.py set-password --username jdoe
+    python cli.py run --folder "C:\\Reports" --backend pandas
+    python cli.py schedule --folder "C:\\Reports" --at 06:30
+
+Heavy modules (selenium, pandas, win32com) are only imported when a job
+runs, so the command starts at once.
+"""
+import argparse
+import getpass
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+KEYRING_SERVICE = "PDBS"
+
+
+def _keyring():
+    try:
+        import keyring
+    except ImportError:
+        return None
+    return keyring
+
+
+def get_credentials(username=None):
+    """
+    (username, password) from the arguments, the environment or the keyring.
+    """
+    username = username or os.environ.get("PDBS_USERNAME")
+    if not username:
+        raise RuntimeError("No PDBS username: pass --username or set PDBS_USERNAME.")
+    password = os.environ.get("PDBS_PASSWORD")
+    if not password:
+        keyring = _keyring()
+        password = keyring.get_password(KEYRING_SERVICE, username) if keyring else None
+    if not password:
+        raise RuntimeError(f"No PDBS password for {username}: set PDBS_PASSWORD or run "
+                           f"'cli.py set-password --username {username}'.")
+    return username, password
+
+
+def set_password(username):
+    keyring = _keyring()
+    if keyring is None:
+        raise RuntimeError("The keyring package is not installed (pip install keyring).")
+    keyring.set_password(KEYRING_SERVICE, username, getpass.getpass(f"PDBS password for {username}: "))
+    print(f"Password for {username} saved in the keyring.")
+
+
+def print_progress(action, value=0):
+    if action == "stage":
+        print(f"  {value['step']}: {value['wall_seconds']:.1f}s")
+
+
+def run_once(username, password, folder, mode="selenium", backend="excel", base_url=None, lean=False,
+             refresh=True, convert="stream"):
+    """
+    One DailyOS + update_report run. Returns True if both succeeded.
+    """
+    import dataDownload
+    import updateReport
+
+    options = {"base_url": base_url} if base_url else {}
+    print(f"Downloading the daily report into {folder}...")
+    run = dataDownload.DailyOS(username, password, folder, print_progress, mode=mode, convert=convert, lean=lean,
+                               **options)
+    if run["status"] != "ok":
+        print(f"DailyOS failed: {run['error']}")
+        return False
+    if not refresh:
+        return True
+
+    print(f"Updating the report ({backend})...")
+    try:
+        updateReport.update_report(folder, False, print_progress, backend)
+    except Exception as e:
+        logging.error("update_report error", exc_info=True)
+        print(f"update_report failed: {e}")
+        return False
+    return True
+
+
+def next_run(at, now=None, business_days=True):
+    """
+    The next datetime at the HH:MM time at, skipping non-business days.
+    """
+    import businessCalendar
+
+    now = now or datetime.now()
+    hour, minute = (int(part) for part in at.split(":"))
+    when = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    if when <= now:
+        when += timedelta(days=1)
+    while business_days and not businessCalendar.default_calendar(when.date()).is_business_day(when.date()):
+        when += timedelta(days=1)
+    return when
+
+
+def schedule(at, business_days=True, **job):
+    """
+    Runs run_once at the time at every (business) day until interrupted.
+    A failed run is logged and the next one still happens.
+    """
+    while True:
+        when = next_run(at, business_days=business_days)
+        print(f"Next run at {when:%Y-%m-%d %H:%M}")
+        # Sleep in short steps so a sleeping laptop does not skip a run.
+        while datetime.now() < when:
+            time.sleep(min(60, max((when - datetime.now()).total_seconds(), 0)))
+        started = time.perf_counter()
+        try:
+            ok = run_once(**job)
+        except Exception:
+            logging.error("Scheduled run error", exc_info=True)
+            ok = False
+        print(f"Run {'finished' if ok else 'failed'} in {time.perf_counter() - started:.0f} s")
+
+
+if __name__ == "__main__":
+    # convert="parallel" starts worker processes; needed when frozen.
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser(description="Run the fulfillment report job without the GUI")
+    commands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("run", "run the job now"), ("schedule", "run the job every business day")):
+        command = commands.add_parser(name, help=help_text)
+        command.add_argument("--folder", default=".")
+        command.add_argument("--username")
+        command.add_argument("--mode", choices=["selenium", "http"], default="selenium")
+        command.add_argument("--backend", choices=["excel", "pandas", "incremental"], default="excel")
+        command.add_argument("--base-url")
+        command.add_argument("--convert", choices=["stream", "parallel", "pandas"], default="stream",
+                             help="parallel parses large HTML reports on every core")
+        command.add_argument("--lean", action="store_true", help="Chrome without images, stylesheets and fonts")
+        command.add_argument("--no-refresh", action="store_true", help="only download, skip update_report")
+        if name == "schedule":
+            command.add_argument("--at", default="06:30", help="HH:MM local time")
+            command.add_argument("--every-day", action="store_true", help="also run on weekends and holidays")
+    password_command = commands.add_parser("set-password", help="store the PDBS password in the keyring")
+    password_command.add_argument("--username", required=True)
+    args = parser.parse_args()
+
+    try:
+        if args.command == "set-password":
+            set_password(args.username)
+            sys.exit(0)
+        username, password = get_credentials(args.username)
+    except RuntimeError as e:
+        parser.exit(2, f"{e}\n")
+
+    job = {
+        "username": username,
+        "password": password,
+        "folder": os.path.normpath(args.folder),
+        "mode": args.mode,
+        "backend": args.backend,
+        "base_url": args.base_url,
+        "lean": args.lean,
+        "refresh": not args.no_refresh,
+        "convert": args.convert,
+    }
+    if args.command == "run":
+        sys.exit(0 if run_once(**job) else 1)
+    try:
+        schedule(args.at, business_days=not args.every_day, **job)
+    except KeyboardInterrupt:
+        print("Stopped.")
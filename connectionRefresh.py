@@ -0,0 +1,286 @@
+"""
+Refreshes workbook connections at the same time and pivots as soon as
+their data is in.
+
+update_report used to refresh wb.Connections one after another with
+BackgroundQuery off, so the refresh took the sum of every query. Here all
+connections that can run in the background are started together, the
+scheduler polls them (every 50 ms at first, backing off to 1 s while
+nothing changes) and each pivot table is refreshed as soon as the
+connections it reads from are done. Pivot tables that share a pivot cache
+are refreshed once.
+
+Everything goes through a small workbook interface:
+
+    workbook.connections() -> objects with name, background, start(background),
+                              refreshing(), cancel()
+    workbook.pivots()      -> objects with name, sheet, sources (connection
+                              names, or None for "all of them"), cache, refresh()
+
+ComWorkbook adapts an Excel workbook opened through win32com; FakeWorkbook
+simulates one in-process so the scheduling can be tested and benchmarked
+without Excel:
+
+    python connectionRefresh.py --connections 6 --pivots 8
+"""
+import argparse
+import random
+import threading
+import time
+
+
+MIN_POLL = 0.05
+MAX_POLL = 1.0
+BACKOFF = 1.5
+
+
+class ComConnection:
+    def __init__(self, conn):
+        self.conn = conn
+        self.name = conn.Name
+        # OLEDB (1) and ODBC (2) connections can refresh in the background.
+        self.background = conn.Type in (1, 2)
+
+    def _typed(self):
+        return self.conn.OLEDBConnection if self.conn.Type == 1 else self.conn.ODBCConnection
+
+    def start(self, background=True):
+        if self.background:
+            self._typed().BackgroundQuery = background
+        self.conn.Refresh()
+
+    def refreshing(self):
+        if not self.background:
+            return False
+        try:
+            return bool(self._typed().Refreshing)
+        except AttributeError:
+            return False
+
+    def cancel(self):
+        try:
+            self._typed().CancelRefresh()
+        except Exception:
+            pass
+
+
+class ComPivot:
+    def __init__(self, ws, pt):
+        self.pt = pt
+        self.name = pt.Name
+        self.sheet = ws.Name
+        self.cache = pt.CacheIndex
+        try:
+            self.sources = [pt.PivotCache().WorkbookConnection.Name]
+        except Exception:
+            # Range or table based: it may read what any connection loads.
+            self.sources = None
+
+    def refresh(self):
+        self.pt.RefreshTable()
+
+
+class ComWorkbook:
+    def __init__(self, wb):
+        self.wb = wb
+
+    def connections(self):
+        return [ComConnection(conn) for conn in self.wb.Connections]
+
+    def pivots(self):
+        return [ComPivot(ws, pt) for ws in self.wb.Worksheets for pt in ws.PivotTables()]
+
+
+def refresh_workbook(workbook, progress_callback=None, timeout=1800, log=print):
+    """
+    Refreshes every connection and pivot table of workbook. progress_callback
+    gets the finished fraction (0-1). Returns {"connections": {name: seconds
+    or error}, "pivots": {...}, "seconds": total}.
+    """
+    started = time.perf_counter()
+    connections = workbook.connections()
+    pivots = workbook.pivots()
+    total = len(connections) + len(pivots)
+    finished = [0]
+    results = {"connections": {}, "pivots": {}}
+
+    def step():
+        finished[0] += 1
+        if progress_callback and total:
+            progress_callback(finished[0] / total)
+
+    done, failed, running = set(), set(), {}
+    # Background queries first, so they run while the blocking ones refresh.
+    for conn in sorted(connections, key=lambda c: not c.background):
+        try:
+            conn.start(background=conn.background)
+        except Exception as e:
+            log(f"Error refreshing {conn.name}: {e}")
+            results["connections"][conn.name] = f"error: {e}"
+            failed.add(conn.name)
+            step()
+            continue
+        if conn.background:
+            running[conn.name] = (conn, time.perf_counter())
+        else:
+            # Refresh() already returned with the data in.
+            results["connections"][conn.name] = round(time.perf_counter() - started, 3)
+            done.add(conn.name)
+            log(f"Refreshed: {conn.name}")
+            step()
+
+    all_names = {conn.name for conn in connections}
+    refreshed_caches = set()
+    waiting = list(pivots)
+    poll = MIN_POLL
+    while True:
+        # Pivots whose connections are all finished, in workbook order.
+        ready = [pt for pt in waiting if set(pt.sources or all_names) <= done | failed]
+        for pt in ready:
+            waiting.remove(pt)
+            sources = set(pt.sources or all_names)
+            if sources & failed and pt.sources is not None:
+                log(f"Skipping pivot table {pt.name} on {pt.sheet}: its connection failed")
+                results["pivots"][pt.name] = "skipped"
+            elif pt.cache in refreshed_caches:
+                results["pivots"][pt.name] = "shared cache"
+            else:
+                try:
+                    pt.refresh()
+                    refreshed_caches.add(pt.cache)
+                    results["pivots"][pt.name] = round(time.perf_counter() - started, 3)
+                    log(f"Refreshed pivot table: {pt.name} on {pt.sheet}")
+                except Exception as e:
+                    log(f"Error refreshing pivot table {pt.name}: {e}")
+                    results["pivots"][pt.name] = f"error: {e}"
+            step()
+
+        if not running:
+            break
+
+        time.sleep(poll)
+        changed = False
+        now = time.perf_counter()
+        for name, (conn, began) in list(running.items()):
+            try:
+                busy = conn.refreshing()
+            except Exception as e:
+                log(f"Error refreshing {name}: {e}")
+                results["connections"][name] = f"error: {e}"
+                failed.add(name)
+                busy = None
+            if busy and now - began > timeout:
+                conn.cancel()
+                log(f"Timed out refreshing {name} after {timeout} s")
+                results["connections"][name] = "timeout"
+                failed.add(name)
+                busy = None
+            if busy:
+                continue
+            if busy is not None:
+                results["connections"][name] = round(now - started, 3)
+                done.add(name)
+                log(f"Refreshed: {name}")
+            del running[name]
+            changed = True
+            step()
+        poll = MIN_POLL if changed else min(poll * BACKOFF, MAX_POLL)
+
+    results["seconds"] = round(time.perf_counter() - started, 3)
+    return results
+
+
+def refresh_sequential(workbook, log=print):
+    """
+    The old update_report behaviour (one blocking refresh after another,
+    then every pivot), kept for comparison.
+    """
+    started = time.perf_counter()
+    for conn in workbook.connections():
+        conn.start(background=False)
+        log(f"Refreshed: {conn.name}")
+    for pt in workbook.pivots():
+        pt.refresh()
+        log(f"Refreshed pivot table: {pt.name} on {pt.sheet}")
+    return {"seconds": round(time.perf_counter() - started, 3)}
+
+
+class FakeConnection:
+    def __init__(self, name, seconds, background=True, fail=False):
+        self.name = name
+        self.seconds = seconds
+        self.background = background
+        self.fail = fail
+        self._finished = threading.Event()
+        self._finished.set()
+        self._timer = None
+
+    def start(self, background=True):
+        if self.fail:
+            raise RuntimeError(f"{self.name}: query failed")
+        if not background:
+            time.sleep(self.seconds)
+            return
+        self._finished.clear()
+        self._timer = threading.Timer(self.seconds, self._finished.set)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def refreshing(self):
+        return not self._finished.is_set()
+
+    def cancel(self):
+        if self._timer:
+            self._timer.cancel()
+        self._finished.set()
+
+
+class FakePivot:
+    def __init__(self, name, sheet, sources, seconds, cache):
+        self.name = name
+        self.sheet = sheet
+        self.sources = sources
+        self.seconds = seconds
+        self.cache = cache
+        self.refreshed = 0
+
+    def refresh(self):
+        time.sleep(self.seconds)
+        self.refreshed += 1
+
+
+class FakeWorkbook:
+    def __init__(self, connections, pivots):
+        self._connections = connections
+        self._pivots = pivots
+
+    def connections(self):
+        return list(self._connections)
+
+    def pivots(self):
+        return list(self._pivots)
+
+    @classmethod
+    def random(cls, n_connections=6, n_pivots=8, seed=0, scale=1.0):
+        rng = random.Random(seed)
+        connections = [FakeConnection(f"Query{i}", rng.uniform(0.5, 3.0) * scale) for i in range(n_connections)]
+        pivots = []
+        for i in range(n_pivots):
+            source = rng.choice(connections).name
+            pivots.append(FakePivot(f"PivotTable{i}", f"Sheet{i % 3 + 1}", [source], rng.uniform(0.05, 0.3) * scale,
+                                    cache=source))
+        return cls(connections, pivots)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare sequential and scheduled refresh on a fake workbook")
+    parser.add_argument("--connections", type=int, default=6)
+    parser.add_argument("--pivots", type=int, default=8)
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplies every simulated duration")
+    args = parser.parse_args()
+
+    quiet = lambda message: None
+    old = refresh_sequential(FakeWorkbook.random(args.connections, args.pivots, scale=args.scale), log=quiet)
+    new = refresh_workbook(FakeWorkbook.random(args.connections, args.pivots, scale=args.scale), log=quiet)
+    print(f"Sequential: {old['seconds']:.2f} s")
+    print(f"Scheduled:  {new['seconds']:.2f} s ({old['seconds'] / new['seconds']:.1f}x faster)")
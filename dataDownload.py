@@ -1,21 +1,29 @@
 from selenium import webdriver
 from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException
+from selenium.common.exceptions import SessionNotCreatedException
 
-import time
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
 import pandas as pd
-import threading
 
 import logging
 import shutil
 
+import backupStore
+import businessCalendar
+import downloadWatch
+import driverManager
+import formatSniff
+import historyStore
+import httpFetch
+import instrumentation
+import pdbsPages
+import reportCache
+import reportParser
+import xlsConvert
+from httpFetch import PDBS_URL, REPORT_LINK_TEXT
+
 
 logging.basicConfig(
     filename="error_log.txt",
@@ -23,112 +31,78 @@ logging.basicConfig(
     format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
-holidays = {
-    "01/01",  # New Year's Day
-    "01/20",  # MLK Day (example static date for demo; usually 3rd Monday in Jan)
-    "02/17",  # Presidents' Day (example static date)
-    "05/26",  # Memorial Day (example static date)
-    "06/19",  # Juneteenth
-    "07/03",  # Independence Day (observed)
-    "07/04",  # Independence Day
-    "09/01",  # Labor Day (example static date)
-    "11/27",  # Thanksgiving (example static date)
-    "11/28",  # Day after Thanksgiving
-    "12/24",  # Christmas Eve
-    "12/25"   # Christmas Day
-}
-
-def backup_file(source_folder, destination_folder, file_prefix, previous_date):
+def subtract_one_business_day(date, n=1):
     """
-    Finds the latest file in the source_folder that starts with file_prefix, 
-    renames it with the current date, and copies it to the destination_folder.
+    n-th business day before date, skipping weekends and holidays
+    (see businessCalendar).
     """
-    files = [f for f in os.listdir(source_folder) if f.startswith(file_prefix)]
-    
-    if not files:
-        print(f"{file_prefix} Not Found in {source_folder}")
-        return
-    
-    # Get the most recent file based on modification time
-    files.sort(key=lambda x: os.path.getmtime(os.path.join(source_folder, x)), reverse=True)
-    latest_file = files[0]
-
-    # Generate the new filename with previous date
-    file_name, file_extension = os.path.splitext(latest_file)
-    new_file_name = f"{file_name}_{previous_date}{file_extension}"
-
-    source_path = os.path.join(source_folder, latest_file)
-    destination_path = os.path.join(destination_folder, new_file_name)
-
-    try:
-        shutil.copy2(source_path, destination_path)
-        print(f"Copied {latest_file} to {destination_folder} as {new_file_name}\n")
-    except Exception as e:
-        print(f"Error copying file: {e}")
-
-def wait_for_element(driver, by, value, total_wait=480, check_interval=10):
-    try:
-        # print(f"Waiting for element: {value} for up to {total_wait} seconds...")
-        element = WebDriverWait(driver, total_wait, check_interval).until(EC.presence_of_element_located((by, value)))
-        driver.execute_script("arguments[0].scrollIntoView(true);", element)
-        return element
-    except TimeoutException:
-        print(f"Timeout waiting for element: {value}")
-        raise TimeoutException(f"Element with {value} not found after {total_wait} seconds.")
+    return businessCalendar.previous_business_day(date, n)
 
-def subtract_one_business_day(date, holidays=holidays):
-    date -= timedelta(days=1)
-
-    while True:
-        date_str = date.strftime('%m/%d')  # Only month/day
-
-        if date_str in holidays:
-            print(f"{date.strftime('%m/%d/%Y')} is a holiday, going back one more day.")
-            date -= timedelta(days=1)
-            continue
-
-        if date.weekday() == 5:  # Saturday
-            print(f"{date.strftime('%m/%d/%Y')} is Saturday, going back one more day.")
-            date -= timedelta(days=1)
-            continue
-        elif date.weekday() == 6:  # Sunday
-            print(f"{date.strftime('%m/%d/%Y')} is Sunday, going back two days.")
-            date -= timedelta(days=2)
-            continue
+def business_days_between(start, end):
+    """
+    Business days from start to end inclusive, oldest first.
+    """
+    return businessCalendar.business_days_between(start, end)
 
-        break  # Found valid business day
+# Resource types the PDBS pages load but the download never needs.
+BLOCKED_URLS = ["*.png", "*.jpg", "*.jpeg", "*.gif", "*.bmp", "*.ico", "*.svg", "*.webp",
+                "*.css", "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot"]
 
-    return date
 
-def create_driver(download_path):
+def create_driver(download_path, lean=False):
+    """
+    Headless Chrome set up to download into download_path.
 
+    lean=True skips the performance log (the download watcher then goes by
+    folder events), blocks images, stylesheets and fonts through CDP and
+    drops the flags that do nothing in headless mode.
+    """
     # Set up Chrome options
     chrome_options = Options()
-    chrome_options.add_experimental_option('prefs', {
+    prefs = {
         "download.default_directory": download_path,
         "download.prompt_for_download": False,
         "download.directory_upgrade": True,
         "safebrowsing.enabled": True,
         "profile.default_content_settings.popups": 0
-    })
-    chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
-    chrome_options.add_argument("--start-maximized")
-    chrome_options.add_argument("enable-automation")
-    chrome_options.add_argument("disable-infobars")
+    }
+    if lean:
+        prefs["profile.managed_default_content_settings.images"] = 2
+    chrome_options.add_experimental_option('prefs', prefs)
     chrome_options.page_load_strategy = "eager"
     chrome_options.add_argument("--disable-gpu")
     chrome_options.add_argument("--headless=new")
-    chrome_options.add_argument("--max-old-space-size=4096")
     chrome_options.add_argument("--disable-software-rasterizer")
     chrome_options.add_argument("--disable-dev-shm-usage")
     chrome_options.add_argument("--disable-popup-blocking")
     chrome_options.add_argument("window-size=1920,1080")
+    if lean:
+        chrome_options.add_argument("--disable-extensions")
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-sync")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("--no-first-run")
+        chrome_options.add_argument("--mute-audio")
+    else:
+        chrome_options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+        chrome_options.add_argument("--start-maximized")
+        chrome_options.add_argument("enable-automation")
+        chrome_options.add_argument("disable-infobars")
+        chrome_options.add_argument("--max-old-space-size=4096")
 
-    driver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()), options=chrome_options)
+    try:
+        driver = webdriver.Chrome(service=ChromeService(driverManager.resolve_chromedriver()), options=chrome_options)
+    except SessionNotCreatedException:
+        # Cached chromedriver no longer matches Chrome, look it up again.
+        driver = webdriver.Chrome(service=ChromeService(driverManager.resolve_chromedriver(refresh=True)), options=chrome_options)
     driver.set_page_load_timeout(600)
     driver.set_script_timeout(600)
-    driver.implicitly_wait(30)
-    driver.execute_cdp_cmd("Network.enable", {})
+    if lean:
+        # Network has to be enabled for the block list; keep it from buffering bodies.
+        driver.execute_cdp_cmd("Network.enable", {"maxTotalBufferSize": 0, "maxResourceBufferSize": 0})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    else:
+        driver.execute_cdp_cmd("Network.enable", {})
     driver.execute_cdp_cmd("Page.setDownloadBehavior", {
         "behavior": "allow",
         "downloadPath": download_path
@@ -137,10 +111,161 @@ def create_driver(download_path):
     return driver
 
 
-def DailyOS(username, password, dPath, progress_callback=None):
+def fetch_report_selenium(username, password, dPath, report_date, report_progress, base_url=PDBS_URL,
+                          reuse_session=False, report_name=REPORT_LINK_TEXT, file_prefix="DailyReport",
+                          lean=False):
+    """
+    Drives Chrome through login, navigation and download. Returns the path of
+    the downloaded file: the report linked as report_name on the report page,
+    saved by PDBS under a name starting with file_prefix.
+
+    With reuse_session the browser (and its login) is kept open for the next
+    run in this process instead of being quit (see driverManager). lean
+    starts Chrome with the lean profile of create_driver. report_progress
+    may be None.
+    """
+    report_progress = report_progress or (lambda step: None)
+
+    # --- Step 2: Launch browser ---
+    session = None
+    if reuse_session:
+        session = driverManager.acquire_session(str(dPath), lambda path: create_driver(path, lean))
+        driver = session.driver
+    else:
+        driver = create_driver(str(dPath), lean)
+    report_progress(2)
+
+    failed = True
+    counter = pdbsPages.CommandCounter(driver)
+    try:
+        with counter:
+            # --- Step 3: Login ---
+            login_page = pdbsPages.LoginPage(driver).open(base_url)
+            if session is None or not session.is_logged_in(username):
+                login_page.login(username, password)
+                if session is not None:
+                    session.logged_in_as = username
+            report_progress(3)
+
+            # --- Step 4: Navigate to report page ---
+            report_page = pdbsPages.MenuPage(driver).open_task("OrdReport.asp", 65)
+            report_progress(4)
+
+            # --- Step 5: Set report date ---
+            report_page.set_date(report_date)
+            report_progress(5)
+
+            # --- Step 6: Click report link ---
+            # The watcher is set up before the click so it sees the download
+            # being finalized and can tell it apart from older DailyReport files.
+            with downloadWatch.DownloadWatcher(dPath, prefix=file_prefix, driver=driver) as watcher:
+                report_page.click_report(report_name)
+                report_progress(6)
+
+                # --- Step 7: Wait for download to complete ---
+                # Chrome only renames .crdownload to the final name once the
+                # file is complete, so there is no size to wait on after this.
+                file_path = watcher.wait(timeout=300)
+                report_progress(7)
+        print(counter.summary())
+
+        failed = False
+        return file_path
+    finally:
+        if session is not None:
+            driverManager.release_session(session, failed)
+        else:
+            driver.quit()
+
+
+def fetch_report(username, password, dPath, report_date, report_progress, mode="selenium", base_url=PDBS_URL,
+                 reuse_session=False, report_name=REPORT_LINK_TEXT, file_prefix="DailyReport", lean=False):
+    """
+    Downloads the report for report_date into dPath with the given mode and
+    returns the file path. mode="http" falls back to Selenium on failure.
+    report_progress(step_index, name=None) is called at the end of DailyOS
+    steps 2-7; the HTTP fetch passes the name of its own step (see
+    httpFetch.STEP_NAMES).
+    """
+    if mode == "http":
+        try:
+            return httpFetch.fetch_report_http(username, password, dPath, report_date, report_progress, base_url,
+                                               report_name)
+        except Exception:
+            logging.error("HTTP fetch failed, falling back to Selenium", exc_info=True)
+    return fetch_report_selenium(username, password, dPath, report_date, report_progress, base_url, reuse_session,
+                                 report_name, file_prefix, lean)
+
+
+def convert_download(file_path, xlsx_path, convert="stream"):
+    """
+    Converts a downloaded report into xlsx_path and removes the download.
+    The format (HTML table or real BIFF .xls, CSV, or an .xlsx that is
+    just moved) comes from the file's bytes (see formatSniff), not its name.
+    """
+    detected = formatSniff.sniff(file_path)
+    if detected.kind == formatSniff.XLSX:
+        if os.path.abspath(file_path) != os.path.abspath(xlsx_path):
+            os.replace(file_path, xlsx_path)
+        return detected
+    if convert in ("stream", "parallel"):
+        xlsConvert.convert_report(file_path, xlsx_path, detected, workers=None if convert == "parallel" else 1)
+    else:
+        if detected.kind == formatSniff.HTML:
+            df = reportParser.read_report_html(file_path, encoding=detected.encoding)
+        elif detected.kind == formatSniff.BIFF:
+            df = pd.read_excel(file_path, engine="xlrd")
+        elif detected.kind == formatSniff.CSV:
+            df = pd.read_csv(file_path, encoding=detected.encoding, sep=detected.delimiter)
+        else:
+            raise ValueError(f"Cannot convert {file_path}: detected format is {detected.kind}")
+        df.to_excel(xlsx_path, index=False)
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    return detected
+
+
+def backup_previous_report(dPath, backup_date):
+    """
+    Stores the current dPath/DailyReport.xlsx in the backup store as the
+    report of backup_date. Returns the sha256, or None if there is no report.
+    """
+    report = os.path.join(dPath, "DailyReport.xlsx")
+    if not os.path.exists(report):
+        return None
+    store = backupStore.BackupStore(os.path.join(dPath, "backup"))
+    if not store.index["entries"]:
+        # First run with the store: take over the old flat copies.
+        store.import_flat_backups()
+    digest = store.put(report, backup_date)
+    store.apply_retention()
+    print(f"Backed up DailyReport.xlsx for {backup_date.strftime('%m-%d-%Y')}\n")
+    return digest
+
+
+def DailyOS(username, password, dPath, progress_callback=None, mode="selenium", base_url=PDBS_URL,
+            convert="stream", reuse_session=False, use_cache=True, lean=False, history=True):
     """
     Original DailyOS functionality with determinate progress updates.
+
+    mode="http" fetches the report over a plain HTTP session (see httpFetch)
+    and falls back to Selenium if that fails; mode="selenium" drives Chrome.
+    convert="stream" writes DailyReport.xlsx row by row (see xlsConvert);
+    convert="parallel" parses an HTML report on every core first (see
+    reportParser.read_report_parallel); convert="pandas" goes through a
+    DataFrame and df.to_excel.
+    reuse_session keeps the logged-in browser open for the next call.
+    use_cache takes the report from reportCache when a fresh copy for the
+    business date is there, without starting the browser. lean starts Chrome
+    without images, stylesheets, fonts or the performance log. history
+    appends the converted report to dPath/history.sqlite (see historyStore).
+
+    Each step's time, CPU, peak memory and I/O is sent to progress_callback
+    as ("stage", record) and appended to dPath/run_log.jsonl. Returns that
+    run record; its status is "error" if the fetch or the conversion failed.
     """
+    recorder = instrumentation.RunRecorder("DailyOS", dPath, progress_callback)
+    status, error = "ok", None
     try:
         steps = [
             "Prepare backup folder",
@@ -151,11 +276,12 @@ def DailyOS(username, password, dPath, progress_callback=None):
             "Set report date",
             "Click report link",
             "Wait for download",
-            "Wait for stable file",
-            "Convert to Excel"
+            "Convert to Excel",
+            "Store in history"
         ]
         total_steps = len(steps)
-        def report_progress(step_index):
+        def report_progress(step_index, name=None):
+            recorder.mark(name or steps[step_index])
             if progress_callback:
                 percent = ((step_index + 1) / total_steps) * 100
                 progress_callback("update", percent)
@@ -168,110 +294,57 @@ def DailyOS(username, password, dPath, progress_callback=None):
             os.makedirs(backup_path)
         report_progress(0)
 
+        prevDate = subtract_one_business_day(datetime.today())
+        report_path = os.path.join(dPath, "DailyReport.xlsx")
+        cache = reportCache.ReportCache(dPath) if use_cache else None
+        cached = cache.get(prevDate) if cache else None
+        # A second run the same day finds its own report in DailyReport.xlsx.
+        current = bool(cached) and os.path.exists(report_path) and backupStore.sha256_file(report_path) == cached["sha256"]
+
         # --- Step 1: Backup previous report ---
-        if os.path.exists(os.path.join(dPath, "DailyReport.xlsx")):
-            backup_suffix = subtract_one_business_day(subtract_one_business_day(datetime.today())).strftime("%m-%d-%Y")
-            backup_file(dPath, backup_path, "DailyReport", backup_suffix)
+        if not current:
+            backup_previous_report(dPath, subtract_one_business_day(datetime.today(), 2))
         report_progress(1)
 
-        # --- Step 2: Launch browser ---
-        driver = create_driver(str(dPath))
-        report_progress(2)
-
-        # --- Step 3: Login ---
-        driver.get("https://pdbs.supermicro.com:18893/Home")
-        username_field = driver.find_element(By.ID, "txtUserName")
-        password_field = driver.find_element(By.ID, "xPWD")
-        username_field.send_keys(username)
-        password_field.send_keys(password)
-        driver.find_element(By.ID, "btnSubmit").click()
-        time.sleep(1)
-        report_progress(3)
-
-        # --- Step 4: Navigate to report page ---
-        links = driver.find_elements(By.TAG_NAME, 'a')
-        for link in links:
-            if link.get_attribute('href') == 'javascript:onClickTaskMenu("OrdReport.asp", 65)':
-                link.click()
-                break
-        report_progress(4)
-
-        # --- Step 5: Set report date ---
-        DailyOrders_date_field = wait_for_element(driver, By.NAME, "Date")
-        DailyOrders_date_field.clear()
-        prevDate = subtract_one_business_day(datetime.today())
-        DailyOrders_date_field.send_keys(prevDate.strftime("%m/%d/%Y"))
-        driver.execute_script("ChgDate()")
-        report_progress(5)
-
-        # --- Step 6: Click report link ---
-        link = driver.find_element(By.LINK_TEXT, "Order Fulfillment Report")
-        link.click()
-        report_progress(6)
-
-        # --- Step 7: Wait for download to appear ---
-        timeout = 300
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            files = [f for f in os.listdir(dPath) if f.startswith("DailyReport") and f.endswith(".xls")]
-            if files:
-                file_path = max([os.path.join(dPath, f) for f in files], key=os.path.getmtime)
-                if not file_path.endswith(('.crdownload', '.part')):
-                    break
-            time.sleep(1)
+        if cached:
+            # --- Steps 2-9: Cached report (already in history) ---
+            if not current:
+                shutil.copyfile(cached["path"], report_path)
+            print(f"Using cached report for {prevDate.strftime('%m-%d-%Y')} "
+                  f"(fetched {datetime.fromtimestamp(cached['fetched_at']):%m-%d-%Y %H:%M})")
+            recorder.mark("Load cached report")
+            if progress_callback:
+                progress_callback("update", 100)
         else:
-            raise TimeoutError("File download timed out.")
-        report_progress(7)
-
-        # --- Step 8: Wait for stable file size ---
-        def wait_for_stable_file_size(path, wait_time=3, check_interval=1):
-            last_size = -1
-            stable_count = 0
-            while stable_count < wait_time:
-                try:
-                    current_size = os.path.getsize(path)
-                except OSError:
-                    current_size = -1
-                if current_size == last_size and current_size > 0:
-                    stable_count += check_interval
-                else:
-                    stable_count = 0
-                last_size = current_size
-                time.sleep(check_interval)
-        wait_for_stable_file_size(file_path)
-        report_progress(8)
-
-        # --- Step 9: Convert to Excel ---
-        if file_path.endswith('.xls'):
+            # --- Steps 2-7: Fetch report ---
+            file_path = fetch_report(username, password, dPath, prevDate, report_progress, mode, base_url,
+                                     reuse_session, lean=lean)
+
+            # --- Step 8: Convert to Excel ---
             try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    first_line = f.readline()
-                    second_line = f.readline()
-                if ('<html' in first_line.lower() or '<table' in first_line.lower() or
-                    '<html' in second_line.lower() or '<table' in second_line.lower()):
-                    dfs = pd.read_html(file_path)
-                    df = dfs[0]
-                else:
-                    df = pd.read_excel(file_path)
-                xlsx_path = os.path.join(dPath, "DailyReport.xlsx")
-                df.to_excel(xlsx_path, index=False)
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                convert_download(file_path, report_path, convert)
+                if cache:
+                    cache.put(report_path, prevDate)
             except Exception as e:
+                status, error = "error", f"Converting {file_path}: {type(e).__name__}: {e}"
+                logging.error("DailyOS convert error", exc_info=True)
                 print(f"Error converting {file_path}: {e}")
-        elif file_path.endswith('.xlsx'):
-            try:
-                df = pd.read_excel(file_path)
-            except Exception as e:
-                print(f"Error reading {file_path}: {e}")
-        else:
-            print(f"Downloaded file is not .xls or .xlsx: {file_path}")
 
-        driver.quit()
-        report_progress(9)
+            report_progress(8)
+
+            # --- Step 9: Store in history ---
+            if history and status == "ok":
+                try:
+                    historyStore.ingest_report(dPath, report_path, prevDate)
+                except Exception as e:
+                    print(f"Error storing {report_path} in history: {e}")
+            report_progress(9)
 
     except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
         logging.error("DailyOS error", exc_info=True)
     finally:
+        run = recorder.finish(status, error)
         if progress_callback:
-            progress_callback("stop", 100)
\ No newline at end of file
+            progress_callback("stop", 100)
+    return run
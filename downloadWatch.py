@@ -0,0 +1,215 @@
+"""
+Download completion detection for the browser download of DailyReport*.xls.
+
+Chrome writes a download to a .crdownload file and renames it to its final
+name only once it is complete, so the rename itself is the completion
+signal. DownloadWatcher waits for it through whichever event sources are
+available, instead of scanning the folder once a second and then waiting
+for the size to settle:
+
+- Chrome DevTools Page.downloadWillBegin / Page.downloadProgress events,
+  read from the performance log that create_driver enables;
+- inotify (Linux) or FindFirstChangeNotification (Windows) on the folder;
+- a plain directory poll when neither is available.
+"""
+import json
+import os
+import select
+import struct
+import sys
+import time
+
+
+class _InotifyWaiter:
+    """
+    Reports the names of files closed after writing or renamed into a folder.
+    """
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, directory):
+        import ctypes
+        import ctypes.util
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(directory), self.IN_CLOSE_WRITE | self.IN_MOVED_TO)
+        if wd < 0:
+            os.close(self.fd)
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+
+    def wait(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        data = os.read(self.fd, 64 * 1024)
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, _, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _WindowsChangeWaiter:
+    """
+    Wakes up when a file in the folder is created, renamed or written. The
+    notification carries no names, so None tells the caller to look.
+    """
+    def __init__(self, directory):
+        import win32con
+        import win32event
+        import win32file
+
+        self._win32event = win32event
+        self._win32file = win32file
+        self.handle = win32file.FindFirstChangeNotification(
+            directory,
+            False,
+            win32con.FILE_NOTIFY_CHANGE_FILE_NAME | win32con.FILE_NOTIFY_CHANGE_LAST_WRITE
+        )
+
+    def wait(self, timeout):
+        result = self._win32event.WaitForSingleObject(self.handle, int(timeout * 1000))
+        if result != self._win32event.WAIT_OBJECT_0:
+            return []
+        self._win32file.FindNextChangeNotification(self.handle)
+        return None
+
+    def close(self):
+        self._win32file.FindCloseChangeNotification(self.handle)
+
+
+class _PollWaiter:
+    def __init__(self, directory, interval=1):
+        self.interval = interval
+
+    def wait(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return None
+
+    def close(self):
+        pass
+
+
+def _folder_waiter(directory):
+    try:
+        if sys.platform.startswith("linux"):
+            return _InotifyWaiter(directory)
+        if sys.platform == "win32":
+            return _WindowsChangeWaiter(directory)
+    except Exception as e:
+        print(f"Folder events unavailable ({e}), polling {directory} instead.")
+    return _PollWaiter(directory)
+
+
+class DownloadWatcher:
+    """
+    Create (or enter) before clicking the download link, then call wait().
+
+        with DownloadWatcher(dPath, driver=driver) as watcher:
+            link.click()
+            file_path = watcher.wait(timeout=300)
+    """
+    def __init__(self, directory, prefix="DailyReport", suffix=".xls", driver=None):
+        self.directory = directory
+        self.prefix = prefix
+        self.suffix = suffix
+        self.driver = driver
+        self._downloads = {}
+        self._before = self._snapshot()
+        self._waiter = _folder_waiter(directory)
+        self._cdp = driver is not None and self._drain_cdp_log() is not None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._waiter.close()
+
+    def _matches(self, name):
+        return name.startswith(self.prefix) and name.endswith(self.suffix)
+
+    def _snapshot(self):
+        with os.scandir(self.directory) as entries:
+            return {e.name: e.stat().st_mtime for e in entries if self._matches(e.name)}
+
+    def _is_new(self, name):
+        path = os.path.join(self.directory, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size > 0 and self._before.get(name) != stat.st_mtime
+
+    def _drain_cdp_log(self):
+        """
+        Reads pending DevTools events. Returns the suggested file name of a
+        completed download, "" if none completed yet, or None if the
+        performance log is not available on this driver.
+        """
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            return None
+        completed = ""
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError):
+                continue
+            method = message.get("method")
+            params = message.get("params", {})
+            if method == "Page.downloadWillBegin":
+                self._downloads[params.get("guid")] = params.get("suggestedFilename", "")
+            elif method == "Page.downloadProgress" and params.get("state") == "completed":
+                completed = self._downloads.get(params.get("guid"), "") or completed
+            elif method == "Page.downloadProgress" and params.get("state") == "canceled":
+                raise RuntimeError("Browser reported the download as canceled.")
+        return completed
+
+    def _find_new(self, names=None):
+        if names is None:
+            with os.scandir(self.directory) as entries:
+                names = [e.name for e in entries]
+        found = [n for n in names if self._matches(n) and self._is_new(n)]
+        if not found:
+            return None
+        return max((os.path.join(self.directory, n) for n in found), key=os.path.getmtime)
+
+    def wait(self, timeout=300, tick=0.25):
+        """
+        Blocks until a new, fully written prefix*suffix file exists and
+        returns its path. Raises TimeoutError after timeout seconds.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            if self._cdp:
+                completed = self._drain_cdp_log()
+                if completed:
+                    # Chrome may have renamed it to "DailyReport (1).xls".
+                    path = self._find_new([completed]) or self._find_new()
+                    if path:
+                        return path
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError("File download timed out.")
+            names = self._waiter.wait(min(remaining, tick) if self._cdp else remaining)
+            if names is None or names:
+                path = self._find_new(names)
+                if path:
+                    return path
@@ -0,0 +1,211 @@
+"""
+Chromedriver resolution and long-lived browser sessions for DailyOS.
+
+resolve_chromedriver() remembers the chromedriver that webdriver_manager
+installed, together with the local Chrome version it was resolved for, and
+hands that path back without any network lookup until Chrome is updated,
+the cached binary disappears or the entry gets too old.
+
+acquire_session() / release_session() keep one already logged-in browser
+per download folder alive between DailyOS runs in the same process. A
+session is recycled after max_uses runs, when its browser processes grow
+past max_rss_mb, or when it stops answering.
+"""
+import atexit
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".fulfillment_report")
+CACHE_FILE = os.path.join(CACHE_DIR, "chromedriver.json")
+MAX_AGE_DAYS = 30
+
+
+def local_chrome_version():
+    """
+    Installed Chrome version, read locally (registry or --version), or None.
+    """
+    try:
+        if sys.platform == "win32":
+            import winreg
+            for root in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+                try:
+                    with winreg.OpenKey(root, r"Software\Google\Chrome\BLBeacon") as key:
+                        return winreg.QueryValueEx(key, "version")[0]
+                except OSError:
+                    continue
+            return None
+        for binary in ("google-chrome", "google-chrome-stable", "chromium", "chromium-browser",
+                       "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"):
+            try:
+                output = subprocess.run([binary, "--version"], capture_output=True, text=True, timeout=10).stdout
+            except (OSError, subprocess.SubprocessError):
+                continue
+            match = re.search(r"\d+\.\d+\.\d+\.\d+", output)
+            if match:
+                return match.group(0)
+    except Exception:
+        pass
+    return None
+
+
+def _read_cache():
+    try:
+        with open(CACHE_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_cache(entry):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(CACHE_FILE, "w", encoding="utf-8") as f:
+            json.dump(entry, f, indent=2)
+    except OSError as e:
+        print(f"Could not write chromedriver cache: {e}")
+
+
+def resolve_chromedriver(refresh=False, max_age_days=MAX_AGE_DAYS):
+    """
+    Path of a chromedriver matching the local Chrome. Only calls
+    ChromeDriverManager().install() (network) when the cache is missing,
+    stale, for another Chrome major version, or refresh is True.
+    """
+    chrome_version = local_chrome_version()
+    entry = _read_cache()
+    if not refresh and entry:
+        fresh = time.time() - entry.get("resolved_at", 0) < max_age_days * 86400
+        same_chrome = (chrome_version is None or
+                       (entry.get("chrome_version") or "").split(".")[0] == chrome_version.split(".")[0])
+        if fresh and same_chrome and os.path.isfile(entry.get("path", "")):
+            return entry["path"]
+
+    from webdriver_manager.chrome import ChromeDriverManager
+
+    path = ChromeDriverManager().install()
+    _write_cache({"path": path, "chrome_version": chrome_version, "resolved_at": time.time()})
+    return path
+
+
+class BrowserSession:
+    """
+    A browser kept open between runs, with what is known about its login.
+    """
+    def __init__(self, driver, download_path, max_uses, max_rss_mb):
+        self.driver = driver
+        self.download_path = download_path
+        self.max_uses = max_uses
+        self.max_rss_mb = max_rss_mb
+        self.uses = 0
+        self.logged_in_as = None
+        self.started = time.time()
+
+    def is_alive(self):
+        try:
+            self.driver.window_handles
+            return True
+        except Exception:
+            return False
+
+    def rss_mb(self):
+        """
+        Resident memory of chromedriver plus every browser process under it,
+        or None without psutil.
+        """
+        try:
+            import psutil
+            root = psutil.Process(self.driver.service.process.pid)
+            procs = [root] + root.children(recursive=True)
+            total = 0
+            for proc in procs:
+                try:
+                    total += proc.memory_info().rss
+                except psutil.Error:
+                    pass
+            return total / (1024 * 1024)
+        except Exception:
+            return None
+
+    def needs_recycle(self):
+        if self.uses >= self.max_uses:
+            return True
+        rss = self.rss_mb()
+        return rss is not None and rss > self.max_rss_mb
+
+    def is_logged_in(self, username):
+        """
+        True when this browser already holds a PDBS login for username on the
+        current page (i.e. the login form is not shown).
+        """
+        if self.logged_in_as != username:
+            return False
+        try:
+            return not self.driver.execute_script("return !!document.getElementById('txtUserName');")
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def acquire_session(download_path, factory, max_uses=20, max_rss_mb=1500):
+    """
+    Returns a healthy BrowserSession for download_path, starting one with
+    factory(download_path) if there is none or the old one was unusable.
+    """
+    with _sessions_lock:
+        session = _sessions.pop(download_path, None)
+    if session is not None and (not session.is_alive() or session.needs_recycle()):
+        print(f"Recycling browser session after {session.uses} uses.")
+        session.quit()
+        session = None
+    if session is None:
+        session = BrowserSession(factory(download_path), download_path, max_uses, max_rss_mb)
+    return session
+
+
+def release_session(session, failed=False):
+    """
+    Returns a session after a run. Failed runs close the browser, since its
+    state is unknown.
+    """
+    session.uses += 1
+    if failed or session.needs_recycle():
+        session.quit()
+        return
+    with _sessions_lock:
+        previous = _sessions.pop(session.download_path, None)
+        _sessions[session.download_path] = session
+    if previous is not None and previous is not session:
+        previous.quit()
+
+
+def close_session(download_path):
+    with _sessions_lock:
+        session = _sessions.pop(download_path, None)
+    if session is not None:
+        session.quit()
+
+
+def close_all_sessions():
+    with _sessions_lock:
+        sessions = list(_sessions.values())
+        _sessions.clear()
+    for session in sessions:
+        session.quit()
+
+
+atexit.register(close_all_sessions)
@@ -0,0 +1,156 @@
+"""
+Detects the real format of a downloaded report from its first bytes.
+
+PDBS serves an HTML table named .xls, but a report can also arrive as a
+real BIFF .xls (OLE2 compound file), an .xlsx (zip), or a CSV export,
+possibly with a BOM or in UTF-16. The file is memory-mapped and only
+the pages that are looked at are read: the magic bytes at the start,
+the zip directory at the end and a few KB of text. Nothing is decoded
+or parsed on a guess.
+
+    python formatSniff.py DailyReport.xls
+"""
+import argparse
+import codecs
+import csv
+import mmap
+import re
+from collections import namedtuple
+
+
+HTML = "html"
+BIFF = "biff"
+XLSX = "xlsx"
+ZIP = "zip"
+CSV = "csv"
+UNKNOWN = "unknown"
+
+SNIFF_BYTES = 8192
+ZIP_TAIL_BYTES = 1 << 16
+
+_OLE2 = b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1"
+_BIFF_BOF = (b"\x09\x08", b"\x09\x04", b"\x09\x02", b"\x09\x00")
+_ZIP = b"PK\x03\x04"
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF32_LE, "utf-32"),
+    (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+_HTML_MARKERS = ("<html", "<table", "<!doctype html", "<tr")
+# Tried in turn when neither a BOM nor a <meta charset> names the
+# encoding: exports from Excel on Windows are cp1252, not UTF-8.
+_FALLBACK_ENCODINGS = ("utf-8", "cp1252")
+_CHARSET = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?([\w.:-]+)""", re.IGNORECASE)
+
+Detected = namedtuple("Detected", "kind encoding delimiter", defaults=(None, None))
+
+
+def _encoding(head):
+    """
+    Encoding named by a byte order mark or shown by the NUL pattern of
+    BOM-less UTF-16; None for anything else.
+    """
+    for bom, name in _BOMS:
+        if head.startswith(bom):
+            return name
+    sample = head[:512]
+    if len(sample) >= 4:
+        even_nuls = sample[0::2].count(0)
+        odd_nuls = sample[1::2].count(0)
+        half = len(sample) // 2
+        if odd_nuls > half * 0.6 and even_nuls == 0:
+            return "utf-16-le"
+        if even_nuls > half * 0.6 and odd_nuls == 0:
+            return "utf-16-be"
+    return None
+
+
+def _zip_kind(mm):
+    # Entry names are repeated in the central directory at the end.
+    tail = max(len(mm) - ZIP_TAIL_BYTES, 0)
+    if mm.rfind(b"xl/workbook", tail) != -1 or mm.find(b"xl/workbook", 0, SNIFF_BYTES) != -1:
+        return XLSX
+    return ZIP
+
+
+def _text_kind(text):
+    lowered = text.lstrip().lower()
+    if lowered.startswith("<") and any(marker in lowered for marker in _HTML_MARKERS):
+        return HTML, None
+    lines = [line for line in text.splitlines()[:20] if line.strip()]
+    if len(lines) < 2 or "\x00" in text:
+        return UNKNOWN, None
+    try:
+        dialect = csv.Sniffer().sniff("\n".join(lines[:-1] if len(lines) > 2 else lines), delimiters=",;\t|")
+    except csv.Error:
+        return UNKNOWN, None
+    return CSV, dialect.delimiter
+
+
+def sniff_bytes(head, mm=None):
+    """
+    Detected(kind, encoding, delimiter) for a file starting with head. mm,
+    the whole file mapped, is only needed to tell .xlsx from other zips.
+    """
+    if head.startswith(_OLE2) or head[:2] in _BIFF_BOF:
+        return Detected(BIFF)
+    if head.startswith(_ZIP):
+        return Detected(_zip_kind(mm) if mm is not None else ZIP)
+
+    encoding = _encoding(head)
+    if encoding is None:
+        match = _CHARSET.search(head)
+        if match:
+            try:
+                encoding = codecs.lookup(match.group(1).decode("ascii")).name
+            except (LookupError, UnicodeDecodeError):
+                encoding = None
+    # An incremental decoder drops a character cut in half at the end of
+    # the sample, and the BOM codecs drop the BOM.
+    if encoding:
+        # A named encoding is trusted; the text is only looked at here.
+        text = codecs.getincrementaldecoder(encoding)(errors="replace").decode(head)
+    else:
+        for encoding in _FALLBACK_ENCODINGS:
+            try:
+                text = codecs.getincrementaldecoder(encoding)().decode(head)
+                break
+            except UnicodeDecodeError:
+                continue
+        else:
+            return Detected(UNKNOWN)
+    kind, delimiter = _text_kind(text)
+    if kind == UNKNOWN:
+        return Detected(UNKNOWN)
+    return Detected(kind, encoding, delimiter)
+
+
+def sniff(path, size=SNIFF_BYTES):
+    """
+    Detected(kind, encoding, delimiter) of the file at path. kind is one of
+    HTML, BIFF, XLSX, ZIP, CSV or UNKNOWN. encoding is the Python codec of
+    a text format and None for binary ones: the one a BOM, the NULs of
+    UTF-16 or a <meta charset> name, else utf-8 if the sampled bytes decode
+    as UTF-8, else cp1252. delimiter is set for CSV only.
+    """
+    with open(path, "rb") as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file: there is nothing to map.
+            return Detected(UNKNOWN)
+        with mm:
+            return sniff_bytes(mm[:size], mm)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Show the detected format of report files")
+    parser.add_argument("paths", nargs="+")
+    args = parser.parse_args()
+    for path in args.paths:
+        detected = sniff(path)
+        print(f"{path}: {detected.kind}"
+              + (f", {detected.encoding}" if detected.encoding else "")
+              + (f", delimiter {detected.delimiter!r}" if detected.delimiter else ""))
@@ -0,0 +1,206 @@
+"""
+SQLite history of every converted daily report.
+
+Each day's DailyReport.xlsx is appended to <folder>/history.sqlite, one
+row per report line tagged with its business date and report type.
+Re-ingesting a date replaces that date only, so the table behaves as if
+partitioned by business date. Lines are indexed by (business date,
+report type), by order number and by (status, business date), so "what
+happened to this order" or "status counts for the last 90 days" are index
+lookups instead of opening dozens of workbooks.
+
+Report columns are added to the table as they first appear, so a new
+column in the PDBS report does not break the ingest.
+
+    python historyStore.py --folder "C:\\Reports" ingest DailyReport.xlsx --date 09/30/2025
+    python historyStore.py --folder "C:\\Reports" order SO1000123
+    python historyStore.py --folder "C:\\Reports" status --days 90
+    python historyStore.py --folder "C:\\Reports" sql "select count(*) from lines"
+"""
+import argparse
+import os
+import sqlite3
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+import pandas as pd
+
+import orderDelta
+from backupStore import date_key, sha256_file
+
+
+HISTORY_NAME = "history.sqlite"
+REPORT_TYPE = "order_fulfillment"
+ORDER_COLUMN = "SO No"
+STATUS_COLUMN = "Status"
+BATCH_ROWS = 50000
+_FIXED = ("business_date", "report_type", "line_no")
+
+
+def _quote(name):
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+class HistoryStore:
+    def __init__(self, dPath, name=HISTORY_NAME):
+        self.path = os.path.join(dPath, name)
+        self._lock = threading.Lock()
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        with self.db:
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS lines (business_date TEXT NOT NULL, report_type TEXT NOT NULL, "
+                "line_no INTEGER NOT NULL)"
+            )
+            self.db.execute("CREATE INDEX IF NOT EXISTS lines_date ON lines (business_date, report_type)")
+            self.db.execute(
+                "CREATE TABLE IF NOT EXISTS ingests (business_date TEXT NOT NULL, report_type TEXT NOT NULL, "
+                "rows INTEGER, sha256 TEXT, source TEXT, ingested_at REAL, seconds REAL, "
+                "PRIMARY KEY (business_date, report_type))"
+            )
+
+    def columns(self):
+        return [row[1] for row in self.db.execute("PRAGMA table_info(lines)")]
+
+    def _ensure_columns(self, header):
+        existing = set(self.columns())
+        for name in header:
+            if name and name not in existing:
+                self.db.execute(f"ALTER TABLE lines ADD COLUMN {_quote(name)}")
+                existing.add(name)
+        if ORDER_COLUMN in existing:
+            self.db.execute(f"CREATE INDEX IF NOT EXISTS lines_order ON lines ({_quote(ORDER_COLUMN)})")
+        if STATUS_COLUMN in existing:
+            self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS lines_status ON lines ({_quote(STATUS_COLUMN)}, business_date)"
+            )
+
+    def ingest(self, xlsx_path, business_date, report_type=REPORT_TYPE):
+        """
+        Replaces the lines of business_date with the rows of xlsx_path.
+        Returns the number of lines stored.
+        """
+        start = time.perf_counter()
+        key = date_key(business_date)
+        report = orderDelta.XlsxRowReader(xlsx_path)
+        rows = 0
+        try:
+            header = [name for name in report.header if name not in _FIXED]
+            positions = [i for i, name in enumerate(report.header) if name and name not in _FIXED]
+            with self._lock, self.db:
+                self._ensure_columns(header)
+                self.db.execute("DELETE FROM lines WHERE business_date = ? AND report_type = ?", (key, report_type))
+                names = ", ".join(_quote(n) for n in _FIXED + tuple(report.header[i] for i in positions))
+                marks = ", ".join("?" * (len(_FIXED) + len(positions)))
+                sql = f"INSERT INTO lines ({names}) VALUES ({marks})"
+                for batch in report.batches(BATCH_ROWS):
+                    self.db.executemany(sql, (
+                        (key, report_type, rows + n) + tuple(row[i] if i < len(row) else None for i in positions)
+                        for n, row in enumerate(batch)
+                    ))
+                    rows += len(batch)
+                self.db.execute(
+                    "INSERT OR REPLACE INTO ingests VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, report_type, rows, sha256_file(xlsx_path), os.path.abspath(xlsx_path), time.time(),
+                     round(time.perf_counter() - start, 3))
+                )
+        finally:
+            report.close()
+        print(f"History: stored {rows} lines for {key} in {time.perf_counter() - start:.1f} s")
+        return rows
+
+    def dates(self, report_type=REPORT_TYPE):
+        return [date.fromisoformat(row[0]) for row in self.db.execute(
+            "SELECT business_date FROM ingests WHERE report_type = ? ORDER BY business_date", (report_type,)
+        )]
+
+    def report_frame(self, sha256, columns, report_type=REPORT_TYPE):
+        """
+        columns of the most recently ingested report whose file had this
+        sha256, in report order, or None if there is no such report or it
+        lacks one of the columns.
+        """
+        row = self.db.execute(
+            "SELECT business_date FROM ingests WHERE sha256 = ? AND report_type = ? "
+            "ORDER BY ingested_at DESC LIMIT 1", (sha256, report_type)
+        ).fetchone()
+        if row is None or not set(columns) <= set(self.columns()):
+            return None
+        return self.query(
+            f"SELECT {', '.join(_quote(c) for c in columns)} FROM lines "
+            "WHERE business_date = ? AND report_type = ? ORDER BY line_no",
+            (row[0], report_type)
+        )
+
+    def query(self, sql, params=()):
+        """
+        Runs any SELECT against the store and returns a DataFrame.
+        """
+        return pd.read_sql_query(sql, self.db, params=params)
+
+    def order_history(self, order_no, report_type=REPORT_TYPE):
+        """
+        Every stored line of one order, oldest business date first.
+        """
+        return self.query(
+            f"SELECT * FROM lines WHERE {_quote(ORDER_COLUMN)} = ? AND report_type = ? "
+            "ORDER BY business_date, line_no",
+            (order_no, report_type)
+        )
+
+    def status_counts(self, start=None, end=None, report_type=REPORT_TYPE):
+        """
+        Lines per status per business date as a date x status table.
+        """
+        end = date_key(end or date.today())
+        start = date_key(start or date.fromisoformat(end) - timedelta(days=90))
+        counts = self.query(
+            f"SELECT business_date, {_quote(STATUS_COLUMN)} AS status, COUNT(*) AS lines FROM lines "
+            "WHERE report_type = ? AND business_date BETWEEN ? AND ? "
+            f"GROUP BY business_date, {_quote(STATUS_COLUMN)}",
+            (report_type, start, end)
+        )
+        return counts.pivot(index="business_date", columns="status", values="lines").fillna(0).astype(int)
+
+    def close(self):
+        self.db.close()
+
+
+def ingest_report(dPath, xlsx_path, business_date, report_type=REPORT_TYPE):
+    store = HistoryStore(dPath)
+    try:
+        return store.ingest(xlsx_path, business_date, report_type)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Query the daily report history")
+    parser.add_argument("--folder", default=".")
+    commands = parser.add_subparsers(dest="command", required=True)
+    ingest = commands.add_parser("ingest", help="store a converted report")
+    ingest.add_argument("path")
+    ingest.add_argument("--date", required=True, help="MM/DD/YYYY business date of the report")
+    order = commands.add_parser("order", help="history of one order")
+    order.add_argument("order_no")
+    status = commands.add_parser("status", help="lines per status per day")
+    status.add_argument("--days", type=int, default=90)
+    sql = commands.add_parser("sql", help="run a SELECT")
+    sql.add_argument("statement")
+    args = parser.parse_args()
+
+    store = HistoryStore(os.path.normpath(args.folder))
+    start = time.perf_counter()
+    with pd.option_context("display.max_rows", 200, "display.width", 200):
+        if args.command == "ingest":
+            store.ingest(args.path, datetime.strptime(args.date, "%m/%d/%Y"))
+        elif args.command == "order":
+            print(store.order_history(args.order_no).to_string(index=False))
+        elif args.command == "status":
+            print(store.status_counts(date.today() - timedelta(days=args.days)).to_string())
+        else:
+            print(store.query(args.statement).to_string(index=False))
+    print(f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+    store.close()
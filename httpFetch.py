@@ -0,0 +1,244 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import driverManager
+
+
+PDBS_URL = "https://pdbs.supermicro.com:18893"
+LOGIN_PATH = "/Home"
+REPORT_MENU_PATH = "/OrdReport.asp"
+REPORT_LINK_TEXT = "Order Fulfillment Report"
+# DailyOS step index -> name of the HTTP step that ends there.
+STEP_NAMES = {2: "Open HTTP session", 3: "Login", 5: "Open report page", 7: "Download report"}
+
+
+class _PageScanner(HTMLParser):
+    """
+    Collects the forms (action, method, inputs) and anchors (href, text) of a page.
+    """
+    def __init__(self):
+        super().__init__()
+        self.forms = []
+        self.links = []
+        self._form = None
+        self._link = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "form":
+            self._form = {
+                "action": attrs.get("action") or "",
+                "method": (attrs.get("method") or "get").lower(),
+                "inputs": {}
+            }
+            self.forms.append(self._form)
+        elif tag == "input" and self._form is not None and attrs.get("name"):
+            self._form["inputs"][attrs["name"]] = attrs.get("value") or ""
+        elif tag == "a":
+            self._link = {"href": attrs.get("href") or "", "text": ""}
+            self.links.append(self._link)
+
+    def handle_endtag(self, tag):
+        if tag == "form":
+            self._form = None
+        elif tag == "a":
+            self._link = None
+
+    def handle_data(self, data):
+        if self._link is not None:
+            self._link["text"] += data
+
+
+def scan_page(html):
+    scanner = _PageScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner
+
+
+def _find_form(scanner, field_name):
+    for form in scanner.forms:
+        if field_name in form["inputs"]:
+            return form
+    return None
+
+
+class PDBSSession:
+    """
+    Keep-alive HTTP session against PDBS that replays the login / report page
+    flow the browser goes through, without launching Chrome.
+    """
+    def __init__(self, base_url=PDBS_URL, cookie_path=None, pool_size=4, timeout=600):
+        self.base_url = base_url.rstrip("/")
+        self.cookie_path = cookie_path
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        if cookie_path and os.path.exists(cookie_path):
+            try:
+                with open(cookie_path, "r", encoding="utf-8") as f:
+                    cookies = json.load(f)
+                if not all(isinstance(v, str) for v in cookies.values()):
+                    raise ValueError("not a name -> value mapping")
+                self.session.cookies.update(cookies)
+            except Exception as e:
+                print(f"Ignoring unreadable cookie file {cookie_path}: {e}")
+
+    def url(self, path):
+        return urljoin(self.base_url + "/", path.lstrip("/"))
+
+    def _get(self, path, **kwargs):
+        response = self.session.get(self.url(path), timeout=self.timeout, **kwargs)
+        response.raise_for_status()
+        return response
+
+    def is_logged_in(self):
+        """
+        A reused cookie is still valid when /Home no longer serves the login form.
+        """
+        page = scan_page(self._get(LOGIN_PATH).text)
+        return _find_form(page, "txtUserName") is None
+
+    def login(self, username, password):
+        if self.session.cookies and self.is_logged_in():
+            return
+
+        page = scan_page(self._get(LOGIN_PATH).text)
+        form = _find_form(page, "txtUserName")
+        if form is None:
+            raise RuntimeError("Login form not found on PDBS /Home page.")
+
+        fields = dict(form["inputs"])
+        fields["txtUserName"] = username
+        fields["xPWD"] = password
+        fields.setdefault("btnSubmit", "Submit")
+
+        response = self.session.post(
+            urljoin(self.url(LOGIN_PATH), form["action"] or LOGIN_PATH),
+            data=fields,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        if _find_form(scan_page(response.text), "txtUserName") is not None:
+            raise RuntimeError("PDBS login failed, check username and password.")
+
+        self.save_cookies()
+
+    def open_report_page(self, report_date):
+        """
+        Equivalent of onClickTaskMenu("OrdReport.asp", 65) followed by ChgDate().
+        Returns the final response so its links can be resolved against its URL.
+        """
+        menu = self._get(REPORT_MENU_PATH)
+        form = _find_form(scan_page(menu.text), "Date")
+        if form is None:
+            raise RuntimeError(f"Date field not found on {REPORT_MENU_PATH}.")
+
+        fields = dict(form["inputs"])
+        fields["Date"] = report_date.strftime("%m/%d/%Y")
+        action = urljoin(menu.url, form["action"] or REPORT_MENU_PATH)
+        if form["method"] == "post":
+            response = self.session.post(action, data=fields, timeout=self.timeout)
+        else:
+            response = self.session.get(action, params=fields, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+    def download_report(self, page, download_dir, report_name=REPORT_LINK_TEXT, chunk_size=1 << 16):
+        """
+        Follows the report link on an already opened report page and streams
+        the file to disk (as .part first, so a partial file is never picked up).
+        """
+        href = None
+        for link in scan_page(page.text).links:
+            if link["text"].strip() == report_name:
+                href = link["href"]
+                break
+        if not href:
+            raise RuntimeError(f"Link '{report_name}' not found on report page.")
+
+        with self.session.get(urljoin(page.url, href), stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            file_name = "DailyReport.xls"
+            disposition = response.headers.get("Content-Disposition", "")
+            match = re.search(r'filename="?([^";]+)"?', disposition)
+            if match:
+                file_name = os.path.basename(match.group(1))
+
+            file_path = os.path.join(download_dir, file_name)
+            part_path = file_path + ".part"
+            with open(part_path, "wb") as f:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    if chunk:
+                        f.write(chunk)
+            os.replace(part_path, file_path)
+
+        self.save_cookies()
+        return file_path
+
+    def save_cookies(self):
+        if not self.cookie_path:
+            return
+        try:
+            directory = os.path.dirname(self.cookie_path) or "."
+            os.makedirs(directory, exist_ok=True)
+            # Written aside and swapped in, so a concurrent run never reads a
+            # half-written file. mkstemp creates it readable by this user
+            # only: the cookies are a logged-in session.
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(requests.utils.dict_from_cookiejar(self.session.cookies), f)
+            os.replace(tmp_path, self.cookie_path)
+        except Exception as e:
+            print(f"Could not save cookies to {self.cookie_path}: {e}")
+
+    def close(self):
+        self.session.close()
+
+
+def cookie_file(base_url, username):
+    """
+    Where the session cookies of username on base_url are kept: a JSON file
+    in the per-user cache directory driverManager uses, never next to the
+    reports.
+    """
+    key = hashlib.sha256(f"{base_url.rstrip('/')}\n{username}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(driverManager.CACHE_DIR, f"pdbs_cookies_{key}.json")
+
+
+def fetch_report_http(username, password, dPath, report_date, report_progress=None, base_url=PDBS_URL,
+                      report_name=REPORT_LINK_TEXT):
+    """
+    HTTP counterpart of the Selenium steps in DailyOS (launch, login, navigate,
+    set date, click link, wait for download). Writes the report linked as
+    report_name into dPath and returns its path. report_progress is called
+    as report_progress(step_index, name) with the steps of STEP_NAMES.
+    """
+    def progress(step_index):
+        if report_progress:
+            report_progress(step_index, STEP_NAMES[step_index])
+
+    session = PDBSSession(base_url, cookie_path=cookie_file(base_url, username))
+    try:
+        progress(2)
+        session.login(username, password)
+        progress(3)
+        page = session.open_report_page(report_date)
+        progress(5)
+        file_path = session.download_report(page, dPath, report_name)
+        progress(7)
+        return file_path
+    finally:
+        session.close()
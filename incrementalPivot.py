@@ -0,0 +1,194 @@
+"""
+Incremental pivot refresh for update_report(backend="incremental").
+
+Loading DailyReport.xlsx with read_excel is most of a pandas refresh, so
+the day's rows are taken from the history store instead (DailyOS ingests
+every converted report there), reading only the columns the pivots use.
+read_excel is only the fallback for a report the store does not have.
+
+For each pivot the key and value columns of every row are hashed once,
+and each group gets a signature: its row count and the wrapping sum of
+its row hashes. The signatures and long-form aggregates of the last
+refresh are kept, keyed by group hash, in .pivot_cache/state.npz next to
+the workbook. A group whose signature is unchanged since then is taken
+from the cache; only groups with added, removed or changed rows are
+re-aggregated. The first run, and any pivot whose spec changed, is
+computed in full.
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import historyStore
+import pivotEngine
+import reportSchema
+from backupStore import sha256_file
+
+
+CACHE_DIR = ".pivot_cache"
+STATE_NAME = "state.npz"
+
+
+def _state_path(report_path):
+    return os.path.join(report_path, CACHE_DIR, STATE_NAME)
+
+
+def load_state(report_path):
+    """
+    {sheet: {"spec", "group", "sig", "rows", "values": {column: array}}} of
+    the last refresh, or {} if there is none.
+    """
+    try:
+        # Plain arrays only: the cache never unpickles anything.
+        with np.load(_state_path(report_path), allow_pickle=False) as data:
+            arrays = {name: data[name] for name in data.files}
+    except (OSError, ValueError):
+        return {}
+    state = {}
+    for name, array in arrays.items():
+        sheet, _, field = name.partition("/")
+        entry = state.setdefault(sheet, {"values": {}})
+        if field == "spec":
+            entry["spec"] = json.loads(str(array))
+        elif field.startswith("value/"):
+            entry["values"][field[len("value/"):]] = array
+        else:
+            entry[field] = array
+    return state
+
+
+def save_state(report_path, state):
+    arrays = {}
+    for sheet, entry in state.items():
+        arrays[f"{sheet}/spec"] = np.array(json.dumps(entry["spec"]))
+        for field in ("group", "sig", "rows"):
+            arrays[f"{sheet}/{field}"] = entry[field]
+        for column, values in entry["values"].items():
+            arrays[f"{sheet}/value/{column}"] = values
+    path = _state_path(report_path)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, **arrays)
+    os.replace(tmp_path, path)
+
+
+def load_report(report_path, specs):
+    """
+    The columns specs read from DailyReport.xlsx, taken from the history
+    store, or None if the store has no report with the same sha256.
+    """
+    history_path = os.path.join(report_path, historyStore.HISTORY_NAME)
+    if not os.path.exists(history_path):
+        return None
+    columns = list(dict.fromkeys(c for spec in specs for c in spec["index"] + spec["columns"] + list(spec["values"])))
+    store = historyStore.HistoryStore(report_path)
+    try:
+        df = store.report_frame(sha256_file(os.path.join(report_path, "DailyReport.xlsx")), columns)
+    finally:
+        store.close()
+    if df is None:
+        return None
+    print(f"Loaded {len(df)} rows of DailyReport.xlsx from the history store.")
+    return reportSchema.apply_schema(df)
+
+
+def _signatures(df, spec):
+    """
+    (group hash per row, per-group frame of sig, rows and first row
+    position indexed by group hash).
+    """
+    keys = spec["index"] + spec["columns"]
+    group = pd.util.hash_pandas_object(df[keys], index=False).to_numpy()
+    content = pd.util.hash_pandas_object(df[keys + list(spec["values"])], index=False).to_numpy()
+    groups = pd.DataFrame({"sig": content, "row": np.arange(len(df))}).groupby(group, sort=False).agg(
+        sig=("sig", "sum"), rows=("sig", "size"), first=("row", "first"))
+    return group, groups
+
+
+def _cached_positions(entry, spec, groups):
+    """
+    Position in the cached arrays of every group whose signature has not
+    changed, -1 for the rest.
+    """
+    positions = np.full(len(groups), -1, dtype=np.int64)
+    if entry is None or entry.get("spec") != spec:
+        return positions
+    found = pd.Index(entry["group"]).get_indexer(groups.index)
+    hit = found >= 0
+    same = np.zeros(len(groups), dtype=bool)
+    same[hit] = ((entry["sig"][found[hit]] == groups["sig"].to_numpy()[hit]) &
+                 (entry["rows"][found[hit]] == groups["rows"].to_numpy()[hit]))
+    positions[same] = found[same]
+    return positions
+
+
+def _update_aggregate(df, spec, entry, max_changed_fraction):
+    """
+    Long-form aggregate of spec (as pivotEngine.aggregate returns it) and
+    the state entry for the next refresh.
+    """
+    keys = spec["index"] + spec["columns"]
+    group, groups = _signatures(df, spec)
+    if groups.empty:
+        return pivotEngine.aggregate(df, spec), None
+    positions = _cached_positions(entry, spec, groups)
+    touched = positions < 0
+    if touched.sum() > max_changed_fraction * max(len(groups), 1):
+        touched[:] = True
+        positions[:] = -1
+
+    columns = {}
+    if touched.any():
+        in_touched = np.isin(group, groups.index[touched])
+        fresh = df.loc[in_touched, list(spec["values"])].groupby(group[in_touched], sort=False).agg(spec["values"])
+        fresh = fresh.reindex(groups.index[touched])
+    for name in spec["values"]:
+        if touched.all():
+            columns[name] = fresh[name].to_numpy()
+            continue
+        cached = entry["values"][name]
+        values = cached[positions] if not touched.any() else np.empty(
+            len(groups), np.result_type(cached.dtype, fresh[name].dtype))
+        if touched.any():
+            values[touched] = fresh[name].to_numpy()
+            values[~touched] = cached[positions[~touched]]
+        columns[name] = values
+    print(f"{spec['name']}: re-aggregated {int(touched.sum())} of {len(groups)} groups.")
+
+    # Same index and row order as pivotEngine.aggregate: grouping the first
+    # row of every group gives the keys exactly as its groupby builds them.
+    by_key = df[keys].iloc[groups["first"].to_numpy()].groupby(keys, dropna=False, sort=True, observed=True)
+    order = np.argsort(by_key.ngroup().to_numpy())
+    long = pd.DataFrame({name: values[order] for name, values in columns.items()}, index=by_key.size().index)
+
+    # Text aggregates (max of a text column) are not kept: the cache holds
+    # plain numeric arrays only.
+    next_entry = {
+        "spec": spec,
+        "group": groups.index.to_numpy(dtype=np.uint64),
+        "sig": groups["sig"].to_numpy(dtype=np.uint64),
+        "rows": groups["rows"].to_numpy(dtype=np.int64),
+        "values": columns,
+    } if all(values.dtype.kind in "iufb" for values in columns.values()) else None
+    return long, next_entry
+
+
+def compute_pivots(df, specs, report_path, max_changed_fraction=0.5):
+    """
+    Returns {sheet_name: flattened pivot} for specs, reusing the cached
+    aggregates of the last refresh for every group whose rows did not
+    change.
+    """
+    state = load_state(report_path)
+    results = {}
+    next_state = {}
+    for spec in specs:
+        long, entry = _update_aggregate(df, spec, state.get(spec["sheet"]), max_changed_fraction)
+        if entry is not None:
+            next_state[spec["sheet"]] = entry
+        results[spec["sheet"]] = pivotEngine.flatten(pivotEngine.build_pivot(long, spec, df))
+    save_state(report_path, next_state)
+    return results
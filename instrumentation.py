@@ -0,0 +1,127 @@
+"""
+Per-step timing and resource records for DailyOS and update_report.
+
+A RunRecorder is told when each step ends (mark); for the time since the
+previous mark it records wall time, CPU time, peak RSS (sampled in a
+background thread) and bytes read/written by the process. Each finished
+step is sent to the progress callback as ("stage", record) and the whole
+run is appended as one JSON line to run_log.jsonl.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+RUN_LOG_NAME = "run_log.jsonl"
+
+
+def _io_bytes(proc):
+    if proc is None:
+        return None, None
+    try:
+        io = proc.io_counters()
+    except (psutil.Error, AttributeError, NotImplementedError):
+        return None, None
+    # read_chars/write_chars (Linux) include cached I/O; elsewhere use bytes.
+    return getattr(io, "read_chars", io.read_bytes), getattr(io, "write_chars", io.write_bytes)
+
+
+def _rss_mb(proc):
+    if proc is not None:
+        try:
+            return proc.memory_info().rss / (1024 * 1024)
+        except psutil.Error:
+            return None
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+class RunRecorder:
+    def __init__(self, run_name, log_dir, progress_callback=None, sample_interval=0.02):
+        self.run_name = run_name
+        self.log_path = os.path.join(log_dir, RUN_LOG_NAME) if log_dir else None
+        self.progress_callback = progress_callback
+        self.sample_interval = sample_interval
+        self.stages = []
+        self.started = datetime.now()
+        self._proc = psutil.Process() if psutil else None
+        self._peak = _rss_mb(self._proc) or 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._reset()
+        if self._proc is not None:
+            threading.Thread(target=self._sample, daemon=True).start()
+
+    def _reset(self):
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._read, self._written = _io_bytes(self._proc)
+        with self._lock:
+            self._peak = _rss_mb(self._proc) or 0
+
+    def _sample(self):
+        while not self._stop.wait(self.sample_interval):
+            rss = _rss_mb(self._proc)
+            if rss is not None:
+                with self._lock:
+                    self._peak = max(self._peak, rss)
+
+    def mark(self, name):
+        """
+        Closes the step that has been running since the previous mark.
+        """
+        read, written = _io_bytes(self._proc)
+        with self._lock:
+            peak = max(self._peak, _rss_mb(self._proc) or 0)
+        record = {
+            "step": name,
+            "wall_seconds": round(time.perf_counter() - self._wall, 3),
+            "cpu_seconds": round(time.process_time() - self._cpu, 3),
+            "peak_rss_mb": round(peak, 1) if peak else None,
+            "read_bytes": read - self._read if read is not None and self._read is not None else None,
+            "written_bytes": written - self._written if written is not None and self._written is not None else None,
+        }
+        self.stages.append(record)
+        if self.progress_callback:
+            self.progress_callback("stage", record)
+        self._reset()
+        return record
+
+    def finish(self, status="ok", error=None):
+        """
+        Stops sampling and appends the run to run_log.jsonl.
+        """
+        self._stop.set()
+        run = {
+            "run": self.run_name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "status": status,
+            "error": error,
+            "total_seconds": round(sum(s["wall_seconds"] for s in self.stages), 3),
+            "stages": self.stages,
+        }
+        if self.log_path:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(run) + "\n")
+            except OSError as e:
+                print(f"Could not write {self.log_path}: {e}")
+        return run
+
+
+def slowest(stages, n=3):
+    """
+    "Step 12.1s · Step 3.2s" summary of the n slowest recorded steps.
+    """
+    ranked = sorted(stages, key=lambda s: s["wall_seconds"], reverse=True)[:n]
+    return " · ".join(f"{s['step']} {s['wall_seconds']:.1f}s" for s in ranked)
@@ -0,0 +1,183 @@
+"""
+Runs many (account, report, date) downloads at once from a JSON config.
+
+    {
+        "output": "C:\\\\Reports\\\\jobs",
+        "mode": "http",
+        "max_concurrent": 4,
+        "max_per_account": 2,
+        "accounts": {
+            "us": {"username": "jdoe", "password_env": "PDBS_US_PASSWORD"},
+            "eu": {"username": "jdoe_eu", "password_env": "PDBS_EU_PASSWORD"}
+        },
+        "reports": {
+            "fulfillment": {"link": "Order Fulfillment Report", "file_prefix": "DailyReport"},
+            "open": {"link": "Open Order Report", "file_prefix": "OpenOrderReport"}
+        },
+        "jobs": [
+            {"account": "us", "report": "fulfillment"},
+            {"account": "eu", "report": "open", "date": "09/30/2025"}
+        ]
+    }
+
+Without "jobs", every account downloads every report. A job without
+"date" fetches the previous business day. Passwords come from the
+environment variable named by password_env, so the config can be shared.
+
+Every job downloads into its own folder, <output>/<account>/<report>/<date>,
+and its report is converted to <file_prefix>.xlsx there, so Chrome
+downloads of different jobs never meet. At most max_concurrent jobs
+(and max_per_account per account) run at a time. The run ends with one
+summary of per-job timings and failures, also saved as
+<output>/job_summary_<timestamp>.json.
+
+    python jobRunner.py jobs.json
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import dataDownload
+from httpFetch import PDBS_URL, REPORT_LINK_TEXT
+
+
+def load_config(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _credentials(name, account):
+    password = account.get("password")
+    if account.get("password_env"):
+        password = os.environ.get(account["password_env"])
+    if not account.get("username") or password is None:
+        raise ValueError(f"Account {name!r} needs a username and a password (password_env).")
+    return account["username"], password
+
+
+def expand_jobs(config, today=None):
+    """
+    One dict per job with its account, report, date and folder.
+    """
+    default_date = dataDownload.subtract_one_business_day(today or datetime.today())
+    accounts = config["accounts"]
+    reports = config.get("reports") or {"fulfillment": {"link": REPORT_LINK_TEXT, "file_prefix": "DailyReport"}}
+    entries = config.get("jobs") or [{"account": a, "report": r} for a in accounts for r in reports]
+
+    jobs = []
+    for entry in entries:
+        account, report = entry["account"], entry["report"]
+        if account not in accounts:
+            raise ValueError(f"Unknown account {account!r} in job {entry}")
+        if report not in reports:
+            raise ValueError(f"Unknown report {report!r} in job {entry}")
+        report_date = datetime.strptime(entry["date"], "%m/%d/%Y") if entry.get("date") else default_date
+        jobs.append({
+            "account": account,
+            "report": report,
+            "date": report_date,
+            "folder": os.path.join(config.get("output", "jobs"), account, report, report_date.strftime("%m-%d-%Y")),
+            "link": reports[report].get("link", REPORT_LINK_TEXT),
+            "file_prefix": reports[report].get("file_prefix", "DailyReport"),
+        })
+    return jobs
+
+
+def run_job(job, account, mode, base_url, convert):
+    username, password = _credentials(job["account"], account)
+    os.makedirs(job["folder"], exist_ok=True)
+    file_path = dataDownload.fetch_report(
+        username, password, job["folder"], job["date"], lambda step, name=None: None, mode, base_url,
+        report_name=job["link"], file_prefix=job["file_prefix"]
+    )
+    target = os.path.join(job["folder"], job["file_prefix"] + ".xlsx")
+    dataDownload.convert_download(file_path, target, convert)
+    return target
+
+
+def run_jobs(config, progress_callback=None):
+    """
+    Runs every job of config and returns one result dict per job, in
+    config order.
+    """
+    jobs = expand_jobs(config)
+    mode = config.get("mode", "selenium")
+    base_url = config.get("base_url", PDBS_URL)
+    convert = config.get("convert", "stream")
+    max_concurrent = max(1, int(config.get("max_concurrent", 4)))
+    per_account = config.get("max_per_account")
+    account_slots = {name: threading.Semaphore(per_account) for name in config["accounts"]} if per_account else {}
+
+    total = len(jobs)
+    done = [0]
+    lock = threading.Lock()
+
+    def execute(job):
+        result = {"account": job["account"], "report": job["report"], "date": job["date"].strftime("%m/%d/%Y")}
+        slot = account_slots.get(job["account"])
+        if slot:
+            slot.acquire()
+        start = time.perf_counter()
+        try:
+            result.update(status="ok", path=run_job(job, config["accounts"][job["account"]], mode, base_url, convert))
+        except Exception as e:
+            logging.error(f"Job {job['account']}/{job['report']} {result['date']} failed", exc_info=True)
+            result.update(status="failed", error=f"{type(e).__name__}: {e}")
+        finally:
+            if slot:
+                slot.release()
+        result["seconds"] = round(time.perf_counter() - start, 2)
+        print(f"[{job['account']}/{job['report']} {result['date']}] {result['status']} ({result['seconds']} s)")
+        with lock:
+            done[0] += 1
+            if progress_callback and total:
+                progress_callback("update", done[0] / total * 100)
+        return result
+
+    if progress_callback:
+        progress_callback("start")
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=min(max_concurrent, total or 1)) as pool:
+            results = list(pool.map(execute, jobs))
+    finally:
+        if progress_callback:
+            progress_callback("stop", 100)
+    elapsed = time.perf_counter() - started
+
+    print_summary(results, elapsed)
+    save_summary(results, elapsed, config.get("output", "jobs"))
+    return results
+
+
+def print_summary(results, elapsed):
+    failed = [r for r in results if r["status"] == "failed"]
+    busy = sum(r["seconds"] for r in results)
+    print(f"\n{'Account':<12} {'Report':<16} {'Date':<11} {'Status':<7} {'Seconds':>8}")
+    for r in results:
+        print(f"{r['account']:<12} {r['report']:<16} {r['date']:<11} {r['status']:<7} {r['seconds']:>8.1f}")
+    print(f"{len(results) - len(failed)} ok, {len(failed)} failed in {elapsed:.1f} s "
+          f"({busy:.1f} s of job time, {busy / elapsed if elapsed else 0:.1f}x concurrency)")
+    for r in failed:
+        print(f"  {r['account']}/{r['report']} {r['date']}: {r['error']}")
+
+
+def save_summary(results, elapsed, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, f"job_summary_{datetime.now():%Y%m%d_%H%M%S}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"elapsed_seconds": round(elapsed, 2), "jobs": results}, f, indent=2)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Download many PDBS reports concurrently")
+    parser.add_argument("config", help="JSON job config")
+    args = parser.parse_args()
+
+    run_jobs(load_config(args.config))
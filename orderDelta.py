@@ -0,0 +1,378 @@
+"""
+Day-over-day delta of the Order Fulfillment Report: which order lines were
+added, removed or changed since the previous business day.
+
+The previous report (from the backup store) is read once into a compact
+index: one uint64 hash of the line key (SO No + Line) and one of the rest
+of the row per line, sorted by key (about 25 bytes a line, whatever the
+row width). Today's DailyReport.xlsx is then streamed in batches and each
+batch is looked up in the index with np.searchsorted, so the work grows
+linearly with the number of lines and neither report is ever held as a
+DataFrame. Only the rows that are part of the delta are kept, and a second
+pass over the previous report picks up the old values of removed and
+changed lines.
+
+Repeated keys are matched one to one (a line that appears twice today and
+once yesterday shows up once as added).
+
+    python orderDelta.py --folder "C:\\Reports"              -> DailyDelta.xlsx
+    python orderDelta.py --folder "C:\\Reports" --sheet      -> "Delta" sheet in DailyReport.xlsx
+"""
+import argparse
+import itertools
+import os
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+import backupStore
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+KEY_COLUMNS = ("SO No", "Line")
+BATCH_ROWS = 50000
+DELTA_NAME = "DailyDelta.xlsx"
+SHEET_NAME = "Delta"
+
+
+def _text(value):
+    return "" if value is None else str(value)
+
+
+_MAIN = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PKG_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+
+_column_cache = {}
+
+
+def _column_index(ref):
+    letters = ref.rstrip("0123456789")
+    index = _column_cache.get(letters)
+    if index is None:
+        index = 0
+        for char in letters.upper():
+            index = index * 26 + ord(char) - 64
+        index = _column_cache[letters] = index - 1
+    return index
+
+
+def _number(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _first_sheet(archive):
+    workbook = etree.fromstring(archive.read("xl/workbook.xml"))
+    rel_id = workbook.find(f"{_MAIN}sheets/{_MAIN}sheet").get(f"{_REL}id")
+    rels = etree.fromstring(archive.read("xl/_rels/workbook.xml.rels"))
+    for rel in rels.iter(f"{_PKG_REL}Relationship"):
+        if rel.get("Id") == rel_id:
+            target = rel.get("Target")
+            return target.lstrip("/") if target.startswith("/") else "xl/" + target
+    raise ValueError("First worksheet not found in workbook.")
+
+
+def _shared_strings(archive):
+    if "xl/sharedStrings.xml" not in archive.namelist():
+        return []
+    strings = []
+    with archive.open("xl/sharedStrings.xml") as f:
+        for _, si in etree.iterparse(f, tag=f"{_MAIN}si"):
+            strings.append("".join(t.text or "" for t in si.iter(f"{_MAIN}t")))
+            si.clear()
+    return strings
+
+
+def _iter_sheet_rows(archive):
+    """
+    Cell values of the first sheet row by row, straight from the XML.
+    """
+    strings = _shared_strings(archive)
+    t_tag, v_tag = f"{_MAIN}t", f"{_MAIN}v"
+    with archive.open(_first_sheet(archive)) as f:
+        for _, row in etree.iterparse(f, tag=f"{_MAIN}row"):
+            values = []
+            for cell in row:
+                ref = cell.get("r")
+                if ref:
+                    column = _column_index(ref)
+                    if column > len(values):
+                        values.extend([None] * (column - len(values)))
+                kind = cell.get("t")
+                if kind == "inlineStr":
+                    values.append("".join(t.text or "" for t in cell.iter(t_tag)))
+                    continue
+                v = cell.find(v_tag)
+                if v is None or v.text is None:
+                    values.append(None)
+                elif kind == "s":
+                    values.append(strings[int(v.text)])
+                elif kind in ("str", "e"):
+                    values.append(v.text)
+                elif kind == "b":
+                    values.append(v.text == "1")
+                else:
+                    values.append(_number(v.text))
+            yield tuple(values)
+            row.clear()
+            while row.getprevious() is not None:
+                del row.getparent()[0]
+
+
+class XlsxRowReader:
+    """
+    Rows of the first sheet of an xlsx, streamed (lxml on the sheet XML, or
+    openpyxl's read-only mode without lxml).
+    """
+    def __init__(self, path):
+        if etree is not None:
+            self._source = zipfile.ZipFile(path)
+            self.rows = _iter_sheet_rows(self._source)
+        else:
+            self._source = openpyxl.load_workbook(path, read_only=True, data_only=True)
+            self.rows = self._source.worksheets[0].iter_rows(values_only=True)
+        self.header = [_text(c) for c in next(self.rows, ())]
+
+    def batches(self, batch_rows):
+        while True:
+            batch = list(itertools.islice(self.rows, batch_rows))
+            if not batch:
+                return
+            yield batch
+
+    def close(self):
+        self._source.close()
+
+
+def _hashes(batch, key_idx, value_idx):
+    frame = pd.DataFrame([[_text(v) for v in row] for row in batch], dtype=object)
+    # Short rows (trailing blanks) are padded by the DataFrame with None.
+    frame = frame.reindex(columns=range(max(key_idx + value_idx) + 1)).fillna("")
+    keys = pd.util.hash_pandas_object(frame[key_idx], index=False).to_numpy()
+    content = pd.util.hash_pandas_object(frame[value_idx], index=False).to_numpy()
+    return keys, content
+
+
+def _columns(previous_header, current_header, key_columns):
+    for name in key_columns:
+        if name not in previous_header or name not in current_header:
+            raise ValueError(f"Key column {name!r} missing from one of the reports.")
+    values = [c for c in current_header if c in previous_header and c not in key_columns]
+    return list(key_columns), values
+
+
+class PreviousIndex:
+    """
+    Sorted key hashes of the previous report with their content hashes and
+    row positions.
+    """
+    def __init__(self, path, key_columns, value_columns, batch_rows=BATCH_ROWS):
+        report = XlsxRowReader(path)
+        try:
+            self.header = report.header
+            key_idx = [self.header.index(c) for c in key_columns]
+            value_idx = [self.header.index(c) for c in value_columns]
+            keys, content = [], []
+            for batch in report.batches(batch_rows):
+                k, c = _hashes(batch, key_idx, value_idx)
+                keys.append(k)
+                content.append(c)
+        finally:
+            report.close()
+        keys = np.concatenate(keys) if keys else np.empty(0, np.uint64)
+        content = np.concatenate(content) if content else np.empty(0, np.uint64)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.content = content[order]
+        self.positions = order
+        self.matched = np.zeros(len(order), dtype=bool)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def match(self, keys, content):
+        """
+        Matches a batch of current lines. Returns (prev_slot, changed) with
+        prev_slot -1 for added lines.
+        """
+        lo = np.searchsorted(self.keys, keys, side="left")
+        hi = np.searchsorted(self.keys, keys, side="right")
+        slot = np.full(len(keys), -1, dtype=np.int64)
+        unique = (hi - lo == 1) & ~pd.Series(keys).duplicated(keep=False).to_numpy()
+        unique[unique] = ~self.matched[lo[unique]]
+        slot[unique] = lo[unique]
+        self.matched[lo[unique]] = True
+
+        # Repeated keys: pair each line with an unmatched previous line,
+        # preferring one with the same content.
+        for i in np.flatnonzero(~unique & (hi > lo)):
+            free = [s for s in range(lo[i], hi[i]) if not self.matched[s]]
+            if not free:
+                continue
+            same = [s for s in free if self.content[s] == content[i]]
+            slot[i] = (same or free)[0]
+            self.matched[slot[i]] = True
+
+        changed = np.zeros(len(keys), dtype=bool)
+        found = slot >= 0
+        changed[found] = self.content[slot[found]] != content[found]
+        return slot, changed
+
+
+def diff_reports(previous_path, current_path, key_columns=KEY_COLUMNS, batch_rows=BATCH_ROWS):
+    """
+    Delta between two report xlsx files as a DataFrame with a "Change"
+    column (added / removed / changed), the current report's columns and,
+    for changed lines, "Changed Columns" ("Status: Open -> Shipped; ...").
+    Returns (delta, stats).
+    """
+    start = time.perf_counter()
+    current = XlsxRowReader(current_path)
+    try:
+        previous_header = XlsxRowReader(previous_path)
+        previous_header.close()
+        key_columns, value_columns = _columns(previous_header.header, current.header, key_columns)
+        index = PreviousIndex(previous_path, key_columns, value_columns, batch_rows)
+        indexed = time.perf_counter()
+
+        key_idx = [current.header.index(c) for c in key_columns]
+        value_idx = [current.header.index(c) for c in value_columns]
+        added, changed = [], []
+        rows = 0
+        for batch in current.batches(batch_rows):
+            rows += len(batch)
+            keys, content = _hashes(batch, key_idx, value_idx)
+            slot, is_changed = index.match(keys, content)
+            added += [batch[i] for i in np.flatnonzero(slot < 0)]
+            changed += [(batch[i], index.positions[slot[i]]) for i in np.flatnonzero(is_changed)]
+        header = current.header
+    finally:
+        current.close()
+
+    # Second pass over the previous report for the rows the delta needs.
+    removed_positions = index.positions[~index.matched]
+    needed = np.zeros(len(index), dtype=bool)
+    needed[removed_positions] = True
+    needed[[position for _, position in changed]] = True
+    old_rows = {}
+    if needed.any():
+        previous = XlsxRowReader(previous_path)
+        try:
+            for position, row in enumerate(previous.rows):
+                if position < len(needed) and needed[position]:
+                    old_rows[position] = row
+        finally:
+            previous.close()
+
+    def current_layout(row, source_header):
+        values = dict(zip(source_header, row))
+        return [values.get(c) for c in header]
+
+    records = [["added"] + list(row) + [""] for row in added]
+    for row, position in changed:
+        old = dict(zip(index.header, old_rows[position]))
+        new = dict(zip(header, row))
+        diffs = [f"{c}: {_text(old.get(c))} -> {_text(new.get(c))}" for c in value_columns
+                 if _text(old.get(c)) != _text(new.get(c))]
+        records.append(["changed"] + list(row) + ["; ".join(diffs)])
+    records += [["removed"] + current_layout(old_rows[p], index.header) + [""] for p in sorted(removed_positions)]
+
+    width = len(header)
+    delta = pd.DataFrame([r[:1] + (r[1:-1] + [None] * width)[:width] + r[-1:] for r in records],
+                         columns=["Change"] + header + ["Changed Columns"])
+    stats = {
+        "previous_rows": len(index),
+        "current_rows": rows,
+        "added": len(added),
+        "removed": len(removed_positions),
+        "changed": len(changed),
+        "index_seconds": round(indexed - start, 3),
+        "seconds": round(time.perf_counter() - start, 3),
+    }
+    return delta, stats
+
+
+def write_delta(delta, path):
+    """
+    Writes the delta as its own file (.xlsx or .csv).
+    """
+    if path.lower().endswith(".csv"):
+        delta.to_csv(path, index=False)
+    else:
+        delta.to_excel(path, sheet_name=SHEET_NAME, index=False)
+    return path
+
+
+def write_delta_sheet(delta, workbook_path, sheet_name=SHEET_NAME):
+    """
+    Adds (or replaces) the delta as a sheet of an existing workbook.
+    """
+    import pivotEngine
+    pivotEngine.write_sheets(workbook_path, {sheet_name: delta})
+    return workbook_path
+
+
+def delta_for_date(dPath, business_date=None, current_path=None):
+    """
+    Delta of dPath/DailyReport.xlsx (the report of business_date, by default
+    the previous business day) against the latest earlier report in
+    dPath/backup. Returns (delta, stats), or None if there is no earlier
+    report.
+    """
+    import dataDownload
+
+    business_date = business_date or dataDownload.subtract_one_business_day(datetime.today())
+    current_path = current_path or os.path.join(dPath, "DailyReport.xlsx")
+    store = backupStore.BackupStore(os.path.join(dPath, "backup"))
+    previous_date = store.latest_before(business_date)
+    if previous_date is None:
+        print(f"No backup before {business_date.strftime('%m-%d-%Y')} to compare with.")
+        return None
+
+    fd, previous_path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(fd)
+    try:
+        store.restore(previous_date, previous_path)
+        delta, stats = diff_reports(previous_path, current_path)
+    finally:
+        os.remove(previous_path)
+    stats["previous_date"] = previous_date.isoformat()
+    print(f"Delta vs {previous_date:%m-%d-%Y}: {stats['added']} added, {stats['removed']} removed, "
+          f"{stats['changed']} changed of {stats['current_rows']} lines in {stats['seconds']:.1f} s")
+    return delta, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Day-over-day delta of the Order Fulfillment Report")
+    parser.add_argument("--folder", default=".")
+    parser.add_argument("--previous", help="previous report xlsx (default: latest backup)")
+    parser.add_argument("--current", help="current report xlsx (default: DailyReport.xlsx)")
+    parser.add_argument("--out", help=f"output .xlsx or .csv (default: {DELTA_NAME} in the folder)")
+    parser.add_argument("--sheet", action="store_true", help=f"write a '{SHEET_NAME}' sheet into the current report")
+    args = parser.parse_args()
+
+    folder = os.path.normpath(args.folder)
+    current_path = args.current or os.path.join(folder, "DailyReport.xlsx")
+    if args.previous:
+        result = diff_reports(args.previous, current_path)
+        print(result[1])
+    else:
+        result = delta_for_date(folder, current_path=current_path)
+    if result is not None:
+        if args.sheet:
+            print(f"Written to {write_delta_sheet(result[0], current_path)}")
+        else:
+            print(f"Written to {write_delta(result[0], args.out or os.path.join(folder, DELTA_NAME))}")
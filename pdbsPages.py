@@ -0,0 +1,158 @@
+"""
+Page objects for the PDBS pages the Selenium fetch goes through.
+
+Every lookup is one CSS or JavaScript query instead of a loop of
+WebDriver calls (the old menu step read the href of every <a> on the
+page, one round trip each), and every wait is an explicit condition
+polled every 100 ms instead of time.sleep or the driver's implicit wait.
+CommandCounter counts the WebDriver commands a run sends, so the round
+trips can be compared.
+"""
+import time
+from collections import Counter
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+
+POLL = 0.1
+
+_LOGIN_DONE = """
+return document.readyState !== 'loading' && !document.getElementById('txtUserName');
+"""
+
+_CLICK_LINK_BY_HREF = """
+const link = Array.from(document.querySelectorAll('a[href]'))
+    .find(a => a.getAttribute('href') === arguments[0]);
+if (!link) return false;
+link.click();
+return true;
+"""
+
+_SET_DATE = """
+const field = document.getElementsByName('Date')[0];
+field.value = arguments[0];
+ChgDate();
+"""
+
+_DATE_SHOWN = """
+const field = document.getElementsByName('Date')[0];
+return document.readyState !== 'loading' && !!field && field.value === arguments[0];
+"""
+
+
+class CommandCounter:
+    """
+    Counts the WebDriver commands (HTTP round trips to chromedriver) sent
+    through driver while active, with their total time.
+    """
+    def __init__(self, driver):
+        self.driver = driver
+        self.commands = Counter()
+        self.seconds = 0.0
+        self._original = None
+
+    def __enter__(self):
+        self._original = self.driver.execute
+
+        def execute(driver_command, params=None):
+            start = time.perf_counter()
+            try:
+                return self._original(driver_command, params)
+            finally:
+                self.seconds += time.perf_counter() - start
+                self.commands[driver_command] += 1
+
+        self.driver.execute = execute
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        # Drop the instance attribute so the class method is used again.
+        del self.driver.execute
+
+    @property
+    def total(self):
+        return sum(self.commands.values())
+
+    def summary(self):
+        top = ", ".join(f"{name} x{count}" for name, count in self.commands.most_common(5))
+        return f"{self.total} WebDriver commands in {self.seconds:.2f} s ({top})"
+
+
+class PDBSPage:
+    def __init__(self, driver, timeout=30):
+        self.driver = driver
+        self.timeout = timeout
+
+    def wait(self, condition, timeout=None, message=""):
+        return WebDriverWait(self.driver, timeout or self.timeout, POLL).until(condition, message)
+
+    def wait_script(self, script, *args, timeout=None, message=""):
+        return self.wait(lambda d: d.execute_script(script, *args), timeout, message)
+
+
+class LoginPage(PDBSPage):
+    def open(self, base_url):
+        self.driver.get(f"{base_url}/Home")
+        return self
+
+    def login(self, username, password):
+        """
+        Fills in and submits the login form, then waits for the page after it.
+        """
+        self.wait(EC.presence_of_element_located((By.ID, "txtUserName")))
+        self.driver.execute_script(
+            "document.getElementById('txtUserName').value = arguments[0];"
+            "document.getElementById('xPWD').value = arguments[1];"
+            "document.getElementById('btnSubmit').click();",
+            username, password
+        )
+        try:
+            self.wait_script(_LOGIN_DONE)
+        except TimeoutException:
+            raise RuntimeError("PDBS login failed, check username and password.")
+        return MenuPage(self.driver, self.timeout)
+
+
+class MenuPage(PDBSPage):
+    def open_task(self, page, menu_id):
+        """
+        Clicks the onClickTaskMenu(page, menu_id) link of the task menu.
+        """
+        href = f'javascript:onClickTaskMenu("{page}", {menu_id})'
+        self.wait_script(_CLICK_LINK_BY_HREF, href, message=f"Menu link {href} not found.")
+        return ReportPage(self.driver, self.timeout)
+
+
+class ReportPage(PDBSPage):
+    def set_date(self, report_date, timeout=480):
+        """
+        Waits for the report page, enters report_date and runs ChgDate(),
+        then waits for the page it submits to, showing report_date.
+        """
+        value = report_date.strftime("%m/%d/%Y")
+        field = self.wait(EC.presence_of_element_located((By.NAME, "Date")), timeout,
+                          "Date field not found on the report page.")
+        self.driver.execute_script(_SET_DATE, value)
+        # Until the old page is gone its link is for the old date.
+        self.wait(EC.staleness_of(field), timeout, "The report page did not reload after ChgDate().")
+        self.wait_script(_DATE_SHOWN, value, timeout=timeout,
+                         message=f"The report page does not show {value}.")
+        return self
+
+    def click_report(self, report_name, timeout=480):
+        """
+        Clicks the report link once the page for the new date shows it.
+        """
+        for attempt in range(2):
+            link = self.wait(EC.element_to_be_clickable((By.LINK_TEXT, report_name)), timeout,
+                             f"Link '{report_name}' not found on the report page.")
+            try:
+                link.click()
+                return
+            except StaleElementReferenceException:
+                # ChgDate() reloaded the page under us, look again.
+                if attempt:
+                    raise
@@ -0,0 +1,240 @@
+"""
+Local stand-in for the PDBS site, so the fetch backends can be exercised
+without network access. Mimics the /Home login form, the OrdReport.asp menu
+page with its Date field and ChgDate() script, and an HTML-disguised
+DailyReport.xls download.
+
+    python pdbsStub.py --port 18893 --rows 5000
+"""
+import argparse
+import random
+import secrets
+import threading
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+REPORT_COLUMNS = [
+    "SO No", "Line", "Customer", "Part No", "Status",
+    "Order Date", "Ship Date", "Qty", "Amount"
+]
+STATUSES = ["Open", "Picked", "Packed", "Shipped", "Backorder", "Hold"]
+CUSTOMERS = [f"Customer {i:03d}" for i in range(1, 151)]
+
+
+def iter_report_rows(rows, report_date=None, seed=0):
+    rng = random.Random(seed)
+    report_date = report_date or datetime.today()
+    for i in range(rows):
+        order_date = report_date - timedelta(days=rng.randint(0, 60))
+        yield [
+            f"SO{1000000 + i // 4}",
+            i % 4 + 1,
+            rng.choice(CUSTOMERS),
+            f"MBD-X{rng.randint(10, 13)}-{rng.randint(100, 999)}",
+            rng.choice(STATUSES),
+            order_date.strftime("%m/%d/%Y"),
+            (order_date + timedelta(days=rng.randint(1, 30))).strftime("%m/%d/%Y"),
+            rng.randint(1, 500),
+            round(rng.uniform(10, 25000), 2)
+        ]
+
+
+def iter_report_html(rows, report_date=None, seed=0):
+    """
+    Yields the report the way PDBS serves it: an HTML table saved as .xls.
+    """
+    yield "<html>\n<head><meta charset=\"utf-8\"></head>\n<body>\n<table border=\"1\">\n"
+    yield "<tr>" + "".join(f"<th>{c}</th>" for c in REPORT_COLUMNS) + "</tr>\n"
+    for row in iter_report_rows(rows, report_date, seed):
+        yield "<tr>" + "".join(f"<td>{v}</td>" for v in row) + "</tr>\n"
+    yield "</table>\n</body>\n</html>\n"
+
+
+def write_report_html(path, rows, report_date=None, seed=0):
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in iter_report_html(rows, report_date, seed):
+            f.write(chunk)
+    return path
+
+
+LOGIN_PAGE = """<html><body>
+<form id="frmLogin" method="post" action="/Home">
+<input type="hidden" name="__token" value="{token}">
+<input type="text" id="txtUserName" name="txtUserName">
+<input type="password" id="xPWD" name="xPWD">
+<input type="submit" id="btnSubmit" name="btnSubmit" value="Login">
+</form>
+{message}
+</body></html>"""
+
+MENU_PAGE = """<html><head><script>
+function onClickTaskMenu(url, id) {{ location.href = "/" + url + "?menu=" + id; }}
+</script></head><body>
+<a href='javascript:onClickTaskMenu("OrdReport.asp", 65)'>Order Report</a>
+<a href="/Logout">Logout</a>
+</body></html>"""
+
+REPORT_PAGE = """<html><head><script>
+function ChgDate() {{ document.forms["frmReport"].submit(); }}
+</script></head><body>
+<form name="frmReport" method="get" action="/OrdReport.asp">
+<input type="text" name="Date" value="{date}">
+</form>
+{links}
+</body></html>"""
+
+
+# Report link text -> (path, download file name) on the report page.
+REPORTS = {
+    "Order Fulfillment Report": ("/OrdFulfillment.asp", "DailyReport.xls"),
+    "Open Order Report": ("/OpenOrder.asp", "OpenOrderReport.xls"),
+}
+
+
+class StubState:
+    def __init__(self, users, rows):
+        self.users = users
+        self.rows = rows
+        self.sessions = set()
+        self.lock = threading.Lock()
+        self.requests = 0
+
+
+class PDBSStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    state = None
+    report_paths = {path: (seed, file_name) for seed, (path, file_name) in enumerate(REPORTS.values())}
+
+    def log_message(self, format, *args):
+        pass
+
+    def _session(self):
+        cookie = self.headers.get("Cookie", "")
+        for part in cookie.split(";"):
+            name, _, value = part.strip().partition("=")
+            if name == "PDBSSESSION" and value in self.state.sessions:
+                return value
+        return None
+
+    def _send(self, body, status=200, content_type="text/html; charset=utf-8", headers=None):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_report(self, report_date, file_name="DailyReport.xls", seed=0):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/vnd.ms-excel")
+        self.send_header("Content-Disposition", f'attachment; filename="{file_name}"')
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        buffer = []
+        size = 0
+        for chunk in iter_report_html(self.state.rows, report_date, seed):
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= 1 << 16:
+                self._write_chunk("".join(buffer).encode("utf-8"))
+                buffer, size = [], 0
+        if buffer:
+            self._write_chunk("".join(buffer).encode("utf-8"))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+
+    def do_GET(self):
+        with self.state.lock:
+            self.state.requests += 1
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        session = self._session()
+
+        if url.path in ("/", "/Home"):
+            if session:
+                self._send(MENU_PAGE.format())
+            else:
+                self._send(LOGIN_PAGE.format(token=secrets.token_hex(8), message=""))
+            return
+
+        if not session:
+            self._send(LOGIN_PAGE.format(token=secrets.token_hex(8), message=""), status=200)
+            return
+
+        if url.path == "/OrdReport.asp":
+            date = query.get("Date", [""])[0]
+            links = ""
+            if date:
+                links = "\n".join(f'<a href="{path}?Date={date}">{text}</a>' for text, (path, _) in REPORTS.items())
+            self._send(REPORT_PAGE.format(date=date, links=links))
+        elif url.path in self.report_paths:
+            try:
+                report_date = datetime.strptime(query.get("Date", [""])[0], "%m/%d/%Y")
+            except ValueError:
+                self._send("Bad date", status=400, content_type="text/plain")
+                return
+            seed, file_name = self.report_paths[url.path]
+            self._send_report(report_date, file_name, seed)
+        elif url.path == "/Logout":
+            with self.state.lock:
+                self.state.sessions.discard(session)
+            self._send(LOGIN_PAGE.format(token=secrets.token_hex(8), message=""))
+        else:
+            self._send("Not Found", status=404, content_type="text/plain")
+
+    def do_POST(self):
+        with self.state.lock:
+            self.state.requests += 1
+        length = int(self.headers.get("Content-Length", 0))
+        fields = parse_qs(self.rfile.read(length).decode("utf-8"))
+        if urlparse(self.path).path != "/Home":
+            self._send("Not Found", status=404, content_type="text/plain")
+            return
+
+        username = fields.get("txtUserName", [""])[0]
+        password = fields.get("xPWD", [""])[0]
+        if self.state.users.get(username) != password:
+            self._send(LOGIN_PAGE.format(token=secrets.token_hex(8), message="<p>Invalid login</p>"))
+            return
+
+        session = secrets.token_hex(16)
+        with self.state.lock:
+            self.state.sessions.add(session)
+        self._send(MENU_PAGE.format(), headers={"Set-Cookie": f"PDBSSESSION={session}; Path=/; HttpOnly"})
+
+
+def start_server(host="127.0.0.1", port=0, users=None, rows=1000):
+    """
+    Starts the stub in a daemon thread. Returns (server, base_url); call
+    server.shutdown() when done.
+    """
+    state = StubState(users or {"demo": "demo"}, rows)
+    handler = type("BoundPDBSStubHandler", (PDBSStubHandler,), {"state": state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.state = state
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local PDBS stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18893)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--user", default="demo")
+    parser.add_argument("--password", default="demo")
+    args = parser.parse_args()
+
+    server, base_url = start_server(args.host, args.port, {args.user: args.password}, args.rows)
+    print(f"PDBS stub listening on {base_url} (login {args.user}/{args.password})")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
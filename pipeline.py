@@ -0,0 +1,299 @@
+"""
+Runs the daily job (backup -> fetch -> convert -> history/refresh) as a
+small DAG with checkpoints, so a failed run can be resumed.
+
+    backup  ─┐             ┌─> history
+             ├─> convert ──┤
+    fetch   ─┘             └─> refresh
+
+Each finished stage is recorded in .pipeline/<business date>.json in the
+working folder. Rerunning the same business date skips the recorded
+stages; a stage reruns if it never finished, if any stage it depends on
+reruns, or if a later stage needs its output and that output is gone
+(e.g. the downloaded .xls was deleted before conversion). Stages whose
+dependencies are done run at once on a thread pool, so the backup copy
+is made while the browser starts and the refresh starts as soon as the
+conversion is written.
+
+    python pipeline.py --folder "C:\\Reports" --mode http --backend pandas
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import date, datetime, timedelta
+
+from httpFetch import PDBS_URL
+
+
+CHECKPOINT_DIR = ".pipeline"
+KEEP_DAYS = 30
+
+
+class Stage:
+    def __init__(self, name, func, deps=(), check=None, weight=1):
+        """
+        func(inputs, report) runs the stage; inputs maps each dependency to
+        its result and report(fraction) reports progress within the stage.
+        The result must be JSON-serializable. check(result) tells whether a
+        recorded result is still usable by the stages after it.
+        """
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.check = check
+        self.weight = weight
+
+
+class Checkpoint:
+    def __init__(self, dPath, business_date):
+        self.directory = os.path.join(dPath, CHECKPOINT_DIR)
+        self.path = os.path.join(self.directory, f"{business_date.isoformat()}.json")
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.stages = json.load(f)
+        except (OSError, ValueError):
+            self.stages = {}
+
+    def done(self, name):
+        return self.stages.get(name, {}).get("status") == "done"
+
+    def result(self, name):
+        return self.stages.get(name, {}).get("result")
+
+    def record(self, name, status, result=None, error=None, seconds=None):
+        with self._lock:
+            self.stages[name] = {
+                "status": status,
+                "result": result,
+                "error": error,
+                "seconds": seconds,
+                "finished": datetime.now().isoformat(timespec="seconds"),
+            }
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(self.stages, f, indent=1)
+            os.replace(tmp_path, self.path)
+
+    def prune(self, keep_days=KEEP_DAYS):
+        cutoff = (date.today() - timedelta(days=keep_days)).isoformat()
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json") and entry.name[:-5] < cutoff:
+                os.remove(entry.path)
+
+
+def _order(stages):
+    ordered, seen = [], set()
+
+    def visit(stage, path=()):
+        if stage.name in seen:
+            return
+        if stage.name in path:
+            raise ValueError(f"Cycle in pipeline at {stage.name}")
+        for dep in stage.deps:
+            visit(stages[dep], path + (stage.name,))
+        seen.add(stage.name)
+        ordered.append(stage)
+
+    for stage in stages.values():
+        visit(stage)
+    return ordered
+
+
+def plan(stages, checkpoint, rerun=()):
+    """
+    Names of the stages that have to run this time.
+    """
+    ordered = _order(stages)
+    run = set(rerun)
+
+    def close_downstream():
+        for stage in ordered:
+            if stage.name not in run and (not checkpoint.done(stage.name) or run.intersection(stage.deps)):
+                run.add(stage.name)
+
+    close_downstream()
+    changed = True
+    while changed:
+        changed = False
+        for stage in ordered:
+            if stage.name not in run:
+                continue
+            for dep in stage.deps:
+                check = stages[dep].check
+                if dep not in run and check and not check(checkpoint.result(dep)):
+                    run.add(dep)
+                    changed = True
+        close_downstream()
+    return run
+
+
+def run_dag(stages, checkpoint, rerun=(), max_workers=4, progress_callback=None):
+    """
+    Runs the stages that plan() selects, each as soon as its dependencies
+    are done. Returns {name: result}. The first failure stops any stage
+    not yet started and is re-raised.
+    """
+    stages = {s.name: s for s in stages}
+    to_run = plan(stages, checkpoint, rerun)
+    total_weight = sum(s.weight for s in stages.values()) or 1
+    fractions = {name: (0.0 if name in to_run else 1.0) for name in stages}
+    lock = threading.Lock()
+
+    def report(name, fraction):
+        with lock:
+            fractions[name] = max(fractions[name], min(fraction, 1.0))
+            percent = sum(stages[n].weight * f for n, f in fractions.items()) / total_weight * 100
+        if progress_callback:
+            progress_callback("update", percent)
+
+    results = {name: checkpoint.result(name) for name in stages if name not in to_run}
+    for name in sorted(results):
+        print(f"Skipping {name} (done {checkpoint.stages[name]['finished']})")
+
+    def execute(stage):
+        start = time.perf_counter()
+        inputs = {dep: results[dep] for dep in stage.deps}
+        result = stage.func(inputs, lambda fraction: report(stage.name, fraction))
+        return result, round(time.perf_counter() - start, 3)
+
+    pending = {name for name in stages if name in to_run}
+    running = {}
+    failure = None
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        while pending or running:
+            if failure is None:
+                for name in sorted(pending):
+                    if all(dep in results for dep in stages[name].deps):
+                        pending.discard(name)
+                        print(f"Starting {name}...")
+                        running[pool.submit(execute, stages[name])] = name
+            if not running:
+                break
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                try:
+                    result, seconds = future.result()
+                except Exception as e:
+                    logging.error(f"Pipeline stage {name} failed", exc_info=True)
+                    checkpoint.record(name, "failed", error=f"{type(e).__name__}: {e}")
+                    failure = failure or e
+                    continue
+                results[name] = result
+                checkpoint.record(name, "done", result, seconds=seconds)
+                report(name, 1.0)
+                print(f"Finished {name} in {seconds:.1f} s")
+                if progress_callback:
+                    progress_callback("stage", {"step": name, "wall_seconds": seconds})
+    if failure is not None:
+        raise failure
+    return results
+
+
+def daily_stages(username, password, dPath, business_date, mode="selenium", base_url=PDBS_URL,
+                 convert="stream", backend="excel", reuse_session=False):
+    """
+    The DailyOS + update_report job for business_date as pipeline stages.
+    """
+    import backupStore
+    import dataDownload
+    import historyStore
+    import reportCache
+    import updateReport
+
+    report_path = os.path.join(dPath, "DailyReport.xlsx")
+    cache = reportCache.ReportCache(dPath)
+
+    def backup(inputs, report):
+        # As in DailyOS: a second run for the same business date finds its
+        # own report in DailyReport.xlsx, which is not the day before's.
+        cached = cache.get(business_date)
+        if cached and os.path.exists(report_path) and backupStore.sha256_file(report_path) == cached["sha256"]:
+            print(f"DailyReport.xlsx is already the report for {business_date:%m-%d-%Y}; not backing it up.")
+            return {"sha256": None}
+        backup_date = dataDownload.subtract_one_business_day(business_date)
+        return {"sha256": dataDownload.backup_previous_report(dPath, backup_date)}
+
+    def fetch(inputs, report):
+        # fetch_report counts DailyOS steps 2-7.
+        return {"path": dataDownload.fetch_report(
+            username, password, dPath, business_date, lambda step, name=None: report((step - 1) / 6),
+            mode, base_url, reuse_session
+        )}
+
+    def convert_step(inputs, report):
+        dataDownload.convert_download(inputs["fetch"]["path"], report_path, convert)
+        cache.put(report_path, business_date)
+        return {"path": report_path, "size": os.path.getsize(report_path)}
+
+    def history(inputs, report):
+        return {"rows": historyStore.ingest_report(dPath, report_path, business_date)}
+
+    def refresh(inputs, report):
+        def on_progress(action, value=0):
+            if action == "update":
+                report(value / 100)
+        updateReport.update_report(dPath, False, on_progress, backend)
+        return {"backend": backend}
+
+    return [
+        Stage("backup", backup, weight=5),
+        Stage("fetch", fetch, check=lambda r: bool(r) and os.path.exists(r["path"]), weight=60),
+        Stage("convert", convert_step, deps=("backup", "fetch"),
+              check=lambda r: bool(r) and os.path.exists(r["path"]), weight=15),
+        # Both only read DailyReport.xlsx, so they run side by side.
+        Stage("history", history, deps=("convert",), weight=5),
+        Stage("refresh", refresh, deps=("convert",), weight=20),
+    ]
+
+
+def run_daily(username, password, dPath, business_date=None, progress_callback=None, rerun=(), **options):
+    """
+    Runs (or resumes) the daily job for business_date, which defaults to
+    the previous business day like DailyOS. Returns {stage: result}.
+    """
+    import dataDownload
+
+    business_date = business_date or dataDownload.subtract_one_business_day(datetime.today())
+    if isinstance(business_date, datetime):
+        business_date = business_date.date()
+    checkpoint = Checkpoint(dPath, business_date)
+    checkpoint.prune()
+    stages = daily_stages(username, password, dPath, business_date, **options)
+    if progress_callback:
+        progress_callback("start")
+    try:
+        return run_dag(stages, checkpoint, rerun, progress_callback=progress_callback)
+    finally:
+        if progress_callback:
+            progress_callback("stop", 100)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run or resume the daily fulfillment report job")
+    parser.add_argument("--folder", default=".")
+    parser.add_argument("--date", help="MM/DD/YYYY business date (default: previous business day)")
+    parser.add_argument("--mode", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--base-url", default=PDBS_URL)
+    parser.add_argument("--backend", choices=["excel", "pandas", "incremental"], default="excel")
+    parser.add_argument("--rerun", nargs="+", default=[], choices=["backup", "fetch", "convert", "history", "refresh"],
+                        help="run these stages (and everything after them) again")
+    args = parser.parse_args()
+
+    run_daily(
+        os.environ.get("PDBS_USERNAME", ""),
+        os.environ.get("PDBS_PASSWORD", ""),
+        os.path.normpath(args.folder),
+        datetime.strptime(args.date, "%m/%d/%Y") if args.date else None,
+        rerun=args.rerun,
+        mode=args.mode,
+        base_url=args.base_url,
+        backend=args.backend
+    )
@@ -0,0 +1,274 @@
+"""
+Excel-free refresh of the fulfillment workbook.
+
+Reads DailyReport.xlsx, computes the workbook's pivot tables with pandas
+groupby and writes each result into a sheet of
+DAILY ORDER FULFILLMENT (F.U.D) (calc).xlsx next to the workbook, so the
+report can be updated on a machine without Excel.
+
+Pivot definitions come from pivot_specs.json next to the workbook when it
+exists, otherwise they are read from the pivot tables stored in the
+workbook itself. A spec looks like:
+
+    {
+        "source_sheet": "DailyReport",
+        "pivots": [
+            {"name": "Open by Customer", "sheet": "Open by Customer",
+             "index": ["Customer"], "columns": ["Status"],
+             "values": {"Qty": "sum", "Amount": "sum"}}
+        ]
+    }
+
+source_sheet (optional) receives the raw report data, the way the
+workbook's data connection would. The workbook itself is never saved:
+openpyxl keeps the sheets and pivot definitions, but not Excel-only parts
+such as query connections, so write_sheets refuses a workbook that has
+them.
+"""
+import json
+import os
+import zipfile
+
+import pandas as pd
+
+import reportSchema
+
+
+WORKBOOK_NAME = "DAILY ORDER FULFILLMENT (F.U.D).xlsx"
+OUTPUT_NAME = "DAILY ORDER FULFILLMENT (F.U.D) (calc).xlsx"
+SPECS_NAME = "pivot_specs.json"
+GRAND_TOTAL = "Grand Total"
+
+# Excel pivot subtotal names -> pandas aggregation names.
+_EXCEL_AGG = {
+    "sum": "sum",
+    "count": "count",
+    "average": "mean",
+    "max": "max",
+    "min": "min",
+    "countNums": "count",
+    "stdDev": "std",
+    "var": "var",
+}
+
+
+def normalize_spec(spec):
+    """
+    A pivot spec with every optional key filled in (see the module docstring).
+    """
+    values = spec.get("values", {})
+    if isinstance(values, (list, tuple)):
+        values = {v: spec.get("aggfunc", "sum") for v in values}
+    if not spec.get("index"):
+        raise ValueError(f"Pivot '{spec.get('name')}' needs at least one index field.")
+    return {
+        "name": spec["name"],
+        "sheet": (spec.get("sheet") or spec["name"])[:31],
+        "index": list(spec["index"]),
+        "columns": list(spec.get("columns", [])),
+        "values": dict(values),
+        "totals": spec.get("totals", True),
+    }
+
+
+def specs_from_workbook(workbook_path):
+    """
+    Builds pivot specs from the pivot tables saved in the workbook.
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(workbook_path)
+    specs = []
+    for ws in wb.worksheets:
+        for pt in ws._pivots:
+            fields = [f.name for f in pt.cache.cacheFields]
+            values = {}
+            for data_field in pt.dataFields:
+                values[fields[data_field.fld]] = _EXCEL_AGG.get(data_field.subtotal or "sum", "sum")
+            specs.append(normalize_spec({
+                "name": pt.name,
+                "sheet": f"{pt.name} (calc)",
+                # x == -2 is the "Values" pseudo-field, not a data column.
+                "index": [fields[f.x] for f in pt.rowFields if f.x >= 0],
+                "columns": [fields[f.x] for f in pt.colFields if f.x >= 0],
+                "values": values,
+            }))
+    return specs
+
+
+def load_specs(report_path):
+    """
+    Returns (specs, source_sheet) for the workbook in report_path.
+    """
+    specs_path = os.path.join(report_path, SPECS_NAME)
+    if os.path.exists(specs_path):
+        with open(specs_path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        return [normalize_spec(s) for s in config.get("pivots", [])], config.get("source_sheet")
+    return specs_from_workbook(os.path.join(report_path, WORKBOOK_NAME)), None
+
+
+# Aggregations whose per-group results can be rolled up into totals
+# without going back to the rows, and the function that rolls them up.
+ROLLUP = {"sum": "sum", "count": "sum", "max": "max", "min": "min"}
+
+
+def aggregate(df, spec):
+    """
+    Long-form aggregate of one pivot: one row per (index + columns) group.
+    """
+    keys = spec["index"] + spec["columns"]
+    return df.groupby(keys, dropna=False, sort=True, observed=True)[list(spec["values"])].agg(spec["values"])
+
+
+def build_pivot(long, spec, df=None):
+    """
+    Turns aggregate() output into the pivot layout with Excel-style grand
+    totals. Totals are rolled up from long when every aggregation allows it,
+    otherwise they are computed from df.
+    """
+    index, columns, values = spec["index"], spec["columns"], spec["values"]
+    value_cols = list(values)
+
+    table = long.unstack(columns) if columns else long.copy()
+
+    if spec.get("totals", True):
+        if all(agg in ROLLUP for agg in values.values()):
+            rollup = {value: ROLLUP[agg] for value, agg in values.items()}
+            grand = long.agg(rollup)
+            row_totals = long.groupby(level=index, dropna=False, sort=True).agg(rollup) if columns else None
+            col_totals = long.groupby(level=columns, dropna=False, sort=True).agg(rollup) if columns else None
+        else:
+            grand = df[value_cols].agg(values)
+            row_totals = df.groupby(index, dropna=False, sort=True, observed=True)[value_cols].agg(values) if columns else None
+            col_totals = df.groupby(columns, dropna=False, sort=True, observed=True)[value_cols].agg(values) if columns else None
+
+        if columns:
+            total_key = (GRAND_TOTAL,) * len(columns)
+            ordered = []
+            for value in value_cols:
+                table[(value,) + total_key] = row_totals[value]
+                ordered += [key for key in table.columns if key[0] == value and key[1:] != total_key]
+                ordered.append((value,) + total_key)
+            table = table[ordered]
+
+            grand_row = {}
+            for key in table.columns:
+                value, column_key = key[0], key[1:]
+                if column_key == total_key:
+                    grand_row[key] = grand[value]
+                else:
+                    grand_row[key] = col_totals.loc[column_key if len(columns) > 1 else column_key[0], value]
+            grand_row = pd.Series(grand_row)
+        else:
+            grand_row = grand
+        row_key = (GRAND_TOTAL,) + ("",) * (len(index) - 1) if len(index) > 1 else GRAND_TOTAL
+        table.loc[row_key, :] = grand_row
+
+    return table
+
+
+def compute_pivot(df, spec):
+    """
+    One pivot table as a DataFrame: index fields as rows, values per
+    (value, column key) as columns, with Excel-style grand totals.
+    """
+    return build_pivot(aggregate(df, spec), spec, df)
+
+
+def flatten(table):
+    """
+    Pivot result as a plain frame ready for to_excel(index=False).
+    """
+    flat = table.copy()
+    if isinstance(flat.columns, pd.MultiIndex):
+        flat.columns = [" | ".join(str(part) for part in col if part != "") for col in flat.columns]
+    return flat.reset_index()
+
+
+def has_connections(workbook_path):
+    """
+    True if the .xlsx at workbook_path has data connections (query
+    connections included), which openpyxl would drop on save.
+    """
+    with zipfile.ZipFile(workbook_path) as archive:
+        return "xl/connections.xml" in archive.namelist()
+
+
+def write_sheets(workbook_path, frames):
+    """
+    Replaces (or creates) each sheet in frames {sheet_name: DataFrame},
+    leaving every other sheet of the workbook as it was. The workbook is
+    created if it does not exist; one with data connections is refused.
+    """
+    if not os.path.exists(workbook_path):
+        options = {"mode": "w"}
+    elif has_connections(workbook_path):
+        raise ValueError(f"{workbook_path} has data connections, which saving it without Excel would drop.")
+    else:
+        options = {"mode": "a", "if_sheet_exists": "replace"}
+    with pd.ExcelWriter(workbook_path, engine="openpyxl", **options) as writer:
+        for sheet_name, frame in frames.items():
+            frame.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+def update_report_pandas(report_path, progress_callback=None, incremental=False, recorder=None):
+    """
+    Backend of update_report(backend="pandas"): same progress protocol,
+    no Excel involved. incremental=True takes the rows from the history
+    store and only re-aggregates the groups whose rows changed since the
+    last refresh (see incrementalPivot). recorder (instrumentation.RunRecorder)
+    is marked at the end of each step.
+
+    The results go to a fresh OUTPUT_NAME workbook; the master workbook
+    is only read.
+    """
+    data_path = os.path.join(report_path, "DailyReport.xlsx")
+    output_path = os.path.join(report_path, OUTPUT_NAME)
+    specs, source_sheet = load_specs(report_path)
+
+    # --- Step 1: Load report data (~30%) ---
+    df = None
+    if incremental and not source_sheet:
+        import incrementalPivot
+        df = incrementalPivot.load_report(report_path, specs)
+    if df is None:
+        print("Loading DailyReport.xlsx...")
+        df = reportSchema.apply_schema(pd.read_excel(data_path))
+    if recorder:
+        recorder.mark("Load report data")
+    if progress_callback:
+        progress_callback("update", 30)
+
+    # --- Step 2: Compute pivot tables (~40%) ---
+    frames = {}
+    if source_sheet:
+        frames[source_sheet] = df
+    if incremental:
+        import incrementalPivot
+        frames.update(incrementalPivot.compute_pivots(df, specs, report_path))
+        specs = []
+        if progress_callback:
+            progress_callback("update", 70)
+    for i, spec in enumerate(specs):
+        try:
+            frames[spec["sheet"]] = flatten(compute_pivot(df, spec))
+            print(f"Computed pivot table: {spec['name']}")
+        except Exception as e:
+            print(f"Error computing pivot table {spec['name']}: {e}")
+        if progress_callback and specs:
+            progress_callback("update", 30 + (i + 1) / len(specs) * 40)
+    if recorder:
+        recorder.mark("Compute pivot tables")
+
+    # --- Step 3: Save workbook (~20%) ---
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    write_sheets(output_path, frames)
+    print(f"Pivot tables saved to {OUTPUT_NAME}.")
+    if recorder:
+        recorder.mark("Save workbook")
+    if progress_callback:
+        progress_callback("update", 90)
+
+    return frames
@@ -0,0 +1,129 @@
+"""
+Local cache of converted reports keyed by business date and report type.
+
+DailyOS puts every converted DailyReport.xlsx here (cache/<type>/<date>.xlsx
+plus cache/index.json with fetch time and sha256). A later run for the
+same business date takes the report from the cache instead of starting
+Chrome, as long as the entry is fresh:
+
+    - a report fetched at least immutable_after_hours after the end of its
+      business date is final and never expires;
+    - a report fetched earlier (the day may still have been changing) is
+      fresh for max_age_minutes.
+
+Hits and misses are counted in the index (stats()).
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from backupStore import date_key, sha256_file
+
+
+CACHE_DIR = "cache"
+INDEX_NAME = "index.json"
+INDEX_VERSION = 1
+REPORT_TYPE = "order_fulfillment"
+
+
+class ReportCache:
+    def __init__(self, dPath, immutable_after_hours=6, max_age_minutes=60, keep_days=30):
+        self.cache_path = os.path.join(dPath, CACHE_DIR)
+        self.index_path = os.path.join(self.cache_path, INDEX_NAME)
+        self.immutable_after = timedelta(hours=immutable_after_hours)
+        self.max_age = timedelta(minutes=max_age_minutes)
+        self.keep_days = keep_days
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") == INDEX_VERSION:
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"version": INDEX_VERSION, "entries": {}, "stats": {"hits": 0, "misses": 0, "stale": 0}}
+
+    def _save_index(self):
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_path, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+
+    def _key(self, business_date, report_type):
+        return f"{report_type}/{date_key(business_date)}"
+
+    def _path(self, key):
+        return os.path.join(self.cache_path, *key.split("/")) + ".xlsx"
+
+    def is_fresh(self, entry, business_date, now=None):
+        now = now or datetime.now()
+        fetched = datetime.fromtimestamp(entry["fetched_at"])
+        day_end = datetime.combine(date.fromisoformat(date_key(business_date)), datetime.min.time()) + timedelta(days=1)
+        if fetched >= day_end + self.immutable_after:
+            return True
+        return now - fetched < self.max_age
+
+    def get(self, business_date, report_type=REPORT_TYPE):
+        """
+        The cache entry (with "path") for business_date if it is present and
+        fresh, else None. Counts a hit, miss or stale miss.
+        """
+        key = self._key(business_date, report_type)
+        with self._lock:
+            entry = self.index["entries"].get(key)
+            path = self._path(key)
+            if entry is None or not os.path.exists(path):
+                outcome, result = "misses", None
+            elif not self.is_fresh(entry, business_date):
+                outcome, result = "stale", None
+            else:
+                outcome, result = "hits", dict(entry, path=path)
+            self.index["stats"][outcome] += 1
+            self._save_index()
+        return result
+
+    def put(self, source_path, business_date, report_type=REPORT_TYPE):
+        """
+        Copies source_path into the cache as the report of business_date.
+        Returns its sha256.
+        """
+        key = self._key(business_date, report_type)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        digest = sha256_file(source_path)
+        tmp_path = path + ".tmp"
+        shutil.copyfile(source_path, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.index["entries"][key] = {
+                "sha256": digest,
+                "size": os.path.getsize(path),
+                "fetched_at": time.time(),
+            }
+            self._prune()
+            self._save_index()
+        return digest
+
+    def _prune(self):
+        cutoff = (date.today() - timedelta(days=self.keep_days)).isoformat()
+        for key in [k for k in self.index["entries"] if k.split("/")[-1] < cutoff]:
+            del self.index["entries"][key]
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def stats(self):
+        s = dict(self.index["stats"])
+        lookups = s["hits"] + s["misses"] + s["stale"]
+        s["hit_rate"] = round(s["hits"] / lookups, 3) if lookups else None
+        s["entries"] = len(self.index["entries"])
+        return s
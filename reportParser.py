@@ -0,0 +1,544 @@
+"""
+Streaming parser for the HTML-disguised DailyReport.xls that PDBS serves.
+
+Rows are pulled one <tr> at a time with lxml's iterparse (or html.parser fed
+in fixed-size chunks when lxml is missing) and discarded from the tree as
+soon as they are read, so only the current batch of rows is held as Python
+strings; each batch is converted to typed columns before the next one is
+read. The result matches pd.read_html(path)[0] for the single report
+table: header from a leading all-<th> row (blank names "Unnamed: <n>",
+repeated names suffixed ".1", ".2"), numbers with "," thousands separators
+parsed, pandas' default NA strings ("", "N/A", "null", ...) as NaN and
+columns of True/False as bool.
+
+Large reports can instead be cut at <tr> boundaries and parsed on every
+core (read_report_parallel); the typed chunks are joined with the same
+rules as the batches, so the result is identical.
+
+    python reportParser.py --rows 10000 100000 500000
+"""
+import argparse
+import codecs
+import io
+import mmap
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from html.parser import HTMLParser
+
+import numpy as np
+import pandas as pd
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+
+CHUNK_SIZE = 1 << 20
+BATCH_ROWS = 50000
+PARALLEL_MIN_BYTES = 4 << 20
+
+# pandas' default na_values and true/false strings, as read_html uses them.
+NA_VALUES = frozenset([
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A",
+    "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+])
+TRUE_VALUES = ["True", "TRUE", "true"]
+FALSE_VALUES = ["False", "FALSE", "false"]
+
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER = re.compile(r"^[+-]?(\d{1,3}(,\d{3})+|\d+)?(\.\d*)?([eE][+-]?\d+)?$")
+
+
+class _TableRowParser(HTMLParser):
+    """
+    Collects the rows of the first top-level <table>. Finished rows are
+    appended to self.rows as (cells, all_th) and drained by the caller.
+    """
+    def __init__(self):
+        super().__init__()
+        self.rows = []
+        self.done = False
+        self._depth = 0
+        self._row = None
+        self._cell = None
+        self._all_th = True
+        self._colspan = 1
+
+    def handle_starttag(self, tag, attrs):
+        if self.done:
+            return
+        if tag == "table":
+            self._depth += 1
+        elif self._depth != 1:
+            return
+        elif tag == "tr":
+            self._finish_row()
+            self._row = []
+            self._all_th = True
+        elif tag in ("td", "th"):
+            if self._row is None:
+                self._row = []
+                self._all_th = True
+            self._finish_cell()
+            self._cell = []
+            self._all_th = self._all_th and tag == "th"
+            try:
+                self._colspan = max(int(dict(attrs).get("colspan") or 1), 1)
+            except ValueError:
+                self._colspan = 1
+        elif tag == "br" and self._cell is not None:
+            self._cell.append(" ")
+
+    def handle_endtag(self, tag):
+        if self.done:
+            return
+        if tag == "table":
+            if self._depth == 1:
+                self._finish_row()
+                self.done = True
+            self._depth -= 1
+        elif self._depth != 1:
+            return
+        elif tag == "tr":
+            self._finish_row()
+        elif tag in ("td", "th"):
+            self._finish_cell()
+
+    def handle_data(self, data):
+        if self._cell is not None and self._depth == 1:
+            self._cell.append(data)
+
+    def _finish_cell(self):
+        if self._cell is None:
+            return
+        text = _WHITESPACE.sub(" ", "".join(self._cell)).strip()
+        self._row.extend([text] * self._colspan)
+        self._cell = None
+        self._colspan = 1
+
+    def _finish_row(self):
+        self._finish_cell()
+        if self._row:
+            self.rows.append((self._row, self._all_th))
+        self._row = None
+
+
+def _iter_rows_lxml(path, encoding=None):
+    depth = 0
+    context = etree.iterparse(path, events=("start", "end"), tag=("table", "tr"), html=True, encoding=encoding)
+    for event, elem in context:
+        if elem.tag == "table":
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth == 0:
+                break
+            continue
+        if event != "end" or depth != 1:
+            continue
+
+        cells = []
+        all_th = True
+        for cell in elem:
+            if cell.tag not in ("td", "th"):
+                continue
+            all_th = all_th and cell.tag == "th"
+            text = _WHITESPACE.sub(" ", "".join(cell.itertext())).strip()
+            try:
+                colspan = max(int(cell.get("colspan") or 1), 1)
+            except ValueError:
+                colspan = 1
+            cells.extend([text] * colspan)
+        if cells:
+            yield cells, all_th
+
+        # Drop finished rows so the tree never holds more than one of them.
+        elem.clear()
+        parent = elem.getparent()
+        while parent is not None and elem.getprevious() is not None:
+            del parent[0]
+
+
+def _iter_rows_stdlib(path, chunk_size=CHUNK_SIZE, encoding=None):
+    parser = _TableRowParser()
+    decoder = codecs.getincrementaldecoder(encoding or "utf-8")(errors="replace")
+    with open(path, "rb") as f:
+        while not parser.done:
+            chunk = f.read(chunk_size)
+            final = not chunk
+            parser.feed(decoder.decode(chunk, final=final))
+            rows, parser.rows = parser.rows, []
+            yield from rows
+            if final:
+                break
+    parser.close()
+    rows, parser.rows = parser.rows, []
+    yield from rows
+
+
+def iter_raw_rows(path, chunk_size=CHUNK_SIZE, encoding=None):
+    """
+    Yields (cells, is_header_row) for every row of the report table, using
+    lxml's iterparse when it is installed and html.parser otherwise.
+    encoding is a Python codec name (see formatSniff); None leaves it to
+    the parser.
+    """
+    if encoding and codecs.lookup(encoding).name.startswith(("utf-16", "utf-32")):
+        # libxml2 wants the byte order spelled out; Python's codecs read the BOM.
+        return _iter_rows_stdlib(path, chunk_size, encoding)
+    if etree is not None:
+        if encoding and codecs.lookup(encoding).name == "utf-8-sig":
+            encoding = "utf-8"
+        return _iter_rows_lxml(path, encoding)
+    return _iter_rows_stdlib(path, chunk_size, encoding)
+
+
+def parse_number(text):
+    """
+    Returns text as an int or float when read_html would read it as a number,
+    otherwise None.
+    """
+    if text in ("", ".", "+", "-", "+.", "-.") or not _NUMBER.match(text):
+        return None
+    text = text.replace(",", "")
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def cell_kind(text):
+    """
+    "na", "number", "bool" or "text": what read_html makes of one cell.
+    """
+    if text in NA_VALUES:
+        return "na"
+    if parse_number(text) is not None:
+        return "number"
+    if text in TRUE_VALUES or text in FALSE_VALUES:
+        return "bool"
+    return "text"
+
+
+def column_kind(kinds):
+    """
+    Type of a column from the kinds of its cells (or of its batches):
+    "text", "number", "bool" or "empty" (every cell NA).
+    """
+    kinds = set(kinds)
+    if "text" in kinds or {"number", "bool"} <= kinds:
+        return "text"
+    for kind in ("number", "bool"):
+        if kind in kinds:
+            return kind
+    return "empty"
+
+
+def header_columns(cells):
+    """
+    Column names the way read_html makes them from a header row: blank
+    cells become "Unnamed: <n>" and repeated names get ".1", ".2", ...
+    """
+    columns = [cell if cell != "" else f"Unnamed: {i}" for i, cell in enumerate(cells)]
+    unnamed = [i for i, cell in enumerate(cells) if cell == ""]
+    counts = {}
+    # Given names keep their name before blank ones are numbered.
+    for i in [i for i in range(len(columns)) if i not in unnamed] + unnamed:
+        col = original = columns[i]
+        count = counts.get(col, 0)
+        while count > 0:
+            counts[original] = count + 1
+            col = f"{original}.{count}"
+            count = count + 1 if col in columns else counts.get(col, 0)
+        columns[i] = col
+        counts[col] = count + 1
+    return columns
+
+
+def _type_column(values):
+    """
+    Converts one column of cell strings the way read_html would: pandas'
+    default NA strings become NaN, then the column is numeric when every
+    other cell is a number, bool when every other cell is True/False, and
+    text otherwise.
+
+    Returns (series, kind, raw). raw is the original text when the typed
+    form would not print back to it (e.g. "007", "1,234", "true"), so the
+    column can still be restored if a later batch turns out to be text;
+    otherwise None.
+    """
+    series = pd.Series(values)
+    series = series.where(~series.isin(NA_VALUES))
+    present = series.dropna()
+    if present.empty:
+        return pd.Series(np.nan, index=series.index, dtype="float64"), "empty", None
+    if present.str.fullmatch(_NUMBER).all() and not present.isin([".", "+", "-", "+.", "-."]).any():
+        numbers = pd.to_numeric(series.str.replace(",", "", regex=False))
+        if _as_text(numbers).dropna().tolist() != present.tolist():
+            return numbers, "number", series
+        return numbers, "number", None
+    if present.isin(TRUE_VALUES + FALSE_VALUES).all():
+        flags = series.map(lambda v: v in TRUE_VALUES if isinstance(v, str) else np.nan)
+        return flags.astype(object if len(present) < len(series) else bool), "bool", series
+    return series, "text", None
+
+
+def _batch_frame(rows, columns):
+    width = len(columns)
+    padded = [row + [""] * (width - len(row)) if len(row) < width else row[:width] for row in rows]
+    data = {}
+    kinds = {}
+    raw_text = {}
+    for i, col in enumerate(zip(*padded)):
+        data[i], kinds[i], raw = _type_column(col)
+        if raw is not None:
+            raw_text[i] = raw
+    frame = pd.DataFrame(data, columns=range(width))
+    frame.columns = columns
+    frame.attrs["kinds"] = kinds
+    frame.attrs["raw_text"] = raw_text
+    return frame
+
+
+def iter_report_batches(path, batch_rows=BATCH_ROWS, chunk_size=CHUNK_SIZE, encoding=None):
+    """
+    Yields typed DataFrame batches of at most batch_rows rows each, all sharing
+    the header columns of the report.
+    """
+    columns = None
+    pending = []
+    for cells, is_header in iter_raw_rows(path, chunk_size, encoding):
+        if columns is None:
+            if is_header:
+                columns = header_columns(cells)
+                continue
+            columns = list(range(len(cells)))
+        pending.append(cells)
+        if len(pending) >= batch_rows:
+            yield _batch_frame(pending, columns)
+            pending = []
+    if pending or columns is None:
+        yield _batch_frame(pending, columns or [])
+
+
+def _as_text(series):
+    if not pd.api.types.is_numeric_dtype(series.dtype):
+        return series
+    return series.map(lambda v: None if pd.isna(v) else (str(int(v)) if float(v).is_integer() else str(v)))
+
+
+def read_report_html(path, batch_rows=BATCH_ROWS, chunk_size=CHUNK_SIZE, optimize=False, encoding=None, workers=1):
+    """
+    Drop-in replacement for pd.read_html(path)[0] on the daily report.
+    optimize=True returns the compact column types of reportSchema instead.
+    workers other than 1 parses on that many processes (None: one per
+    core, see read_report_parallel).
+    """
+    if workers == 1:
+        df = _read_batches(path, batch_rows, chunk_size, encoding)
+    else:
+        df = read_report_parallel(path, workers, encoding)
+    if optimize:
+        import reportSchema
+        df = reportSchema.apply_schema(df)
+    return df
+
+
+def _read_batches(path, batch_rows, chunk_size, encoding=None):
+    return _combine_batches(list(iter_report_batches(path, batch_rows, chunk_size, encoding)))
+
+
+def _combine_batches(batches):
+    if len(batches) == 1:
+        batches[0].attrs.clear()
+        return batches[0]
+
+    # Each column gets the type read_html would give the full column; a
+    # column that is text in any batch is text for the whole report.
+    for i in range(len(batches[0].columns)):
+        kinds = [batch.attrs["kinds"].get(i, "empty") for batch in batches]
+        if column_kind(kinds) != "text":
+            continue
+        text_dtypes = [batch.iloc[:, i].dtype for batch, kind in zip(batches, kinds) if kind == "text"]
+        text_dtype = text_dtypes[0] if text_dtypes else pd.Series([""]).dtype
+        for batch, kind in zip(batches, kinds):
+            if kind == "text":
+                continue
+            raw = batch.attrs["raw_text"].get(i)
+            batch.isetitem(i, (raw if raw is not None else _as_text(batch.iloc[:, i])).astype(text_dtype))
+    for batch in batches:
+        batch.attrs.clear()
+    return pd.concat(batches, ignore_index=True)
+
+
+def _find_row(mm, start, end=None):
+    """
+    Offset of the next <tr> tag at or after start, or -1.
+    """
+    end = len(mm) if end is None else end
+    while True:
+        hits = [i for i in (mm.find(b"<tr", start, end), mm.find(b"<TR", start, end)) if i != -1]
+        if not hits:
+            return -1
+        i = min(hits)
+        if mm[i + 3:i + 4] in (b">", b" ", b"\t", b"\r", b"\n"):
+            return i
+        start = i + 3
+
+
+def _count_tables(mm, limit=2):
+    count = 0
+    for tag in (b"<table", b"<TABLE"):
+        pos = mm.find(tag)
+        while pos != -1 and count < limit:
+            count += 1
+            pos = mm.find(tag, pos + len(tag))
+    return count
+
+
+def _parse_range(data, encoding):
+    # The chunk is a run of whole <tr> rows; give it a table to live in.
+    source = io.BytesIO(b"<html><body><table>" + data + b"</table></body></html>")
+    return list(_iter_rows_lxml(source, encoding))
+
+
+def plan_chunks(path, n_chunks, encoding="utf-8"):
+    """
+    Splits the report table at <tr> boundaries into at most n_chunks byte
+    ranges. Returns (columns, [(start, end), ...]), or None when the file
+    cannot be split safely (not a single flat table, or not an ASCII
+    compatible encoding).
+    """
+    if etree is None or codecs.lookup(encoding).name.startswith(("utf-16", "utf-32")):
+        return None
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if _count_tables(mm) != 1:
+            return None
+        first = _find_row(mm, 0)
+        if first == -1:
+            return None
+        second = _find_row(mm, first + 3)
+        header = _parse_range(mm[first:second if second != -1 else len(mm)], encoding)
+        if header and header[0][1]:
+            columns, data_start = header_columns(header[0][0]), second
+        else:
+            columns, data_start = list(range(len(header[0][0]) if header else 0)), first
+        if data_start == -1:
+            return columns, []
+
+        size = len(mm) - data_start
+        bounds = [data_start]
+        for k in range(1, n_chunks):
+            cut = _find_row(mm, max(data_start + size * k // n_chunks, bounds[-1] + 3))
+            if cut == -1:
+                break
+            if cut > bounds[-1]:
+                bounds.append(cut)
+        bounds.append(len(mm))
+    return columns, list(zip(bounds[:-1], bounds[1:]))
+
+
+def _parse_chunk(path, start, end, columns, encoding):
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        data = mm[start:end]
+    rows = [cells for cells, _ in _parse_range(data, encoding)]
+    return _batch_frame(rows, columns)
+
+
+def read_report_parallel(path, workers=None, encoding=None, chunks_per_worker=2):
+    """
+    read_report_html on several cores: the file is memory-mapped, cut into
+    chunks of whole rows, each chunk parsed and typed in a worker process
+    with the header read once up front, and the typed chunks concatenated
+    in order. Small files and files that cannot be split are parsed in
+    this process.
+    """
+    import formatSniff
+
+    workers = workers or os.cpu_count() or 1
+    encoding = encoding or formatSniff.sniff(path).encoding or "utf-8"
+    if codecs.lookup(encoding).name == "utf-8-sig":
+        encoding = "utf-8"
+    plan = None
+    if workers > 1 and os.path.getsize(path) >= PARALLEL_MIN_BYTES:
+        plan = plan_chunks(path, workers * chunks_per_worker, encoding)
+    if plan is None:
+        return _read_batches(path, BATCH_ROWS, CHUNK_SIZE, encoding)
+
+    columns, ranges = plan
+    if not ranges:
+        return _combine_batches([_batch_frame([], columns)])
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        batches = list(pool.map(_parse_chunk, *zip(*[(path, start, end, columns, encoding)
+                                                     for start, end in ranges])))
+    return _combine_batches(batches)
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process so far, in MB.
+    """
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+
+
+def _measure(method, path, queue):
+    start = time.perf_counter()
+    if method == "read_html":
+        df = pd.read_html(path)[0]
+    elif method == "parallel":
+        df = read_report_html(path, workers=None)
+    else:
+        df = read_report_html(path)
+    queue.put({
+        "method": method,
+        "rows": len(df),
+        "seconds": round(time.perf_counter() - start, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    })
+
+
+def compare_with_read_html(path):
+    """
+    Parses path with pd.read_html, read_report_html and its parallel mode,
+    each in a fresh process so the peak RSS of one does not hide the
+    other's (the parallel peak is the parent's only).
+    """
+    import multiprocessing
+
+    results = []
+    ctx = multiprocessing.get_context("spawn")
+    for method in ("read_html", "streaming", "parallel"):
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_measure, args=(method, path, queue))
+        proc.start()
+        results.append(queue.get())
+        proc.join()
+    return results
+
+
+if __name__ == "__main__":
+    import pdbsStub
+
+    arg_parser = argparse.ArgumentParser(description="Compare the streaming and parallel report parsers with pd.read_html")
+    arg_parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    args = arg_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            path = pdbsStub.write_report_html(os.path.join(tmp, f"DailyReport_{rows}.xls"), rows)
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            for result in compare_with_read_html(path):
+                print(f"{rows:>9} rows  {size_mb:7.1f} MB  {result['method']:<10} "
+                      f"{result['seconds']:8.2f} s  peak {result['peak_rss_mb']:8.1f} MB")
@@ -0,0 +1,135 @@
+"""
+Compact column types for the Order Fulfillment Report.
+
+read_html / read_excel leave most report columns as Python strings.
+apply_schema converts them once on load:
+
+    category  - low-cardinality text (customer, status, part number)
+    string    - Arrow-backed text for the rest (order numbers)
+    datetime  - order and ship dates
+    integer   - smallest integer type that holds the column
+    float     - float64 (amounts are summed, float32 would round the totals)
+
+REPORT_SCHEMA fixes the kind of the known report columns; columns not in
+it are inferred. A conversion that would lose values (a date column with
+unparseable text, an integer column with blanks) is skipped and the
+column is left as it was.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:
+    TEXT_DTYPE = pd.StringDtype()
+
+
+REPORT_SCHEMA = {
+    "SO No": "string",
+    "Line": "integer",
+    "Customer": "category",
+    "Part No": "category",
+    "Status": "category",
+    "Order Date": "datetime",
+    "Ship Date": "datetime",
+    "Qty": "integer",
+    "Amount": "float",
+}
+# Text columns with at most this share of distinct values become categories.
+CATEGORY_RATIO = 0.5
+DATE_FORMATS = ("%m/%d/%Y", "%Y-%m-%d", "%m/%d/%Y %H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / (1024 * 1024)
+
+
+def _is_text(column):
+    return column.dtype == object or pd.api.types.is_string_dtype(column.dtype)
+
+
+def infer_kind(name, column):
+    if pd.api.types.is_datetime64_any_dtype(column.dtype) or isinstance(column.dtype, pd.CategoricalDtype):
+        return None
+    if pd.api.types.is_integer_dtype(column.dtype):
+        return "integer"
+    if pd.api.types.is_float_dtype(column.dtype):
+        return "float"
+    if not _is_text(column):
+        return None
+    if "date" in str(name).lower():
+        return "datetime"
+    non_null = column.count()
+    if non_null and column.nunique() <= CATEGORY_RATIO * non_null:
+        return "category"
+    return "string"
+
+
+def _to_datetime(column):
+    if not _is_text(column):
+        return pd.to_datetime(column, errors="coerce")
+    for fmt in DATE_FORMATS:
+        parsed = pd.to_datetime(column, format=fmt, errors="coerce")
+        if parsed.notna().sum() == column.notna().sum():
+            return parsed
+    return None
+
+
+def _to_integer(column):
+    numbers = pd.to_numeric(column, errors="coerce")
+    if numbers.isna().any() or numbers.notna().sum() != column.notna().sum():
+        return None
+    if not (numbers == np.floor(numbers)).all():
+        return None
+    return pd.to_numeric(numbers.astype("int64"), downcast="integer")
+
+
+def _to_float(column):
+    numbers = pd.to_numeric(column, errors="coerce")
+    if numbers.notna().sum() != column.notna().sum():
+        return None
+    # Kept at float64 even when float32 would hold every value: pivot
+    # totals are summed in the column's dtype.
+    return numbers.astype("float64")
+
+
+def convert_column(column, kind):
+    """
+    column converted to kind, or None if that would lose values.
+    """
+    if kind == "category":
+        return column.astype("category")
+    if kind == "string":
+        return column.astype(TEXT_DTYPE) if _is_text(column) else None
+    if kind == "datetime":
+        return _to_datetime(column)
+    if kind == "integer":
+        return _to_integer(column)
+    if kind == "float":
+        return _to_float(column)
+    raise ValueError(f"Unknown column kind {kind!r}")
+
+
+def apply_schema(df, schema=REPORT_SCHEMA, infer=True, verbose=True):
+    """
+    Returns df with every column in its compact type (df is not modified).
+    """
+    before = memory_mb(df) if verbose else None
+    out = df.copy(deep=False)
+    for name in df.columns:
+        kind = schema.get(name) if schema else None
+        if kind is None and infer:
+            kind = infer_kind(name, df[name])
+        if kind is None:
+            continue
+        converted = convert_column(df[name], kind)
+        if converted is None:
+            print(f"Column {name!r} kept as {df[name].dtype} (not lossless as {kind})")
+            continue
+        out[name] = converted
+    if verbose:
+        after = memory_mb(out)
+        print(f"Report schema: {before:.1f} MB -> {after:.1f} MB "
+              f"({before / after if after else float('nan'):.1f}x smaller)")
+    return out
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository, not in a package.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """
+    Keeps saved PDBS cookies out of the real per-user cache directory.
+    """
+    import driverManager
+
+    path = tmp_path / "home" / ".fulfillment_report"
+    monkeypatch.setattr(driverManager, "CACHE_DIR", str(path))
+    return path
@@ -0,0 +1,97 @@
+import os
+from datetime import date
+
+import pytest
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+
+import backfill
+import dataDownload
+import driverManager
+import pdbsPages
+import pdbsStub
+
+
+class FakeElement:
+    def __init__(self, driver, locator):
+        self.driver = driver
+        self.locator = locator
+        self.page = driver.page
+
+    def is_displayed(self):
+        return True
+
+    def is_enabled(self):
+        if self.page != self.driver.page:
+            raise StaleElementReferenceException()
+        return True
+
+    def click(self):
+        # The report link: "download" the report the way Chrome would.
+        path = os.path.join(self.driver.download_path, "DailyReport.xls")
+        pdbsStub.write_report_html(path + ".crdownload", 20)
+        os.replace(path + ".crdownload", path)
+
+
+class FakeDriver:
+    """
+    Just enough of a WebDriver for the pdbsPages flow, without a browser.
+    """
+    window_handles = ["main"]
+
+    def __init__(self, download_path):
+        self.download_path = download_path
+        self.urls = []
+        self.quit_count = 0
+        self.page = 0
+
+    def execute(self, driver_command, params=None):
+        return {"value": None}
+
+    def get(self, url):
+        self.urls.append(url)
+
+    def find_element(self, by, value):
+        return FakeElement(self, (by, value))
+
+    def execute_script(self, script, *args):
+        # Login done, menu link found and clicked, date set and shown.
+        if "ChgDate()" in script:
+            self.page += 1
+        return True
+
+    def get_log(self, name):
+        raise RuntimeError("no performance log")
+
+    def quit(self):
+        self.quit_count += 1
+
+
+def test_backfill_selenium_mode_without_progress_callback(tmp_path, monkeypatch):
+    drivers = []
+
+    def create_driver(download_path, lean=False):
+        drivers.append(FakeDriver(download_path))
+        return drivers[-1]
+
+    monkeypatch.setattr(dataDownload, "create_driver", create_driver)
+    try:
+        results = backfill.backfill("demo", "demo", str(tmp_path), date(2025, 9, 2), date(2025, 9, 3), workers=1,
+                                    mode="selenium")
+    finally:
+        driverManager.close_all_sessions()
+
+    assert [r["status"] for r in results] == ["ok", "ok"]
+    assert all(os.path.exists(r["path"]) for r in results)
+    # The browser session is reused across dates.
+    assert len(drivers) == 1
+
+
+def test_set_date_waits_for_the_page_chgdate_submits(tmp_path):
+    driver = FakeDriver(str(tmp_path))
+    pdbsPages.ReportPage(driver).set_date(date(2025, 9, 2), timeout=1)
+    assert driver.page == 1
+
+    # No reload: the link on the page is still the old date's.
+    driver.execute_script = lambda script, *args: True
+    with pytest.raises(TimeoutException):
+        pdbsPages.ReportPage(driver).set_date(date(2025, 9, 2), timeout=0.3)
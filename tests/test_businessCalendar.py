@@ -0,0 +1,33 @@
+from datetime import date, datetime
+
+import pytest
+
+import businessCalendar
+
+
+@pytest.mark.parametrize("year, expected", [
+    (2025, ["01-01", "01-20", "02-17", "05-26", "06-19", "07-03", "07-04",
+            "09-01", "11-27", "11-28", "12-24", "12-25"]),
+    # July 4 on a Saturday is observed on July 3.
+    (2026, ["01-01", "01-19", "02-16", "05-25", "06-19", "07-03",
+            "09-07", "11-26", "11-27", "12-24", "12-25"]),
+    # Juneteenth and Christmas on a Saturday move to Friday, July 4 on a
+    # Sunday to Monday; July 3 and Christmas Eve are then no extra days.
+    (2027, ["01-01", "01-18", "02-15", "05-31", "06-18", "07-05",
+            "09-06", "11-25", "11-26", "12-24"]),
+])
+def test_holidays_for_year(year, expected):
+    days = businessCalendar.holidays_for_year(year)
+    assert sorted(day.strftime("%m-%d") for day in days) == expected
+    assert all(day.year == year for day in days)
+
+
+def test_new_year_on_saturday_is_observed_the_friday_before():
+    assert businessCalendar.holidays_for_year(2022)[date(2021, 12, 31)] == "New Year's Day"
+    assert businessCalendar.previous_business_day(date(2022, 1, 3)) == date(2021, 12, 30)
+
+
+def test_previous_business_day_skips_july_3_and_4():
+    assert businessCalendar.previous_business_day(date(2025, 7, 7)) == date(2025, 7, 2)
+    assert businessCalendar.previous_business_day(datetime(2025, 7, 7, 8, 30)) == datetime(2025, 7, 2, 8, 30)
+    assert businessCalendar.previous_business_day(date(2025, 7, 7), 2) == date(2025, 7, 1)
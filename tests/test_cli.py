@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+import cli
+import dataDownload
+import pdbsStub
+
+
+@pytest.fixture
+def stub():
+    server, base_url = pdbsStub.start_server(rows=50)
+    yield base_url
+    server.shutdown()
+
+
+def run(folder, base_url):
+    return cli.run_once("demo", "demo", str(folder), mode="http", base_url=base_url, refresh=False)
+
+
+def test_run_once_downloads_report(tmp_path, stub):
+    assert run(tmp_path, stub)
+    assert (tmp_path / "DailyReport.xlsx").exists()
+
+
+def test_run_once_fails_on_conversion_error_despite_stale_log(tmp_path, stub, monkeypatch):
+    # An earlier successful run in the log must not count for this one.
+    (tmp_path / "run_log.jsonl").write_text(json.dumps({"run": "DailyOS", "status": "ok", "error": None}) + "\n")
+
+    def convert_download(file_path, xlsx_path, convert):
+        raise ValueError("unreadable report")
+
+    with monkeypatch.context() as m:
+        m.setattr(dataDownload, "convert_download", convert_download)
+        assert not run(tmp_path, stub)
+
+    assert run(tmp_path, stub)
+
+
+def test_dailyos_returns_run_record(tmp_path, monkeypatch):
+    def fetch_report(*args, **kwargs):
+        raise RuntimeError("login failed")
+
+    monkeypatch.setattr(dataDownload, "fetch_report", fetch_report)
+    run = dataDownload.DailyOS("demo", "demo", str(tmp_path), use_cache=False)
+    assert run["run"] == "DailyOS"
+    assert run["status"] == "error"
+    assert run["error"] == "RuntimeError: login failed"
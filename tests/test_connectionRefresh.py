@@ -0,0 +1,85 @@
+import time
+
+import connectionRefresh
+from connectionRefresh import FakeConnection, FakePivot, FakeWorkbook
+
+
+def quiet(message):
+    pass
+
+
+class CountingConnection(FakeConnection):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cancelled = 0
+
+    def cancel(self):
+        self.cancelled += 1
+        super().cancel()
+
+
+def test_connections_refresh_in_parallel():
+    connections = [FakeConnection(f"Query{i}", 0.3) for i in range(4)]
+    pivots = [FakePivot(f"Pivot{i}", "Sheet1", [f"Query{i}"], 0, cache=i) for i in range(4)]
+    fractions = []
+
+    results = connectionRefresh.refresh_workbook(FakeWorkbook(connections, pivots), fractions.append, log=quiet)
+
+    # One after another would take 1.2 s.
+    assert results["seconds"] < 0.9
+    assert all(isinstance(s, float) for s in results["connections"].values())
+    assert [pt.refreshed for pt in pivots] == [1, 1, 1, 1]
+    assert fractions[-1] == 1
+    assert fractions == sorted(fractions)
+
+
+def test_pivot_waits_for_its_connection():
+    connections = [FakeConnection("Fast", 0.05), FakeConnection("Slow", 0.4), FakeConnection("Blocking", 0.1,
+                                                                                              background=False)]
+    pivots = [FakePivot("OnSlow", "Sheet1", ["Slow"], 0, cache=1), FakePivot("OnFast", "Sheet1", ["Fast"], 0, cache=2),
+              FakePivot("OnAll", "Sheet2", None, 0, cache=3)]
+
+    results = connectionRefresh.refresh_workbook(FakeWorkbook(connections, pivots), log=quiet)
+
+    assert results["pivots"]["OnFast"] < results["connections"]["Slow"]
+    assert results["pivots"]["OnSlow"] >= results["connections"]["Slow"]
+    assert results["pivots"]["OnAll"] >= max(results["connections"].values())
+
+
+def test_pivots_skipped_after_failed_connection():
+    connections = [FakeConnection("Good", 0.05), FakeConnection("Bad", 0.05, fail=True)]
+    pivots = [FakePivot("OnGood", "Sheet1", ["Good"], 0, cache=1), FakePivot("OnBad", "Sheet1", ["Bad"], 0, cache=2),
+              FakePivot("OnRange", "Sheet2", None, 0, cache=3)]
+
+    results = connectionRefresh.refresh_workbook(FakeWorkbook(connections, pivots), log=quiet)
+
+    assert results["connections"]["Bad"].startswith("error: ")
+    assert results["pivots"]["OnBad"] == "skipped"
+    assert [pt.refreshed for pt in pivots] == [1, 0, 1]
+
+
+def test_shared_pivot_cache_refreshed_once():
+    connections = [FakeConnection("Query", 0.05)]
+    pivots = [FakePivot(f"Pivot{i}", "Sheet1", ["Query"], 0, cache="shared") for i in range(3)]
+
+    results = connectionRefresh.refresh_workbook(FakeWorkbook(connections, pivots), log=quiet)
+
+    assert sum(pt.refreshed for pt in pivots) == 1
+    assert list(results["pivots"].values()).count("shared cache") == 2
+
+
+def test_timeout_cancels_connection():
+    slow = CountingConnection("Slow", 30)
+    pivots = [FakePivot("OnSlow", "Sheet1", ["Slow"], 0, cache=1)]
+    started = time.perf_counter()
+
+    results = connectionRefresh.refresh_workbook(FakeWorkbook([slow, FakeConnection("Fast", 0.05)], pivots),
+                                                 timeout=0.2, log=quiet)
+
+    assert time.perf_counter() - started < 5
+    assert results["connections"]["Slow"] == "timeout"
+    assert isinstance(results["connections"]["Fast"], float)
+    assert slow.cancelled == 1
+    assert not slow.refreshing()
+    assert results["pivots"]["OnSlow"] == "skipped"
+    assert pivots[0].refreshed == 0
@@ -0,0 +1,39 @@
+import codecs
+
+import pytest
+
+import formatSniff
+import reportParser
+
+
+TABLE = "<html><body><table><tr><th>Customer</th><th>Qty</th></tr><tr><td>Société Générale</td><td>3</td></tr></table></body></html>"
+
+
+@pytest.mark.parametrize("data, encoding", [
+    (TABLE.encode("utf-8"), "utf-8"),
+    (codecs.BOM_UTF8 + TABLE.encode("utf-8"), "utf-8-sig"),
+    (TABLE.encode("utf-16"), "utf-16"),
+    (TABLE.encode("cp1252"), "cp1252"),
+    (TABLE.replace("<html>", '<html><meta charset="latin-1">').encode("latin-1"), "iso8859-1"),
+])
+def test_html_encoding(data, encoding):
+    assert formatSniff.sniff_bytes(data) == formatSniff.Detected(formatSniff.HTML, encoding)
+
+
+def test_utf8_character_cut_at_end_of_sample():
+    data = ("Customer,Qty\n" + "Société Générale,3\n" * 1000).encode("utf-8")
+    # End the sample on the first byte of an é.
+    head = data[:data.index(b"\xc3", formatSniff.SNIFF_BYTES - 100) + 1]
+    assert formatSniff.sniff_bytes(head) == formatSniff.Detected(formatSniff.CSV, "utf-8", ",")
+
+
+def test_cp1252_report_is_read_without_replacement(tmp_path):
+    path = tmp_path / "DailyReport.xls"
+    path.write_bytes(TABLE.encode("cp1252"))
+    df = reportParser.read_report_html(str(path))
+    assert df["Customer"].tolist() == ["Société Générale"]
+
+
+def test_binary_formats():
+    assert formatSniff.sniff_bytes(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1" + b"\x00" * 100).kind == formatSniff.BIFF
+    assert formatSniff.sniff_bytes(b"PK\x03\x04" + b"\x00" * 100).kind == formatSniff.ZIP
@@ -0,0 +1,80 @@
+import json
+import os
+from datetime import date
+
+import pytest
+
+import dataDownload
+import httpFetch
+import pdbsStub
+import reportParser
+
+
+REPORT_DATE = date(2025, 9, 2)
+
+
+@pytest.fixture
+def stub():
+    server, base_url = pdbsStub.start_server(rows=50)
+    yield server, base_url
+    server.shutdown()
+
+
+def test_cookies_saved_as_json_in_user_cache(tmp_path, stub, cache_dir):
+    _, base_url = stub
+    reports = tmp_path / "reports"
+    reports.mkdir()
+    httpFetch.fetch_report_http("demo", "demo", str(reports), REPORT_DATE, base_url=base_url)
+
+    cookie_file = httpFetch.cookie_file(base_url, "demo")
+    assert os.path.dirname(cookie_file) == str(cache_dir)
+    with open(cookie_file, encoding="utf-8") as f:
+        assert "PDBSSESSION" in json.load(f)
+    assert os.listdir(cache_dir) == [os.path.basename(cookie_file)]
+    if os.name == "posix":
+        assert os.stat(cookie_file).st_mode & 0o777 == 0o600
+    assert not any(name.endswith("cookies") for _, _, files in os.walk(reports) for name in files)
+
+    # The saved session is reused: no login, so the wrong password is never sent.
+    httpFetch.fetch_report_http("demo", "wrong", str(reports), REPORT_DATE, base_url=base_url)
+
+
+def test_unreadable_cookie_file_is_ignored(tmp_path, stub, cache_dir):
+    _, base_url = stub
+    cache_dir.mkdir(parents=True)
+    with open(httpFetch.cookie_file(base_url, "demo"), "w", encoding="utf-8") as f:
+        json.dump(["not", "a", "mapping"], f)
+    path = httpFetch.fetch_report_http("demo", "demo", str(tmp_path), REPORT_DATE, base_url=base_url)
+    assert os.path.exists(path)
+
+
+def test_fetch_report_end_to_end(tmp_path, stub):
+    server, base_url = stub
+    steps = []
+
+    path = httpFetch.fetch_report_http("demo", "demo", str(tmp_path), REPORT_DATE,
+                                       lambda step, name: steps.append((step, name)), base_url=base_url)
+
+    assert steps == sorted(httpFetch.STEP_NAMES.items())
+    assert [step for step, _ in steps] == [2, 3, 5, 7]
+    assert os.path.dirname(path) == str(tmp_path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".part")]
+    df = reportParser.read_report_html(path)
+    assert list(df.columns) == pdbsStub.REPORT_COLUMNS
+    assert len(df) == 50
+
+
+def test_fetch_report_wrong_password(tmp_path, stub):
+    _, base_url = stub
+    with pytest.raises(RuntimeError, match="login failed"):
+        httpFetch.fetch_report_http("demo", "wrong", str(tmp_path), REPORT_DATE, base_url=base_url)
+
+
+def test_daily_run_record_uses_http_step_names(tmp_path, stub):
+    _, base_url = stub
+    run = dataDownload.DailyOS("demo", "demo", str(tmp_path), mode="http", base_url=base_url,
+                               use_cache=False, history=False)
+    assert run["status"] == "ok"
+    assert [stage["step"] for stage in run["stages"]] == [
+        "Prepare backup folder", "Backup previous report", *httpFetch.STEP_NAMES.values(), "Convert to Excel",
+        "Store in history"]
@@ -0,0 +1,106 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+import benchmark
+import historyStore
+import incrementalPivot
+import pivotEngine
+import reportSchema
+import xlsConvert
+
+
+SPECS = [pivotEngine.normalize_spec(spec) for spec in benchmark.PIVOT_SPECS + [
+    {"name": "Amount stats by Customer", "index": ["Customer"], "values": {"Amount": "mean", "Qty": "max"}},
+]]
+
+
+def report(rows, seed):
+    rng = np.random.default_rng(seed)
+    customers = np.array([f"Customer {i:03d}" for i in range(40)] + [None], dtype=object)
+    return pd.DataFrame({
+        "SO No": [f"SO{1000000 + i // 4}" for i in range(rows)],
+        "Line": np.arange(rows) % 4 + 1,
+        "Customer": rng.choice(customers, rows),
+        "Part No": [f"MBD-X{n}" for n in rng.integers(100, 400, rows)],
+        "Status": rng.choice(["Open", "Picked", "Shipped"], rows),
+        "Qty": rng.integers(1, 500, rows),
+        "Amount": rng.integers(1000, 2500000, rows) / 100,
+    })
+
+
+def next_day(df, seed):
+    # Some lines ship, some go away, and new orders come in.
+    rng = np.random.default_rng(seed)
+    df = df.copy()
+    changed = rng.choice(len(df), 20, replace=False)
+    df.loc[changed, "Status"] = "Shipped"
+    df.loc[changed[:5], "Qty"] += 1
+    df = df.drop(rng.choice(len(df), 10, replace=False))
+    new = report(15, seed).assign(Customer="Customer 999")
+    return pd.concat([df, new], ignore_index=True)
+
+
+def full(df):
+    return {spec["sheet"]: pivotEngine.flatten(pivotEngine.compute_pivot(df, spec)) for spec in SPECS}
+
+
+def test_matches_full_refresh_day_after_day(tmp_path, capsys):
+    df = report(3000, 0)
+    for day in range(4):
+        typed = reportSchema.apply_schema(df, verbose=False)
+        capsys.readouterr()
+        results = incrementalPivot.compute_pivots(typed, SPECS, str(tmp_path))
+        expected = full(typed)
+        for sheet, frame in expected.items():
+            pd.testing.assert_frame_equal(results[sheet], frame)
+        log = capsys.readouterr().out
+        if day:
+            # Amount stats by Customer: the new customer and the customers
+            # of the changed, dropped and reordered lines only.
+            groups = int(log.split("Amount stats by Customer: re-aggregated ")[1].split()[0])
+            assert 0 < groups < 41
+        df = next_day(df, day + 1)
+
+
+def test_spec_change_recomputes(tmp_path, capsys):
+    df = reportSchema.apply_schema(report(500, 0), verbose=False)
+    incrementalPivot.compute_pivots(df, SPECS[:1], str(tmp_path))
+    changed = dict(SPECS[0], values={"Qty": "count"})
+    capsys.readouterr()
+    results = incrementalPivot.compute_pivots(df, [changed], str(tmp_path))
+    groups = len(pivotEngine.aggregate(df, changed))
+    assert f"re-aggregated {groups} of {groups} groups" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(results[changed["sheet"]],
+                                  pivotEngine.flatten(pivotEngine.compute_pivot(df, changed)))
+
+
+def test_update_report_reads_rows_from_history(tmp_path, monkeypatch):
+    (tmp_path / pivotEngine.SPECS_NAME).write_text(json.dumps({"pivots": benchmark.PIVOT_SPECS}))
+    xlsx_path = str(tmp_path / "DailyReport.xlsx")
+    df = report(2000, 0)
+    for day, business_date in enumerate(["09-01-2025", "09-02-2025"]):
+        xlsConvert.write_frame(df, xlsx_path)
+        historyStore.ingest_report(str(tmp_path), xlsx_path, business_date)
+        expected = pivotEngine.update_report_pandas(str(tmp_path))
+
+        def read_excel(*args, **kwargs):
+            raise AssertionError("DailyReport.xlsx was read")
+
+        with monkeypatch.context() as m:
+            m.setattr(pd, "read_excel", read_excel)
+            frames = pivotEngine.update_report_pandas(str(tmp_path), incremental=True)
+        for sheet, frame in expected.items():
+            pd.testing.assert_frame_equal(frames[sheet], frame, check_dtype=False, check_categorical=False)
+        df = next_day(df, day + 1)
+
+
+def test_falls_back_to_read_excel_without_history(tmp_path):
+    (tmp_path / pivotEngine.SPECS_NAME).write_text(json.dumps({"pivots": benchmark.PIVOT_SPECS[:1]}))
+    xlsConvert.write_frame(report(100, 0), str(tmp_path / "DailyReport.xlsx"))
+    expected = pivotEngine.update_report_pandas(str(tmp_path))
+    frames = pivotEngine.update_report_pandas(str(tmp_path), incremental=True)
+    assert list(frames) == list(expected)
+    for sheet, frame in expected.items():
+        pd.testing.assert_frame_equal(frames[sheet], frame)
@@ -0,0 +1,39 @@
+import os
+from datetime import datetime
+
+import backupStore
+import dataDownload
+import pdbsStub
+import pipeline
+
+
+def test_rerun_after_pipeline_keeps_previous_report_backup(tmp_path, monkeypatch):
+    dPath = str(tmp_path)
+    report_path = os.path.join(dPath, "DailyReport.xlsx")
+    business_date = dataDownload.subtract_one_business_day(datetime.today()).date()
+    backup_date = dataDownload.subtract_one_business_day(business_date)
+
+    # Yesterday's run left its report behind.
+    pdbsStub.write_report_html(str(tmp_path / "old.xls"), 20, seed=1)
+    dataDownload.convert_download(str(tmp_path / "old.xls"), report_path)
+    previous = backupStore.sha256_file(report_path)
+
+    def fetch_report(username, password, dPath, business_date, *args, **kwargs):
+        path = os.path.join(dPath, "DailyReport.xls")
+        pdbsStub.write_report_html(path, 20, seed=2)
+        return path
+
+    monkeypatch.setattr(dataDownload, "fetch_report", fetch_report)
+    stages = {stage.name: stage for stage in pipeline.daily_stages("user", "secret", dPath, business_date)}
+    inputs = {name: stages[name].func({}, lambda fraction: None) for name in ("backup", "fetch")}
+    stages["convert"].func(inputs, lambda fraction: None)
+    assert inputs["backup"]["sha256"] == previous
+
+    # A rerun of the backup stage, or DailyOS later the same day, must not
+    # file the fresh report under the day before.
+    assert stages["backup"].func({}, lambda fraction: None) == {"sha256": None}
+    record = dataDownload.DailyOS("user", "secret", dPath, history=False)
+    assert record["status"] == "ok"
+    store = backupStore.BackupStore(os.path.join(dPath, "backup"))
+    assert store.lookup(backup_date)["blob"] == previous
+    assert store.dates() == [backup_date]
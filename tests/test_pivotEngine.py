@@ -0,0 +1,57 @@
+import hashlib
+import json
+import zipfile
+
+import pandas as pd
+import pytest
+
+import pivotEngine
+
+
+CONNECTIONS = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+               '<connections xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"/>')
+
+
+def make_folder(tmp_path):
+    pd.DataFrame({"Customer": ["A", "B", "A"], "Status": ["Open", "Open", "Closed"], "Qty": [1, 2, 3]}) \
+        .to_excel(tmp_path / "DailyReport.xlsx", index=False)
+    master = tmp_path / pivotEngine.WORKBOOK_NAME
+    pd.DataFrame({"Note": ["kept"]}).to_excel(master, sheet_name="Cover", index=False)
+    # The part Excel stores query connections in.
+    with zipfile.ZipFile(master, "a") as archive:
+        archive.writestr("xl/connections.xml", CONNECTIONS)
+    (tmp_path / pivotEngine.SPECS_NAME).write_text(json.dumps({
+        "pivots": [{"name": "Open by Customer", "index": ["Customer"], "columns": ["Status"],
+                    "values": {"Qty": "sum"}}]
+    }))
+    return master
+
+
+def test_update_report_pandas_leaves_master_untouched(tmp_path):
+    master = make_folder(tmp_path)
+    before = hashlib.sha256(master.read_bytes()).hexdigest()
+
+    pivotEngine.update_report_pandas(str(tmp_path))
+    pivotEngine.update_report_pandas(str(tmp_path))
+
+    assert hashlib.sha256(master.read_bytes()).hexdigest() == before
+    sheets = pd.read_excel(tmp_path / pivotEngine.OUTPUT_NAME, sheet_name=None)
+    assert list(sheets) == ["Open by Customer"]
+    assert sheets["Open by Customer"]["Qty | Grand Total"].tolist() == [4, 2, 6]
+
+
+def test_write_sheets_refuses_workbook_with_connections(tmp_path):
+    master = make_folder(tmp_path)
+    assert pivotEngine.has_connections(str(master))
+    with pytest.raises(ValueError, match="data connections"):
+        pivotEngine.write_sheets(str(master), {"Extra": pd.DataFrame({"x": [1]})})
+
+
+def test_write_sheets_replaces_sheet_and_keeps_others(tmp_path):
+    path = tmp_path / "book.xlsx"
+    pivotEngine.write_sheets(str(path), {"One": pd.DataFrame({"x": [1]}), "Two": pd.DataFrame({"y": [2]})})
+    pivotEngine.write_sheets(str(path), {"One": pd.DataFrame({"x": [5]})})
+    sheets = pd.read_excel(path, sheet_name=None)
+    assert list(sheets) == ["One", "Two"]
+    assert sheets["One"]["x"].tolist() == [5]
+
@@ -0,0 +1,61 @@
+import io
+
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+
+import pdbsStub
+import reportParser
+
+
+def write_table(path, header, rows):
+    head = "<tr>" + "".join(f"<th>{c}</th>" for c in header) + "</tr>\n" if header else ""
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>\n" for row in rows)
+    path.write_text(f"<html><body><table>{head}{body}</table></body></html>", encoding="utf-8")
+    return str(path)
+
+
+def read_html(path):
+    with open(path, encoding="utf-8") as f:
+        return pd.read_html(io.StringIO(f.read()))[0]
+
+
+CASES = {
+    "numbers": (["A", "B"], [["1", "1,234"], ["2", "3.5"], ["", "-7"]]),
+    "leading zeros become text later": (["SO", "Qty"], [["00000", "1"]] * 5 + [["SO-1", "2"]]),
+    "na strings": (["A", "B", "C"], [["1", "N/A", "x"], ["NA", "null", "NULL"], ["3", "", "None"]]),
+    "all na": (["A", "B"], [["N/A", "1"], ["", "2"]]),
+    "bools": (["A", "B"], [["True", "true"], ["False", "FALSE"]]),
+    "bools with na": (["A", "B"], [["True", "yes"], ["", "True"]]),
+    "bools and numbers": (["A"], [["True"], ["1"]]),
+    "na batch after bools": (["A", "B"], [["True", "1"], ["False", "2"], ["N/A", ""], ["", "null"]]),
+    "bools batch after numbers": (["A"], [["1"], ["2"], ["True"], ["False"]]),
+    "duplicate headers": (["A", "A", "A.1", "B", "B"], [["1", "2", "3", "4", "5"]]),
+    "blank headers": (["", "A", ""], [["1", "2", "3"]]),
+    "no header row": (None, [["1", "x"], ["2", "y"]]),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+@pytest.mark.parametrize("batch_rows", [50000, 2])
+def test_matches_read_html(tmp_path, name, batch_rows):
+    header, rows = CASES[name]
+    path = write_table(tmp_path / "report.xls", header, rows)
+    assert_frame_equal(reportParser.read_report_html(path, batch_rows=batch_rows), read_html(path))
+
+
+def test_stub_report_matches_read_html(tmp_path):
+    path = pdbsStub.write_report_html(str(tmp_path / "DailyReport.xls"), 500)
+    assert_frame_equal(reportParser.read_report_html(path, batch_rows=128), read_html(path))
+
+
+def test_parallel_matches_serial(tmp_path, monkeypatch):
+    monkeypatch.setattr(reportParser, "PARALLEL_MIN_BYTES", 0)
+    rows = [[str(i), "x" if i == 2999 else str(i), "N/A" if i % 7 else "True"] for i in range(3000)]
+    path = write_table(tmp_path / "report.xls", ["A", "B", "C"], rows)
+    assert_frame_equal(reportParser.read_report_html(path, workers=3), reportParser.read_report_html(path))
+
+
+def test_header_columns():
+    assert reportParser.header_columns(["A", "A", "A.1"]) == ["A", "A.2", "A.1"]
+    assert reportParser.header_columns(["", "x", ""]) == ["Unnamed: 0", "x", "Unnamed: 2"]
@@ -0,0 +1,40 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import benchmark
+import pdbsStub
+import pivotEngine
+import reportSchema
+
+
+def report(rows):
+    # The columns the benchmark pivots read, drawn like pdbsStub's report.
+    rng = np.random.default_rng(0)
+    return pd.DataFrame({
+        "Line": np.arange(rows) % 4 + 1,
+        "Customer": rng.choice(pdbsStub.CUSTOMERS, rows),
+        "Part No": [f"MBD-X{n // 1000}-{n % 1000}" for n in rng.integers(10100, 14000, rows)],
+        "Status": rng.choice(pdbsStub.STATUSES, rows),
+        "Qty": rng.integers(1, 500, rows),
+        # Half amounts fit float32 exactly, but their sums do not.
+        "Amount": rng.integers(10, 25000, rows) + 0.5,
+    })
+
+
+@pytest.mark.parametrize("spec", benchmark.PIVOT_SPECS, ids=lambda spec: spec["name"])
+def test_pivot_totals_unchanged_by_schema(spec):
+    df = report(200000)
+    spec = pivotEngine.normalize_spec(spec)
+    typed = reportSchema.apply_schema(df, verbose=False)
+
+    expected = pivotEngine.compute_pivot(df, spec)
+    actual = pivotEngine.compute_pivot(typed, spec)
+    assert actual.to_numpy(dtype=float).tolist() == expected.to_numpy(dtype=float).tolist()
+
+
+def test_value_columns_keep_full_precision():
+    typed = reportSchema.apply_schema(report(10), verbose=False)
+    assert typed["Amount"].dtype == "float64"
+    assert typed["Customer"].dtype == "category"
+    assert pd.api.types.is_integer_dtype(typed["Qty"].dtype)
@@ -0,0 +1,56 @@
+import io
+
+import openpyxl
+import pandas as pd
+import pytest
+
+import pdbsStub
+import xlsConvert
+
+
+def write_table(path, header, rows):
+    head = "<tr>" + "".join(f"<th>{c}</th>" for c in header) + "</tr>\n"
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>\n" for row in rows)
+    path.write_text(f"<html><body><table>{head}{body}</table></body></html>", encoding="utf-8")
+    return str(path)
+
+
+def cells(xlsx_path):
+    sheet = openpyxl.load_workbook(xlsx_path).worksheets[0]
+    return [[(type(c.value).__name__, c.value) for c in row] for row in sheet.iter_rows()]
+
+
+def baseline(html_path, xlsx_path):
+    # The old convert path: read_html, then to_excel.
+    with open(html_path, encoding="utf-8") as f:
+        pd.read_html(io.StringIO(f.read()))[0].to_excel(xlsx_path, index=False)
+    return cells(xlsx_path)
+
+
+def late_text_rows():
+    # SO turns to text only after the first 1500 rows.
+    return [["00000", str(i), "N/A" if i % 3 else "True"] for i in range(1500)] + [["SO-1", "1,234", "False"]]
+
+
+CASES = {
+    "late text": (["SO", "Qty", "Flag"], late_text_rows()),
+    "na and bools": (["A", "B", "C"], [["1", "N/A", "true"], ["null", "x", "FALSE"], ["3", "", ""]]),
+    "duplicate headers": (["A", "A", ""], [["1", "2", "3"]]),
+}
+
+
+@pytest.mark.parametrize("name", CASES)
+@pytest.mark.parametrize("workers", [1, 2])
+def test_convert_matches_to_excel(tmp_path, monkeypatch, name, workers):
+    monkeypatch.setattr(xlsConvert, "SPILL_ROWS", 100)
+    header, rows = CASES[name]
+    path = write_table(tmp_path / "report.xls", header, rows)
+    xlsConvert.convert_report(path, str(tmp_path / "out.xlsx"), workers=workers)
+    assert cells(str(tmp_path / "out.xlsx")) == baseline(path, str(tmp_path / "baseline.xlsx"))
+
+
+def test_stub_report_matches_to_excel(tmp_path):
+    path = pdbsStub.write_report_html(str(tmp_path / "DailyReport.xls"), 300)
+    stats = xlsConvert.convert_report(path, str(tmp_path / "out.xlsx"))
+    assert stats["rows"] == 300
+    assert cells(str(tmp_path / "out.xlsx")) == baseline(path, str(tmp_path / "baseline.xlsx"))
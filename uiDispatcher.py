@@ -0,0 +1,66 @@
+"""
+Moves progress events from worker threads onto the Tk main loop.
+
+Worker threads must not touch Tk widgets. A callback made by
+UIDispatcher.wrap only puts (handler, action, value) on a queue; the main
+loop drains the queue every frame (after()) and calls the handlers there.
+Runs of "update" events for the same handler are merged into the last
+one, so a backend reporting thousands of row-level updates still costs at
+most one repaint per frame. "start", "stage" and "stop" are always
+delivered, in order.
+"""
+import logging
+import queue
+import tkinter as tk
+
+
+FRAME_MS = 16
+
+
+class UIDispatcher:
+    def __init__(self, root, frame_ms=FRAME_MS):
+        self.root = root
+        self.frame_ms = frame_ms
+        self._queue = queue.SimpleQueue()
+        self._after_id = self.root.after(self.frame_ms, self._drain)
+
+    def wrap(self, handler):
+        """
+        Thread-safe stand-in for handler(action, value=0).
+        """
+        def post(action, value=0):
+            self._queue.put((handler, action, value))
+        return post
+
+    def _coalesced(self):
+        events = []
+        while True:
+            try:
+                event = self._queue.get_nowait()
+            except queue.Empty:
+                return events
+            handler, action, _ = event
+            if action == "update" and events and events[-1][0] is handler and events[-1][1] == "update":
+                events[-1] = event
+            else:
+                events.append(event)
+
+    def _drain(self):
+        for handler, action, value in self._coalesced():
+            try:
+                handler(action, value)
+            except Exception:
+                logging.error(f"UI handler failed on {action!r}", exc_info=True)
+        try:
+            self._after_id = self.root.after(self.frame_ms, self._drain)
+        except tk.TclError:
+            # Window already destroyed.
+            self._after_id = None
+
+    def close(self):
+        if self._after_id is not None:
+            try:
+                self.root.after_cancel(self._after_id)
+            except tk.TclError:
+                pass
+            self._after_id = None
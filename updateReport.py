@@ -1,67 +1,59 @@
 import os
-from datetime import datetime
-import time
-import win32com.client as win32
 
-def update_report(report_path, debug=False, progress_callback=None):
+import connectionRefresh
+import instrumentation
+
+def update_report(report_path, debug=False, progress_callback=None, backend="excel"):
     """
     Updates the Excel report with a continuous progress bar (0-100%).
+
+    backend="excel" refreshes connections and pivots through Excel (Windows);
+    backend="pandas" computes the pivots without Excel into a separate
+    workbook (see pivotEngine);
+    backend="incremental" does the same but only recomputes the pivot groups
+    whose rows changed since the last refresh (see incrementalPivot).
+
+    Each phase's time, CPU, peak memory and I/O is sent to progress_callback
+    as ("stage", record) and appended to report_path/run_log.jsonl.
     """
+    recorder = instrumentation.RunRecorder(f"update_report[{backend}]", report_path, progress_callback)
+    status, error = "ok", None
     try:
         if progress_callback:
             progress_callback("start")  # Start progress bar
 
+        if backend in ("pandas", "incremental"):
+            import pivotEngine
+            pivotEngine.update_report_pandas(report_path, progress_callback, incremental=backend == "incremental",
+                                             recorder=recorder)
+            if progress_callback:
+                progress_callback("update", 100)
+            return
+
+        import win32com.client as win32
+
         # --- Step 0: Open workbook ---
         excel = win32.DispatchEx('Excel.Application')
         excel.Visible = False
         excel.DisplayAlerts = False
         excel.ScreenUpdating = False
         wb = excel.Workbooks.Open(os.path.join(report_path, 'DAILY ORDER FULFILLMENT (F.U.D).xlsx'))
+        recorder.mark("Open workbook")
 
-        # --- Step 1: Refresh connections ---
-        print("Refreshing connections...")
-        total_connections = wb.Connections.Count
-        for i, conn in enumerate(wb.Connections):
-            try:
-                if conn.Type in [1, 2]:
-                    try:
-                        conn.OLEDBConnection.BackgroundQuery = False
-                    except AttributeError:
-                        pass
-                conn.Refresh()
-                try:
-                    while conn.Refreshing:
-                        time.sleep(1)
-                except AttributeError:
-                    pass
-                print(f"Refreshed: {conn.Name}")
-            except Exception as e:
-                print(f"Error refreshing {conn.Name}: {e}")
-            
-            # Update progress continuously (~30% for connections)
-            if progress_callback and total_connections > 0:
-                progress = (i + 1) / total_connections * 30
-                progress_callback("update", progress)
-
-        # --- Step 2: Refresh pivot tables ---
-        print("Refreshing pivot tables...")
-        all_pts = [(ws, pt) for ws in wb.Worksheets for pt in ws.PivotTables()]
-        total_pts = len(all_pts)
-        for i, (ws, pt) in enumerate(all_pts):
-            try:
-                pt.RefreshTable()
-                print(f"Refreshed pivot table: {pt.Name} on {ws.Name}")
-            except Exception as e:
-                print(f"Error refreshing pivot table {pt.Name}: {e}")
-            
-            # Update progress continuously (~40% for pivot tables)
-            if progress_callback and total_pts > 0:
-                progress = 30 + (i + 1) / total_pts * 40
-                progress_callback("update", progress)
+        # --- Steps 1-2: Refresh connections and pivot tables (~70%) ---
+        # Connections refresh in parallel; each pivot table refreshes as soon
+        # as its connection is done (see connectionRefresh).
+        print("Refreshing connections and pivot tables...")
+        def on_refresh(fraction):
+            if progress_callback:
+                progress_callback("update", fraction * 70)
+        connectionRefresh.refresh_workbook(connectionRefresh.ComWorkbook(wb), on_refresh)
+        recorder.mark("Refresh connections and pivot tables")
 
         # --- Step 3: Save workbook (~20%) ---
         wb.SaveAs(Filename=os.path.expanduser(report_path), FileFormat=51)
         print("Workbook saved.")
+        recorder.mark("Save workbook")
         if progress_callback:
             progress_callback("update", 90)
 
@@ -70,11 +62,16 @@ def update_report(report_path, debug=False, progress_callback=None):
         excel.Visible = True
         excel.ScreenUpdating = True
         print("Excel refresh complete. Workbook remains open.")
+        recorder.mark("Finish")
         if progress_callback:
             progress_callback("update", 100)
 
         # return excel, wb
 
+    except Exception as e:
+        status, error = "error", f"{type(e).__name__}: {e}"
+        raise
     finally:
+        recorder.finish(status, error)
         if progress_callback:
             progress_callback("stop", 100)
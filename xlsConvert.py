@@ -0,0 +1,250 @@
+"""
+Streams the downloaded DailyReport*.xls straight into DailyReport.xlsx.
+HTML tables, real BIFF .xls and CSV exports are told apart by formatSniff.
+
+Rows go from the parser through a temporary spill file to xlsxwriter's
+constant_memory writer, so neither a DataFrame nor the whole sheet is
+ever held in memory; the spill lets each column be typed on all of its
+cells, as read_html does, without parsing the report twice. The output
+matches df.to_excel(xlsx_path, index=False) on the DataFrame the old path
+built: same sheet name, bold bordered header, numbers as numbers, True/
+False as booleans, text as text and NA cells left blank.
+"""
+import csv
+import itertools
+import marshal
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import xlsxwriter
+
+import formatSniff
+import reportParser
+
+
+SHEET_NAME = "Sheet1"
+SPILL_ROWS = 10000
+
+
+def _open_writer(xlsx_path):
+    workbook = xlsxwriter.Workbook(xlsx_path, {"constant_memory": True})
+    worksheet = workbook.add_worksheet(SHEET_NAME)
+    # Same header style pandas 2.x applies in to_excel.
+    header_format = workbook.add_format({
+        "bold": True,
+        "border": 1,
+        "align": "center",
+        "valign": "top"
+    })
+    return workbook, worksheet, header_format
+
+
+def _write_header(worksheet, header_format, columns):
+    for col, name in enumerate(columns):
+        if isinstance(name, str):
+            worksheet.write_string(0, col, name, header_format)
+        else:
+            worksheet.write_number(0, col, name, header_format)
+
+
+def _stats(rows, start):
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else float(rows)
+    }
+
+
+def convert_html_report(file_path, xlsx_path, encoding=None):
+    """
+    Converts an HTML-table .xls into xlsx, parsing the HTML once.
+
+    read_html types each column on all of its cells, so the first pass
+    tallies what every cell looks like (reportParser.cell_kind) while the
+    rows are spilled to a temporary file; the second pass writes them from
+    the spill with the column types that tally gives.
+    """
+    return _convert_text_rows(reportParser.iter_raw_rows(file_path, encoding=encoding), xlsx_path)
+
+
+def convert_csv_report(file_path, xlsx_path, encoding="utf-8", delimiter=","):
+    """
+    Converts a CSV export into xlsx the same way, first line as header.
+    """
+    with open(file_path, "r", encoding=encoding, newline="") as f:
+        rows = ((cells, i == 0) for i, cells in enumerate(csv.reader(f, delimiter=delimiter)) if cells)
+        return _convert_text_rows(rows, xlsx_path)
+
+
+def _spill_rows(rows, width, spill):
+    """
+    Writes rows to spill in marshal batches and returns (row count, the
+    set of cell kinds seen in each column).
+    """
+    kinds = [set() for _ in range(width)]
+    count = 0
+    batch = []
+    for cells in rows:
+        cells = cells[:width]
+        for col, text in enumerate(cells):
+            if "text" not in kinds[col]:
+                kinds[col].add(reportParser.cell_kind(text))
+        batch.append(cells)
+        if len(batch) >= SPILL_ROWS:
+            marshal.dump(batch, spill)
+            count += len(batch)
+            batch = []
+    if batch:
+        marshal.dump(batch, spill)
+        count += len(batch)
+    return count, kinds
+
+
+def _read_spill(spill):
+    spill.seek(0)
+    while True:
+        try:
+            yield from marshal.load(spill)
+        except EOFError:
+            return
+
+
+def _convert_text_rows(rows, xlsx_path):
+    start = time.perf_counter()
+
+    first = next(rows, None)
+    if first is None:
+        columns = []
+    elif first[1]:
+        columns = reportParser.header_columns(first[0])
+    else:
+        columns = list(range(len(first[0])))
+        rows = itertools.chain([first], rows)
+    width = len(columns)
+
+    with tempfile.TemporaryFile() as spill:
+        row_count, kinds = _spill_rows((cells for cells, _ in rows), width, spill)
+        types = [reportParser.column_kind(k - {"na"}) for k in kinds]
+
+        workbook, worksheet, header_format = _open_writer(xlsx_path)
+        try:
+            _write_header(worksheet, header_format, columns)
+            for row_index, cells in enumerate(_read_spill(spill), start=1):
+                for col, text in enumerate(cells):
+                    kind = types[col]
+                    if kind == "empty" or text in reportParser.NA_VALUES:
+                        continue
+                    if kind == "number":
+                        worksheet.write_number(row_index, col, reportParser.parse_number(text))
+                    elif kind == "bool":
+                        worksheet.write_boolean(row_index, col, text in reportParser.TRUE_VALUES)
+                    else:
+                        worksheet.write_string(row_index, col, text)
+        finally:
+            workbook.close()
+
+    return _stats(row_count, start)
+
+
+def convert_html_parallel(file_path, xlsx_path, workers=None, encoding=None):
+    """
+    Parses the HTML report on several processes (reportParser.read_report_parallel)
+    and writes the typed frame.
+    """
+    start = time.perf_counter()
+    df = reportParser.read_report_html(file_path, encoding=encoding, workers=workers)
+    write_frame(df, xlsx_path)
+    return _stats(len(df), start)
+
+
+def write_frame(df, xlsx_path):
+    """
+    Writes df like df.to_excel(xlsx_path, index=False), cell by typed cell
+    through the constant_memory writer.
+    """
+    workbook, worksheet, header_format = _open_writer(xlsx_path)
+    try:
+        _write_header(worksheet, header_format, list(df.columns))
+        numeric = [pd.api.types.is_numeric_dtype(dtype) for dtype in df.dtypes]
+        columns = [df.iloc[:, i].to_numpy(dtype=object) for i in range(df.shape[1])]
+        for r, values in enumerate(zip(*columns), start=1):
+            for col, value in enumerate(values):
+                if value is None or value != value:
+                    continue
+                if isinstance(value, (bool, np.bool_)):
+                    worksheet.write_boolean(r, col, bool(value))
+                elif numeric[col]:
+                    worksheet.write_number(r, col, value)
+                else:
+                    worksheet.write_string(r, col, str(value))
+    finally:
+        workbook.close()
+
+
+def convert_biff_report(file_path, xlsx_path):
+    """
+    Converts a real BIFF .xls into xlsx row by row through xlrd.
+    """
+    import xlrd
+
+    start = time.perf_counter()
+    book = xlrd.open_workbook(file_path, on_demand=True)
+    try:
+        sheet = book.sheet_by_index(0)
+        workbook, worksheet, header_format = _open_writer(xlsx_path)
+        # pandas' default datetime_format for to_excel.
+        date_format = workbook.add_format({"num_format": "yyyy-mm-dd hh:mm:ss"})
+        try:
+            row_index = 0
+            for r, cells in enumerate(sheet.get_rows()):
+                if r == 0:
+                    # read_excel names blank header cells "Unnamed: <n>".
+                    _write_header(worksheet, header_format, [
+                        cell.value if cell.value != "" else f"Unnamed: {col}"
+                        for col, cell in enumerate(cells)
+                    ])
+                    continue
+                row_index = r
+                for col, cell in enumerate(cells):
+                    if cell.ctype in (xlrd.XL_CELL_EMPTY, xlrd.XL_CELL_BLANK, xlrd.XL_CELL_ERROR):
+                        continue
+                    if cell.ctype == xlrd.XL_CELL_NUMBER:
+                        worksheet.write_number(r, col, cell.value)
+                    elif cell.ctype == xlrd.XL_CELL_DATE:
+                        value = xlrd.xldate_as_datetime(cell.value, book.datemode)
+                        worksheet.write_datetime(r, col, value, date_format)
+                    elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                        worksheet.write_boolean(r, col, bool(cell.value))
+                    else:
+                        worksheet.write_string(r, col, cell.value)
+        finally:
+            workbook.close()
+    finally:
+        book.release_resources()
+
+    return _stats(row_index, start)
+
+
+def convert_report(file_path, xlsx_path, detected=None, workers=1):
+    """
+    Converts the downloaded report with the converter for its format
+    (formatSniff.sniff(file_path) unless detected is given) and prints the
+    rows/s achieved. HTML reports are parsed on workers processes when
+    workers is not 1 (None: one per core).
+    """
+    detected = detected or formatSniff.sniff(file_path)
+    if detected.kind == formatSniff.HTML and workers != 1:
+        stats = convert_html_parallel(file_path, xlsx_path, workers, detected.encoding)
+    elif detected.kind == formatSniff.HTML:
+        stats = convert_html_report(file_path, xlsx_path, encoding=detected.encoding)
+    elif detected.kind == formatSniff.BIFF:
+        stats = convert_biff_report(file_path, xlsx_path)
+    elif detected.kind == formatSniff.CSV:
+        stats = convert_csv_report(file_path, xlsx_path, detected.encoding, detected.delimiter)
+    else:
+        raise ValueError(f"Cannot convert {file_path}: detected format is {detected.kind}")
+    print(f"Converted {stats['rows']} rows in {stats['seconds']} s ({stats['rows_per_sec']} rows/s)")
+    return stats